@@ -0,0 +1,525 @@
+"""
+Benchmark suite for the hot paths, on synthetic data (app.synthetic)
+
+Each benchmark is a factory registered with @benchmark(name): it prepares its
+inputs from the dataset and returns the zero-argument call to time. The runner
+warms every call up once, times at least `repeat` rounds (more for fast calls)
+and reports min/median/mean/p95.
+
+A run is saved as JSON in BENCH_RESULTS_DIR with the dataset parameters, git
+revision and interpreter, and can be compared with an earlier run on the same
+dataset: medians slower than the baseline by more than --threshold are reported
+as regressions and make the command exit with status 1.
+
+The front API (main.py) is served from the dataset directory with yf.download
+answered from the synthetic price table, so endpoint timings exclude the network.
+
+Usage:
+  python -m app.benchmarks --tickers 40 --years 5 --articles-per-day 20
+  python -m app.benchmarks --only corr. --only front. --compare latest
+  python -m app.benchmarks --list
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app import synthetic
+
+BENCH_DATA_DIR = Path(os.getenv("BENCH_DATA_DIR", ".bench_data"))
+BENCH_RESULTS_DIR = Path(os.getenv("BENCH_RESULTS_DIR", ".benchmarks"))
+DEFAULT_THRESHOLD = 0.2
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark factory when a dependency or the data it needs is unavailable"""
+
+
+# name -> factory(ctx) returning the call to time, or (call, info dict)
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    def decorator(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return decorator
+
+
+class BenchContext:
+    """A generated dataset: its directory, manifest and the windows benchmarks use"""
+
+    def __init__(self, data_dir: Path, manifest: Dict):
+        self.data_dir = Path(data_dir).resolve()
+        self.manifest = manifest
+        self.symbols: List[str] = manifest["symbols"]
+        self.start: str = manifest["start"]
+        self.end: str = manifest["end"]
+        # Most benchmarks use the last year, like the API's typical requests
+        self.year_start = max(self.start, f"{int(self.end[:4]) - 1}{self.end[4:]}")
+
+    def path(self, name: str) -> Path:
+        return self.data_dir / name
+
+
+def dataset_dir(n_tickers: int, years: float, articles_per_day: float, seed: int) -> Path:
+    return BENCH_DATA_DIR / f"t{n_tickers}_y{years:g}_a{articles_per_day:g}_s{seed}"
+
+
+def prepare_dataset(n_tickers: int = 10, years: float = 2, articles_per_day: float = 5, seed: int = 0,
+                    data_dir: str = None) -> BenchContext:
+    """Generate (or reuse) the dataset for these parameters"""
+    out = Path(data_dir) if data_dir else dataset_dir(n_tickers, years, articles_per_day, seed)
+    manifest = synthetic.generate(str(out), n_tickers, years, articles_per_day, seed)
+    return BenchContext(out, manifest)
+
+
+def _offline_download(ctx: BenchContext):
+    """yf.download stand-in returning the synthetic OHLCV of one symbol over [start, end)"""
+    import pandas as pd
+
+    from app import price_store
+
+    conn = price_store.connect(str(ctx.path(synthetic.PRICES_FILE)))
+    frame = pd.read_sql(f"SELECT symbol, date, open_price, high_price, low_price, volume "
+                        f"FROM {price_store.PRICES_TABLE}", conn, parse_dates=["date"])
+    conn.close()
+    history = {
+        symbol: g.set_index("date").rename(columns={"open_price": "Open", "high_price": "High",
+                                                     "low_price": "Low", "volume": "Volume"})
+                 .assign(Close=lambda d: d["Open"])[["Open", "High", "Low", "Close", "Volume"]]
+        for symbol, g in frame.groupby("symbol")
+    }
+
+    def download(tickers, start=None, end=None, **kwargs):
+        if not isinstance(tickers, str):
+            raise SkipBenchmark("multi-ticker downloads are not simulated")
+        data = history.get(tickers)
+        if data is None:
+            return pd.DataFrame()
+        # Same number of business days as requested, ending on the dataset's last day
+        n = len(pd.bdate_range(start, end, inclusive="left")) if start and end else len(data)
+        return data.iloc[-n:] if n else data.iloc[:0]
+
+    return download
+
+
+@contextmanager
+def use_dataset(ctx: BenchContext):
+    """Point sentiment_price_corr_json and main.py at the dataset for the duration of a run"""
+    import main as front
+    import sentiment_price_corr_json as corr
+
+    saved_cfg = (corr.CFG.PRICES_DB_PATH, corr.CFG.DB_URI, corr.CFG.SENTI_JSON_PATH)
+    saved_download = front.yf.download
+    saved_cwd = os.getcwd()
+    corr.CFG.PRICES_DB_PATH = ctx.path(synthetic.PRICES_FILE).resolve()
+    corr.CFG.DB_URI = f"sqlite:///{corr.CFG.PRICES_DB_PATH.as_posix()}"
+    corr.CFG.SENTI_JSON_PATH = ctx.path(synthetic.SENTIMENT_FILE).resolve()
+    front.yf.download = _offline_download(ctx)
+    # main.py opens its data files relative to the working directory
+    os.chdir(ctx.data_dir)
+    try:
+        yield
+    finally:
+        os.chdir(saved_cwd)
+        front.yf.download = saved_download
+        corr.CFG.PRICES_DB_PATH, corr.CFG.DB_URI, corr.CFG.SENTI_JSON_PATH = saved_cfg
+
+
+# ============================ BENCHMARKS ============================
+
+def _features(ctx: BenchContext):
+    import sentiment_price_corr_json as corr
+
+    ticker = ctx.symbols[0]
+    prices = corr.fetch_prices(corr.get_engine(), ticker, ctx.start, ctx.end)
+    senti = corr.fetch_sentiment_from_json(ticker, ctx.start, ctx.end)
+    return prices, senti
+
+
+@benchmark("corr.prep_features")
+def bench_prep_features(ctx):
+    import sentiment_price_corr_json as corr
+
+    prices, senti = _features(ctx)
+    return lambda: corr.prep_features(prices, senti), {"rows": len(prices)}
+
+
+@benchmark("corr.corr_with_leads")
+def bench_corr_with_leads(ctx):
+    import sentiment_price_corr_json as corr
+
+    df = corr.prep_features(*_features(ctx))
+    return lambda: corr.corr_with_leads(df, max_lead=5), {"rows": len(df)}
+
+
+@benchmark("corr.multi_horizon_forecast")
+def bench_multi_horizon_forecast(ctx):
+    import sentiment_price_corr_json as corr
+
+    df = corr.prep_features(*_features(ctx))
+    return lambda: corr.multi_horizon_forecast(df, H=5), {"rows": len(df)}
+
+
+@benchmark("corr.run_batch_dict")
+def bench_run_batch_dict(ctx):
+    import sentiment_price_corr_json as corr
+
+    return (lambda: corr.run_batch_dict(ctx.symbols, ctx.year_start, ctx.end),
+            {"tickers": len(ctx.symbols), "workers": corr.CFG.BATCH_WORKERS})
+
+
+def _sql_models():
+    try:
+        from app.models import sql_models
+    except ImportError as e:
+        raise SkipBenchmark(f"app.models.sql_models unavailable: {e}")
+    return sql_models
+
+
+def _sql_session(ctx: BenchContext):
+    """SQLAlchemy session on a scratch database holding the dataset's prices as StockPrice rows"""
+    StockPrice = _sql_models().StockPrice
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import sentiment_price_corr_json as corr
+
+    path = Path(tempfile.mkdtemp(prefix="bench_sql_")) / "prices.db"
+    engine = create_engine(f"sqlite:///{path.as_posix()}")
+    StockPrice.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    prices = corr.fetch_prices_many(corr.get_engine(), ctx.symbols, ctx.start, ctx.end)
+    for ticker, g in prices.groupby("ticker"):
+        previous = None
+        for row in g.itertuples():
+            db.add(StockPrice(ticker=ticker, date=row.date.date(), open_price=row.open, close_price=row.open,
+                              daily_return=(row.open / previous - 1) * 100 if previous else None))
+            previous = row.open
+    db.commit()
+    return db
+
+
+def _days_back(ctx: BenchContext) -> int:
+    # The services count back from today; cover the dataset's last year
+    return (datetime.now() - datetime.fromisoformat(ctx.year_start)).days
+
+
+@benchmark("services.compute_correlations")
+def bench_compute_correlations(ctx):
+    _sql_models()
+    from app.services.correlation_service import CorrelationService
+    from app.storage import SQLiteRepository
+
+    db = _sql_session(ctx)
+    service = CorrelationService(repository=SQLiteRepository(str(ctx.path(synthetic.NEWS_FILE))))
+    days_back = _days_back(ctx)
+    return lambda: service.compute_correlations(db, tickers=ctx.symbols, days_back=days_back)
+
+
+@benchmark("services.get_dashboard_data")
+def bench_get_dashboard_data(ctx):
+    _sql_models()
+    from app.services.correlation_service import CorrelationService
+    from app.services.dashboard_service import DashboardService
+    from app.storage import SQLiteRepository
+
+    db = _sql_session(ctx)
+    repository = SQLiteRepository(str(ctx.path(synthetic.NEWS_FILE)))
+    days_back = _days_back(ctx)
+    # The dashboard reads the correlation metrics stored by the correlation service
+    CorrelationService(repository=repository).compute_correlations(db, tickers=ctx.symbols, days_back=days_back)
+    service = DashboardService(repository=repository)
+    return lambda: service.get_dashboard_data(db, tickers=ctx.symbols, days_back=days_back)
+
+
+@benchmark("sentiment.analyze_sentiment")
+def bench_analyze_sentiment(ctx, limit: int = 100):
+    from app.services.sentiment_analyzer import SentimentAnalyzer
+    from app.storage import SQLiteRepository
+
+    # Scratch repository: every run stores its sentiment documents
+    source = SQLiteRepository(str(ctx.path(synthetic.NEWS_FILE)))
+    repository = SQLiteRepository(":memory:")
+    for ticker in ctx.symbols:
+        repository.insert_news(source.find_news(ticker, limit=limit))
+    analyzer = SentimentAnalyzer(repository=repository)
+    scorer = analyzer.backend.name if analyzer.backend else "lexicon"
+    return (lambda: analyzer.analyze_sentiment(tickers=ctx.symbols, limit=limit),
+            {"articles": limit * len(ctx.symbols), "scorer": scorer})
+
+
+@benchmark("sentiment.process_articles")
+def bench_process_articles(ctx, n_articles: int = 10_000):
+    from app.services.text_processing import process_articles
+    from app.storage import SQLiteRepository
+
+    repository = SQLiteRepository(str(ctx.path(synthetic.NEWS_FILE)))
+    texts = [f"{a['title']} {a['content']}" for a in repository.find_news(ctx.symbols[0], limit=n_articles)]
+    return lambda: process_articles(texts), {"articles": len(texts)}
+
+
+@benchmark("incremental.refresh_one_month")
+def bench_incremental_refresh(ctx):
+    import shutil
+
+    from app import incremental
+    from app.storage import SQLiteRepository
+
+    # Derived files go to a scratch directory; the dataset only gains the daily_returns table
+    scratch = Path(tempfile.mkdtemp(prefix="bench_dag_"))
+    shutil.copy(ctx.path(synthetic.SENTIMENT_FILE), scratch / synthetic.SENTIMENT_FILE)
+    graph = incremental.default_graph(state_path=str(scratch / "state.db"),
+                                      repository=SQLiteRepository(str(ctx.path(synthetic.NEWS_FILE))),
+                                      out_dir=str(scratch), prices_db=str(ctx.path(synthetic.PRICES_FILE)),
+                                      daily_sentiment_path=str(scratch / synthetic.SENTIMENT_FILE))
+    # Start from an up-to-date state, then each round is one new day of prices for one ticker
+    graph.detect_changes()
+    graph.state.conn.execute("DELETE FROM dirty")
+    partition = (ctx.symbols[0], ctx.end[:7])
+
+    def call():
+        graph.invalidate("prices", [partition])
+        return graph.refresh()
+
+    return call, {"partitions": len(graph.state.fingerprints("prices"))}
+
+
+@benchmark("intraday.read_resample_5m")
+def bench_intraday_resample(ctx, days: int = 20):
+    import pandas as pd
+
+    from app import intraday
+
+    # The dataset has no intraday bars: a month of synthetic 1m bars goes to a scratch store
+    store = intraday.BarStore(tempfile.mkdtemp(prefix="bench_intraday_"), "1m")
+    ticker = ctx.symbols[0]
+    start = pd.bdate_range(end=ctx.end, periods=days)[0].date().isoformat()
+    n = intraday.ingest([ticker], start, ctx.end, fetcher=intraday.SyntheticBarFetcher(), store=store)[ticker]
+    return lambda: store.read(ticker, start, ctx.end, bar="5m"), {"bars_1m": n}
+
+
+def _front_client(ctx: BenchContext):
+    from fastapi.testclient import TestClient
+
+    import main as front
+
+    names = {symbol: name for name, symbol in front.cac40_symbols.items()}
+    stocks = [names[s] for s in ctx.symbols if s in names]
+    if not stocks:
+        raise SkipBenchmark("no CAC40 symbol in the dataset")
+    return TestClient(front.app), stocks
+
+
+def _endpoint(ctx: BenchContext, path: str, params: Callable[[List[str]], Dict]):
+    client, stocks = _front_client(ctx)
+    query = params(stocks)
+
+    def call():
+        response = client.get(path, params=query)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} -> {response.status_code}: {response.text[:200]}")
+        return response
+
+    return call, {"bytes": len(call().content)}
+
+
+@benchmark("front.get_sentiment_data")
+def bench_front_sentiment(ctx):
+    return _endpoint(ctx, "/get_sentiment_data", lambda s: {"stock_name": s[0], "days": 30})
+
+
+@benchmark("front.get_articles_data")
+def bench_front_articles(ctx):
+    return _endpoint(ctx, "/get_articles_data", lambda s: {"stock_name": s[0]})
+
+
+@benchmark("front.get_correlation_data")
+def bench_front_correlation(ctx):
+    return _endpoint(ctx, "/get_correlation_data", lambda s: {"stock_name": s[0]})
+
+
+@benchmark("front.get_stock_history")
+def bench_front_history(ctx):
+    return _endpoint(ctx, "/get_stock_history", lambda s: {"stock": s[0], "days": 30})
+
+
+@benchmark("front.get_stock_details")
+def bench_front_details(ctx):
+    return _endpoint(ctx, "/get_stock_details", lambda s: {"stock_names": ",".join(s), "days": 30})
+
+
+# ============================ RUNNER ============================
+
+def measure(func: Callable, repeat: int = 5, warmup: int = 1, min_seconds: float = 0.5,
+            max_rounds: int = 1000) -> Dict:
+    """At least `repeat` rounds, more for fast calls until min_seconds of timing is collected"""
+    for _ in range(warmup):
+        func()
+    times = []
+    started = time.perf_counter()
+    while len(times) < repeat or (time.perf_counter() - started < min_seconds and len(times) < max_rounds):
+        t0 = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return {
+        "rounds": len(times),
+        "min_ms": round(times[0], 3),
+        "median_ms": round(statistics.median(times), 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+        "p95_ms": round(times[min(len(times) - 1, int(0.95 * len(times)))], 3),
+        "stdev_ms": round(statistics.stdev(times), 3) if len(times) > 1 else 0.0,
+    }
+
+
+def selected(only: Optional[List[str]] = None) -> List[str]:
+    return [name for name in BENCHMARKS if not only or any(name.startswith(prefix) for prefix in only)]
+
+
+def run_suite(ctx: BenchContext, only: Optional[List[str]] = None, repeat: int = 5, verbose: bool = True) -> Dict:
+    """Run the selected benchmarks; failures and skips are recorded instead of aborting the run"""
+    results = {}
+    with use_dataset(ctx):
+        for name in selected(only):
+            try:
+                prepared = BENCHMARKS[name](ctx)
+                func, info = prepared if isinstance(prepared, tuple) else (prepared, {})
+                results[name] = {**measure(func, repeat), **info}
+            except SkipBenchmark as e:
+                results[name] = {"skipped": str(e)}
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+            if verbose:
+                print(f"{name:<36} {_describe(results[name])}", file=sys.stderr)
+    return results
+
+
+def _describe(result: Dict) -> str:
+    if "median_ms" in result:
+        return f"median {result['median_ms']:.2f} ms (min {result['min_ms']:.2f}, p95 {result['p95_ms']:.2f})"
+    return result.get("skipped") and f"skipped: {result['skipped']}" or f"error: {result.get('error')}"
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, timeout=10)
+        return rev.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "") if rev.returncode == 0 else None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save_run(ctx: BenchContext, results: Dict, repeat: int, results_dir: Path = None) -> Path:
+    results_dir = Path(results_dir or BENCH_RESULTS_DIR)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    now = datetime.now()
+    revision = _git_revision()
+    run = {
+        "meta": {
+            "timestamp": now.isoformat(timespec="seconds"),
+            "git_revision": revision,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "dataset": ctx.manifest["params"],
+        "repeat": repeat,
+        "results": results,
+    }
+    path = results_dir / f"{now:%Y%m%d-%H%M%S}-{revision or 'norev'}.json"
+    path.write_text(json.dumps(run, indent=2), encoding="utf-8")
+    return path
+
+
+def latest_run(dataset: Dict, names: List[str], results_dir: Path = None, exclude: Path = None) -> Optional[Path]:
+    """Most recent saved run on the same dataset parameters that timed at least one of `names`"""
+    results_dir = Path(results_dir or BENCH_RESULTS_DIR)
+    for path in sorted(results_dir.glob("*.json"), reverse=True):
+        if exclude is not None and path.resolve() == Path(exclude).resolve():
+            continue
+        try:
+            run = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            continue
+        if run.get("dataset") == dataset and any("median_ms" in run["results"].get(n, {}) for n in names):
+            return path
+    return None
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Median ratio current/baseline per benchmark present in both runs"""
+    rows = []
+    for name, result in current.items():
+        before = baseline.get(name, {})
+        if "median_ms" not in result or "median_ms" not in before or before["median_ms"] <= 0:
+            continue
+        ratio = result["median_ms"] / before["median_ms"]
+        status = "regression" if ratio > 1 + threshold else "improvement" if ratio < 1 / (1 + threshold) else "same"
+        rows.append({"name": name, "baseline_ms": before["median_ms"], "current_ms": result["median_ms"],
+                     "ratio": round(ratio, 3), "status": status})
+    return rows
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    lines = [f"{'benchmark':<36} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}  status"]
+    for r in rows:
+        lines.append(f"{r['name']:<36} {r['baseline_ms']:12.2f} {r['current_ms']:12.2f} {r['ratio']:7.2f}  {r['status']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Run the hot-path benchmark suite on synthetic data")
+    ap.add_argument("--tickers", type=int, default=10)
+    ap.add_argument("--years", type=float, default=2)
+    ap.add_argument("--articles-per-day", type=float, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--data-dir", default=None, help=f"Dataset directory (default: under {BENCH_DATA_DIR})")
+    ap.add_argument("--only", action="append", help="Benchmark name prefix, repeatable (e.g. corr. or front.)")
+    ap.add_argument("--repeat", type=int, default=5, help="Timed rounds per benchmark")
+    ap.add_argument("--compare", help="Baseline run file, or 'latest' for the previous run on the same dataset")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="Relative median slowdown reported as a regression")
+    ap.add_argument("--no-save", action="store_true", help=f"Do not write the run to {BENCH_RESULTS_DIR}")
+    ap.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    args = ap.parse_args()
+
+    if args.list:
+        print("\n".join(selected(args.only)))
+        raise SystemExit(0)
+
+    ctx = prepare_dataset(args.tickers, args.years, args.articles_per_day, args.seed, args.data_dir)
+    results = run_suite(ctx, args.only, args.repeat)
+    saved = None if args.no_save else save_run(ctx, results, args.repeat)
+    if saved:
+        print(f"Saved {saved}", file=sys.stderr)
+
+    baseline_path = None
+    if args.compare == "latest":
+        timed = [name for name, result in results.items() if "median_ms" in result]
+        baseline_path = latest_run(ctx.manifest["params"], timed, exclude=saved)
+        if baseline_path is None:
+            print("No earlier run on this dataset to compare with", file=sys.stderr)
+    elif args.compare:
+        baseline_path = Path(args.compare)
+
+    if baseline_path is None:
+        print(json.dumps(results, indent=2))
+        raise SystemExit(0)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    rows = compare(baseline["results"], results, args.threshold)
+    print(f"Baseline: {baseline_path} ({baseline['meta'].get('git_revision')})")
+    print(format_comparison(rows))
+    raise SystemExit(1 if any(r["status"] == "regression" for r in rows) else 0)
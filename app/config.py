@@ -1,6 +1,8 @@
 import os
 from dotenv import load_dotenv
 
+from app.tickers import all_symbols
+
 load_dotenv()
 
 
@@ -14,24 +16,49 @@ class Settings:
     # SQLite settings
     SQLITE_DB_PATH: str = os.getenv("SQLITE_DB_PATH", "./cac40_prices.db")
     
+    # News/sentiment storage: "mongo", "sqlite" (embedded) or "auto" (MongoDB if reachable, else embedded)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "auto")
+    EMBEDDED_DB_PATH: str = os.getenv("EMBEDDED_DB_PATH", "./cac40_news.db")
+    # Daily sentiment per ticker (read by sentiment_price_corr_json, written by the streaming pipeline)
+    DAILY_SENTIMENT_PATH: str = os.getenv("DAILY_SENTIMENT_PATH", "./sentiments_cac40_daily_fixed.json")
+    
     # API Keys
     NEWS_API_KEY: str = os.getenv("NEWS_API_KEY", "")
     REDDIT_CLIENT_ID: str = os.getenv("REDDIT_CLIENT_ID", "")
     REDDIT_CLIENT_SECRET: str = os.getenv("REDDIT_CLIENT_SECRET", "")
     REDDIT_USER_AGENT: str = os.getenv("REDDIT_USER_AGENT", "CAC40SentimentBot/1.0")
     
-    # CAC40 tickers (major stocks)
-    CAC40_TICKERS = [
-        "AIR.PA", "ALO.PA", "MT.AS", "CS.PA", "BNP.PA", "EN.PA", "CAP.PA",
-        "CA.PA", "ACA.PA", "BN.PA", "DSY.PA", "ENGI.PA", "EL.PA", "ERF.PA",
-        "RMS.PA", "KER.PA", "LR.PA", "OR.PA", "MC.PA", "ML.PA", "ORA.PA",
-        "RI.PA", "PUB.PA", "RNO.PA", "SAF.PA", "SGO.PA", "SAN.PA", "SU.PA",
-        "GLE.PA", "STLAP.PA", "STMPA.PA", "TEP.PA", "HO.PA", "FP.PA", "URW.AS",
-        "VIE.PA", "DG.PA", "VIV.PA", "WLN.PA"
-    ]
+    # CAC40 tickers (see app/tickers.py for names, sectors and index weights)
+    CAC40_TICKERS = all_symbols()
     
     # Sentiment model
     SENTIMENT_MODEL = "cardiffnlp/twitter-xlm-roberta-base-sentiment"
+    # Inference backend: "torch" (fp32 eager), "torch-int8" (dynamic quantization) or "onnx"
+    SENTIMENT_BACKEND: str = os.getenv("SENTIMENT_BACKEND", "torch")
+    SENTIMENT_ONNX_PATH: str = os.getenv("SENTIMENT_ONNX_PATH", "./models/sentiment_model.onnx")
+    SENTIMENT_BATCH_SIZE: int = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+    # Scoring policy: "full" (title + content), "headline" (title only) or "budget" (title + content within a token budget)
+    SENTIMENT_SCORING_MODE: str = os.getenv("SENTIMENT_SCORING_MODE", "full")
+    SENTIMENT_TOKEN_BUDGET: int = int(os.getenv("SENTIMENT_TOKEN_BUDGET", "128"))
+    SENTIMENT_SORT_BY_LENGTH: bool = os.getenv("SENTIMENT_SORT_BY_LENGTH", "true").lower() == "true"
+    # Worker pool: number of model-holding processes (0 = in-process inference) and torch threads per worker
+    SENTIMENT_WORKERS: int = int(os.getenv("SENTIMENT_WORKERS", "0"))
+    SENTIMENT_THREADS_PER_WORKER: int = int(os.getenv("SENTIMENT_THREADS_PER_WORKER", "1"))
+    # Minimum label agreement with the fp32 model for a backend to pass the parity check
+    SENTIMENT_PARITY_TOLERANCE: float = float(os.getenv("SENTIMENT_PARITY_TOLERANCE", "0.95"))
+    
+    # Streaming pipeline: bounded queue size between stages, model micro-batch wait,
+    # news polling interval and how often the daily rollup is written
+    PIPELINE_QUEUE_SIZE: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "1000"))
+    PIPELINE_BATCH_WAIT_MS: int = int(os.getenv("PIPELINE_BATCH_WAIT_MS", "200"))
+    PIPELINE_POLL_SECONDS: float = float(os.getenv("PIPELINE_POLL_SECONDS", "60"))
+    PIPELINE_FLUSH_SECONDS: float = float(os.getenv("PIPELINE_FLUSH_SECONDS", "1.0"))
+    
+    # Incremental recomputation of derived datasets (app.incremental): fingerprints and
+    # dirty partitions, and the directory of the batch_corr / monthly summary files
+    # (kept apart from the tracked files main.py serves; point it at "." to publish)
+    DERIVED_STATE_PATH: str = os.getenv("DERIVED_STATE_PATH", "./.derived_state.db")
+    DERIVED_DIR: str = os.getenv("DERIVED_DIR", "./.derived")
 
 
 settings = Settings()
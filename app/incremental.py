@@ -0,0 +1,638 @@
+"""
+Dependency-tracked incremental recomputation of derived datasets
+
+Derived artifacts are partitioned by (ticker, month) and declare which upstream
+partitions each of their partitions reads, as month offsets: daily_returns(t, m)
+reads prices(t, m-1) and prices(t, m). Sources (the price table, the stored
+sentiment documents) are fingerprinted per partition; a changed fingerprint marks
+the dependent partitions of that ticker dirty, transitively. refresh() rebuilds
+the dirty partitions only, in dependency order.
+
+Fingerprints and dirty partitions live in a SQLite file (DERIVED_STATE_PATH) and
+are updated in one transaction, so a failed or interrupted refresh picks up where
+it stopped, and the nightly run after one new day of data rebuilds one month per
+ticker instead of the whole history.
+
+  artifact             inputs                              output
+  daily_returns        prices (m-1, m)                     daily_returns table of the price database
+  daily_sentiment      articles                            daily sentiment JSON read by sentiment_price_corr_json
+  correlation_metrics  daily_returns, daily_sentiment      CorrelationMetric rows (needs app.models)
+  batch_corr           prices, daily_sentiment             batch_corr_month_YYYY-MM.json (run_dict per ticker)
+  monthly_summary      articles                            synthese_cac40_mensuelle.json (newest month first)
+
+The files are written to DERIVED_DIR (./.derived by default), not over the files
+main.py serves: batch_corr_month_* covers calendar months, whereas the served
+batch_corr_2025-09.json is a rolling window.
+
+Usage:
+  python -m app.incremental refresh
+  python -m app.incremental status
+  python -m app.incremental invalidate prices --ticker BNP.PA --start 2025-10-01 --end 2025-10-31
+"""
+import json
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app import price_store, tracing
+from app.config import settings
+
+Partition = Tuple[str, str]  # (ticker, "YYYY-MM")
+
+
+def month_bounds(month: str) -> Tuple[str, str]:
+    """First and last ISO day of a "YYYY-MM" month"""
+    year, m = int(month[:4]), int(month[5:7])
+    following = f"{year + m // 12:04d}-{m % 12 + 1:02d}-01"
+    last = datetime.fromisoformat(following).toordinal() - 1
+    return f"{month}-01", datetime.fromordinal(last).date().isoformat()
+
+
+def shift_month(month: str, k: int) -> str:
+    index = int(month[:4]) * 12 + int(month[5:7]) - 1 + k
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def months_between(start: str, end: str) -> List[str]:
+    months, month = [], start[:7]
+    while month <= end[:7]:
+        months.append(month)
+        month = shift_month(month, 1)
+    return months
+
+
+# ============================ ENGINE ============================
+
+class Source:
+    """Input dataset; fingerprints() returns {partition: value} or None when it cannot be read"""
+
+    def __init__(self, name: str, fingerprints: Callable[[], Optional[Dict[Partition, str]]]):
+        self.name = name
+        self.fingerprints = fingerprints
+
+
+class Artifact:
+    """
+    Derived dataset. build() recomputes some months of one ticker and may buffer its
+    output; finish() writes what was buffered. Partitions are marked clean once
+    finish() has returned.
+    """
+
+    name = "abstract"
+    # (upstream name, month offsets read by a partition)
+    inputs: Tuple[Tuple[str, Tuple[int, ...]], ...] = ()
+
+    def unavailable(self) -> Optional[str]:
+        """Why the artifact cannot be built here (its partitions then stay dirty)"""
+        return None
+
+    def build(self, ticker: str, months: List[str]) -> int:
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+
+class StateStore:
+    """Source fingerprints, dirty partitions and last build times"""
+
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS fingerprints (
+            source       TEXT NOT NULL,
+            ticker       TEXT NOT NULL,
+            month        TEXT NOT NULL,
+            fingerprint  TEXT NOT NULL,
+            PRIMARY KEY (source, ticker, month)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS dirty (
+            artifact   TEXT NOT NULL,
+            ticker     TEXT NOT NULL,
+            month      TEXT NOT NULL,
+            marked_at  TEXT NOT NULL,
+            PRIMARY KEY (artifact, ticker, month)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS builds (
+            artifact  TEXT NOT NULL,
+            ticker    TEXT NOT NULL,
+            month     TEXT NOT NULL,
+            built_at  TEXT NOT NULL,
+            PRIMARY KEY (artifact, ticker, month)
+        ) WITHOUT ROWID
+        """,
+    ]
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.DERIVED_STATE_PATH
+        self.conn = sqlite3.connect(self.path, isolation_level=None)
+        price_store.apply_pragmas(self.conn)
+        for statement in self.SCHEMA:
+            self.conn.execute(statement)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def fingerprints(self, source: str) -> Dict[Partition, str]:
+        rows = self.conn.execute("SELECT ticker, month, fingerprint FROM fingerprints WHERE source = ?", (source,))
+        return {(ticker, month): fp for ticker, month, fp in rows}
+
+    def dirty(self) -> Set[Tuple[str, str, str]]:
+        return set(self.conn.execute("SELECT artifact, ticker, month FROM dirty"))
+
+    def mark_dirty(self, conn: sqlite3.Connection, rows: Iterable[Tuple[str, str, str]]):
+        now = datetime.utcnow().isoformat(timespec="seconds")
+        conn.executemany("INSERT OR IGNORE INTO dirty (artifact, ticker, month, marked_at) VALUES (?, ?, ?, ?)",
+                         [(*row, now) for row in rows])
+
+    def mark_clean(self, artifact: str, partitions: List[Partition]):
+        now = datetime.utcnow().isoformat(timespec="seconds")
+        with self.transaction() as conn:
+            conn.executemany("DELETE FROM dirty WHERE artifact = ? AND ticker = ? AND month = ?",
+                             [(artifact, t, m) for t, m in partitions])
+            conn.executemany("INSERT OR REPLACE INTO builds (artifact, ticker, month, built_at) VALUES (?, ?, ?, ?)",
+                             [(artifact, t, m, now) for t, m in partitions])
+
+
+class Graph:
+    """Sources and artifacts; artifacts are added after their inputs, which makes the order topological"""
+
+    def __init__(self, state: StateStore):
+        self.state = state
+        self.sources: Dict[str, Source] = {}
+        self.artifacts: Dict[str, Artifact] = {}
+        self._dependents: Dict[str, List[Tuple[str, Tuple[int, ...]]]] = defaultdict(list)
+
+    def add_source(self, source: Source) -> "Graph":
+        self.sources[source.name] = source
+        return self
+
+    def add_artifact(self, artifact: Artifact) -> "Graph":
+        for upstream, offsets in artifact.inputs:
+            if upstream not in self.sources and upstream not in self.artifacts:
+                raise ValueError(f"{artifact.name}: unknown input '{upstream}' (add it first)")
+            self._dependents[upstream].append((artifact.name, offsets))
+        self.artifacts[artifact.name] = artifact
+        return self
+
+    def downstream(self, name: str, partitions: Iterable[Partition]) -> Set[Tuple[str, str, str]]:
+        """Every artifact partition reading these partitions of `name`, directly or not"""
+        found: Set[Tuple[str, str, str]] = set()
+        frontier = [(name, ticker, month) for ticker, month in partitions]
+        while frontier:
+            upstream, ticker, month = frontier.pop()
+            for artifact, offsets in self._dependents.get(upstream, ()):
+                for offset in offsets:
+                    # A partition reading month m + offset of its input
+                    key = (artifact, ticker, shift_month(month, -offset))
+                    if key not in found:
+                        found.add(key)
+                        frontier.append(key)
+        return found
+
+    def invalidate(self, name: str, partitions: Iterable[Partition]) -> int:
+        """Mark what depends on these partitions dirty (and the partitions themselves, for an artifact)"""
+        partitions = list(partitions)
+        rows = self.downstream(name, partitions)
+        if name in self.artifacts:
+            rows |= {(name, ticker, month) for ticker, month in partitions}
+        with self.state.transaction() as conn:
+            self.state.mark_dirty(conn, rows)
+        return len(rows)
+
+    def detect_changes(self, sources: List[str] = None) -> Dict[str, int]:
+        """Fingerprint the sources and invalidate the partitions that changed since the last call"""
+        changes = {}
+        for name in sources or list(self.sources):
+            with tracing.span("incremental.fingerprint", source=name):
+                current = self.sources[name].fingerprints()
+            if current is None:
+                continue
+            previous = self.state.fingerprints(name)
+            changed = [p for p, fp in current.items() if previous.get(p) != fp]
+            removed = [p for p in previous if p not in current]
+            if changed or removed:
+                rows = self.downstream(name, changed + removed)
+                with self.state.transaction() as conn:
+                    self.state.mark_dirty(conn, rows)
+                    conn.executemany("DELETE FROM fingerprints WHERE source = ? AND ticker = ? AND month = ?",
+                                     [(name, t, m) for t, m in removed])
+                    conn.executemany("INSERT OR REPLACE INTO fingerprints (source, ticker, month, fingerprint) "
+                                     "VALUES (?, ?, ?, ?)", [(name, t, m, current[(t, m)]) for t, m in changed])
+            changes[name] = len(changed) + len(removed)
+        return changes
+
+    def refresh(self, detect: bool = True, artifacts: List[str] = None, tickers: List[str] = None) -> Dict:
+        """Rebuild dirty partitions in dependency order; returns what was built, skipped or failed"""
+        t0 = time.perf_counter()
+        report = {"changes": self.detect_changes() if detect else {}, "artifacts": {}, "errors": []}
+        pending = self.state.dirty()
+        for name, artifact in self.artifacts.items():
+            todo = sorted((t, m) for a, t, m in pending if a == name and (not tickers or t in tickers))
+            if not todo or (artifacts and name not in artifacts):
+                continue
+            entry = report["artifacts"][name] = {"dirty": len(todo), "built": 0, "rows": 0}
+            reason = artifact.unavailable()
+            if reason:
+                entry["skipped"] = reason
+                continue
+            # Partitions reading a still-dirty input (failed or unavailable upstream) wait for the next run
+            ready = [(t, m) for t, m in todo
+                     if not any((upstream, t, shift_month(m, offset)) in pending
+                                for upstream, offsets in artifact.inputs for offset in offsets)]
+            entry["blocked"] = len(todo) - len(ready)
+            by_ticker: Dict[str, List[str]] = defaultdict(list)
+            for ticker, month in ready:
+                by_ticker[ticker].append(month)
+
+            started = time.perf_counter()
+            built: List[Partition] = []
+            for ticker, months in by_ticker.items():
+                try:
+                    with tracing.span("incremental.build", artifact=name, ticker=ticker, months=len(months)):
+                        entry["rows"] += artifact.build(ticker, months) or 0
+                    built.extend((ticker, m) for m in months)
+                except Exception as e:
+                    report["errors"].append({"artifact": name, "ticker": ticker, "error": f"{type(e).__name__}: {e}"})
+            try:
+                with tracing.span("incremental.finish", artifact=name):
+                    artifact.finish()
+            except Exception as e:
+                report["errors"].append({"artifact": name, "error": f"{type(e).__name__}: {e}"})
+                built = []
+            if built:
+                self.state.mark_clean(name, built)
+                pending -= {(name, t, m) for t, m in built}
+            entry["built"] = len(built)
+            entry["seconds"] = round(time.perf_counter() - started, 3)
+        report["seconds"] = round(time.perf_counter() - t0, 3)
+        return report
+
+    def status(self) -> Dict:
+        dirty = defaultdict(int)
+        for artifact, _, _ in self.state.dirty():
+            dirty[artifact] += 1
+        built = {a: (n, last) for a, n, last in self.state.conn.execute(
+            "SELECT artifact, COUNT(*), MAX(built_at) FROM builds GROUP BY artifact")}
+        sources = {s: n for s, n in self.state.conn.execute(
+            "SELECT source, COUNT(*) FROM fingerprints GROUP BY source")}
+        return {
+            "state": str(self.state.path),
+            "sources": {name: {"partitions": sources.get(name, 0)} for name in self.sources},
+            "artifacts": {name: {"dirty": dirty.get(name, 0), "built": built.get(name, (0, None))[0],
+                                 "last_built_at": built.get(name, (0, None))[1],
+                                 "unavailable": a.unavailable()}
+                          for name, a in self.artifacts.items()},
+        }
+
+
+# ============================ ARTIFACTS ============================
+
+def _atomic_write_json(path: Path, payload):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _month_datetimes(month: str) -> Tuple[datetime, datetime]:
+    first, last = month_bounds(month)
+    return datetime.fromisoformat(first), datetime.fromisoformat(f"{last}T23:59:59")
+
+
+class DailyReturns(Artifact):
+    """Open-to-open log returns (as in sentiment_price_corr_json.prep_features), per trading day"""
+
+    name = "daily_returns"
+    inputs = (("prices", (-1, 0)),)
+
+    def __init__(self, prices_db: str):
+        self.prices_db = str(prices_db)
+
+    def build(self, ticker, months):
+        conn = price_store.connect(self.prices_db)
+        try:
+            price_store.ensure_returns_table(conn)
+            written = 0
+            for month in months:
+                first, last = month_bounds(month)
+                previous = conn.execute(f"""
+                    SELECT open_price FROM {price_store.PRICES_TABLE}
+                    WHERE symbol = ? AND date < ? AND open_price > 0
+                    ORDER BY date DESC LIMIT 1
+                """, (ticker, first)).fetchone()
+                rows = conn.execute(f"""
+                    SELECT date, open_price FROM {price_store.PRICES_TABLE}
+                    WHERE symbol = ? AND date BETWEEN ? AND ? AND open_price > 0
+                    ORDER BY date
+                """, (ticker, first, last)).fetchall()
+                opens = np.array(([previous[0]] if previous else []) + [r[1] for r in rows], dtype=float)
+                returns = np.log(opens[1:] / opens[:-1])
+                days = [r[0] for r in rows][-len(returns):] if len(returns) else []
+                written += price_store.replace_returns(conn, ticker, first, last,
+                                                       zip(days, returns.tolist()))
+            return written
+        finally:
+            conn.close()
+
+
+class DailySentiment(Artifact):
+    """
+    Per-day mean score and article count from the stored sentiment documents. Only days
+    with stored documents are written; days imported from elsewhere are left as they are.
+    """
+
+    name = "daily_sentiment"
+    inputs = (("articles", (0,)),)
+
+    def __init__(self, repository, sink):
+        self.repository = repository
+        self.sink = sink
+        self._days: Dict[Tuple[str, str], List[float]] = {}
+
+    def build(self, ticker, months):
+        n = 0
+        for month in months:
+            for doc in self.repository.find_sentiments(ticker, *_month_datetimes(month)):
+                total = self._days.setdefault((ticker, doc["date"].date().isoformat()), [0.0, 0])
+                total[0] += float(doc.get("sentiment_score") or 0.0)
+                total[1] += 1
+                n += 1
+        return n
+
+    def finish(self):
+        if self._days:
+            self.sink.replace(self._days)
+        self._days = {}
+
+
+class CorrelationMetrics(Artifact):
+    """
+    CorrelationMetric rows of the month (one per day with both a return and stored
+    sentiment), with the month's sentiment/return correlation, replacing earlier rows
+    """
+
+    name = "correlation_metrics"
+    inputs = (("daily_returns", (0,)), ("daily_sentiment", (0,)))
+
+    def __init__(self, prices_db: str, repository):
+        self.prices_db = str(prices_db)
+        self.repository = repository
+
+    def unavailable(self):
+        try:
+            from app.models import sql_models  # noqa: F401
+        except ImportError as e:
+            return f"app.models.sql_models unavailable: {e}"
+        return None
+
+    def build(self, ticker, months):
+        from collections import Counter
+
+        from app.models.sql_models import CorrelationMetric, get_db
+        from app.services.correlation_service import CorrelationService
+
+        service = CorrelationService(repository=self.repository)
+        conn = price_store.connect(self.prices_db)
+        sessions = get_db()
+        db = next(sessions)
+        written = 0
+        try:
+            for month in months:
+                first, last = month_bounds(month)
+                returns = dict(conn.execute(
+                    f"SELECT date, log_return FROM {price_store.RETURNS_TABLE} WHERE symbol = ? AND date BETWEEN ? AND ?",
+                    (ticker, first, last)).fetchall())
+                daily = service._aggregate_daily_sentiment(ticker, *_month_datetimes(month))
+                aligned = [(day, daily[day], returns[day]) for day in sorted(returns) if day in daily]
+
+                start, end = datetime.fromisoformat(first), datetime.fromisoformat(last)
+                db.query(CorrelationMetric).filter(CorrelationMetric.ticker == ticker,
+                                                   CorrelationMetric.date >= start.date(),
+                                                   CorrelationMetric.date <= end.date()).delete()
+                if len(aligned) < 2:
+                    continue
+                sentiments = [s["avg_sentiment"] for _, s, _ in aligned]
+                # Percent change, the unit of StockPrice.daily_return
+                pct = [float(np.expm1(r) * 100) for _, _, r in aligned]
+                correlation = np.corrcoef(sentiments, pct)[0, 1]
+                correlation = 0.0 if np.isnan(correlation) else float(correlation)
+                keywords = Counter(k for _, s, _ in aligned for k in s["keywords"])
+                top_keywords = json.dumps([k for k, _ in keywords.most_common(10)])
+                for (day, s, _), value in zip(aligned, pct):
+                    db.add(CorrelationMetric(ticker=ticker, date=datetime.fromisoformat(day).date(),
+                                             avg_sentiment=float(s["avg_sentiment"]), daily_return=value,
+                                             correlation_coefficient=correlation, recent_keywords=top_keywords))
+                    written += 1
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            sessions.close()
+            conn.close()
+        return written
+
+
+class BatchCorr(Artifact):
+    """batch_corr_month_YYYY-MM.json: run_dict over the calendar month for each ticker with data in both sources"""
+
+    name = "batch_corr"
+    inputs = (("prices", (0,)), ("daily_sentiment", (0,)))
+
+    def __init__(self, out_dir: str, max_lead: int = 5):
+        self.out_dir = Path(out_dir)
+        self.max_lead = max_lead
+        self._results: Dict[str, Dict[str, Dict]] = defaultdict(dict)
+
+    def path(self, month: str) -> Path:
+        return self.out_dir / f"batch_corr_month_{month}.json"
+
+    def build(self, ticker, months):
+        import sentiment_price_corr_json as corr
+
+        for month in months:
+            first, last = month_bounds(month)
+            self._results[month][ticker] = corr.run_dict(ticker, first, last, self.max_lead)
+        return len(months)
+
+    def finish(self):
+        for month, results in self._results.items():
+            path = self.path(month)
+            batch = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+            for ticker, payload in results.items():
+                # Like the batch files already served: tickers without a result are left out
+                if "error" in payload:
+                    batch.pop(ticker, None)
+                else:
+                    batch[ticker] = payload
+            if batch or path.exists():
+                _atomic_write_json(path, dict(sorted(batch.items())))
+        self._results = defaultdict(dict)
+
+
+def monthly_summary(docs: List[Dict], month: str) -> List[Dict]:
+    """
+    synthese_cac40_mensuelle.json entries for one "YYYY-MM" month, from article dicts
+    with ticker, title, content, url, published_at and score
+    """
+    from app.services.text_processing import extract_keywords, tokenize
+
+    def brief(a):
+        return {"title": a["title"], "description": a["content"], "sentiment": a["score"], "url": a["url"]}
+
+    by_ticker: Dict[str, List[Dict]] = {}
+    for a in docs:
+        if a["published_at"].strftime("%Y-%m") == month:
+            by_ticker.setdefault(a["ticker"], []).append(a)
+    out = []
+    for ticker, items in by_ticker.items():
+        tokens = [tok for a in items for tok in tokenize(a["title"])]
+        out.append({
+            "ticker": ticker,
+            "mois": month,
+            "sentiment_moyen": round(float(np.mean([a["score"] for a in items])), 4),
+            "nb_articles": len(items),
+            "article_plus_positif": brief(max(items, key=lambda a: a["score"])),
+            "article_plus_negatif": brief(min(items, key=lambda a: a["score"])),
+            "article_random": brief(items[len(items) // 2]),
+            "mots_cles_frequents": extract_keywords(tokens, top_n=10),
+        })
+    return out
+
+
+class MonthlySummary(Artifact):
+    """synthese_cac40_mensuelle.json entries, from the stored news joined with their sentiment documents"""
+
+    name = "monthly_summary"
+    inputs = (("articles", (0,)),)
+
+    def __init__(self, repository, path: str):
+        self.repository = repository
+        self.path = Path(path)
+        self._entries: Dict[Partition, List[Dict]] = {}
+
+    @staticmethod
+    def _moment(value: datetime) -> datetime:
+        return value.replace(microsecond=0, tzinfo=None)
+
+    def build(self, ticker, months):
+        n = 0
+        for month in months:
+            start, end = _month_datetimes(month)
+            scores = defaultdict(list)
+            for doc in self.repository.find_sentiments(ticker, start, end):
+                scores[self._moment(doc["date"])].append((doc.get("text") or "", doc.get("sentiment_score")))
+            docs = []
+            for article in self.repository.find_news_between(ticker, start, end):
+                text = f"{article.get('title') or ''} {article.get('content') or ''}".strip()
+                # Sentiment documents keep the article's date and the start of its text
+                score = next((s for t, s in scores.get(self._moment(article["published_at"]), ())
+                              if s is not None and text.startswith(t)), None)
+                if score is not None:
+                    docs.append({**article, "score": round(float(score), 4)})
+            self._entries[(ticker, month)] = monthly_summary(docs, month)
+            n += len(docs)
+        return n
+
+    def finish(self):
+        if not self._entries:
+            return
+        entries = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else []
+        entries = [e for e in entries if (e.get("ticker"), e.get("mois")) not in self._entries]
+        for items in self._entries.values():
+            entries.extend(items)
+        # Newest month first: readers such as main.build_articles_data take a ticker's first entry
+        entries.sort(key=lambda e: str(e.get("ticker")))
+        entries.sort(key=lambda e: str(e.get("mois")), reverse=True)
+        _atomic_write_json(self.path, entries)
+        self._entries = {}
+
+
+def default_graph(state_path: str = None, repository=None, out_dir: str = None,
+                  prices_db: str = None, daily_sentiment_path: str = None) -> Graph:
+    """
+    The application's datasets: prices and daily sentiment where sentiment_price_corr_json
+    reads them (unless given), articles from the configured repository, files in DERIVED_DIR
+    """
+    import sentiment_price_corr_json as corr
+    from app.services.pipeline import DailySentimentFile
+    from app.storage import get_repository
+
+    repository = repository or get_repository()
+    out = Path(out_dir or settings.DERIVED_DIR)
+    prices_db = str(prices_db or corr.CFG.PRICES_DB_PATH)
+    daily_sentiment_path = str(daily_sentiment_path or corr.CFG.SENTI_JSON_PATH)
+
+    def price_fingerprints():
+        if not Path(prices_db).exists():
+            return None
+        conn = price_store.connect(prices_db)
+        try:
+            return price_store.month_fingerprints(conn, corr.CFG.PRICES_TABLE)
+        finally:
+            conn.close()
+
+    def article_fingerprints():
+        return repository.sentiment_fingerprints() if repository.available else None
+
+    return (Graph(StateStore(state_path))
+            .add_source(Source("prices", price_fingerprints))
+            .add_source(Source("articles", article_fingerprints))
+            .add_artifact(DailyReturns(prices_db))
+            .add_artifact(DailySentiment(repository, DailySentimentFile(daily_sentiment_path)))
+            .add_artifact(CorrelationMetrics(prices_db, repository))
+            .add_artifact(BatchCorr(str(out)))
+            .add_artifact(MonthlySummary(repository, str(out / "synthese_cac40_mensuelle.json"))))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Incremental recomputation of the derived datasets")
+    ap.add_argument("--state", default=None, help=f"State file (default {settings.DERIVED_STATE_PATH})")
+    ap.add_argument("--out-dir", default=None, help=f"Directory of the derived files (default {settings.DERIVED_DIR})")
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("refresh", help="Detect source changes and rebuild the dirty partitions")
+    p.add_argument("--artifact", action="append", help="Only these artifacts (repeatable)")
+    p.add_argument("--ticker", action="append", help="Only these tickers (repeatable)")
+    p.add_argument("--no-detect", action="store_true", help="Rebuild what is already dirty, without fingerprinting")
+    sub.add_parser("status", help="Fingerprinted partitions, dirty and built partitions per artifact")
+    p = sub.add_parser("invalidate", help="Mark a range of a source or artifact dirty, with everything downstream")
+    p.add_argument("name")
+    p.add_argument("--ticker", action="append", required=True)
+    p.add_argument("--start", required=True)
+    p.add_argument("--end", required=True)
+    args = ap.parse_args()
+
+    graph = default_graph(args.state, out_dir=args.out_dir)
+    if args.command == "refresh":
+        result = graph.refresh(detect=not args.no_detect, artifacts=args.artifact, tickers=args.ticker)
+    elif args.command == "invalidate":
+        if args.name not in graph.sources and args.name not in graph.artifacts:
+            ap.error(f"unknown source or artifact '{args.name}'")
+        partitions = [(t, m) for t in args.ticker for m in months_between(args.start, args.end)]
+        result = {"marked": graph.invalidate(args.name, partitions)}
+    else:
+        result = graph.status()
+    print(json.dumps(result, indent=2, ensure_ascii=False))
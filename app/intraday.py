@@ -0,0 +1,412 @@
+"""
+Intraday bars: ingestion, compact columnar storage, query-time resampling
+
+- Fetchers (FETCHERS, selected by INTRADAY_FETCHER) return OHLCV bars of one
+  ticker at the base interval (1m, 5m, ...) with a UTC DatetimeIndex:
+  "yfinance" (split into the windows Yahoo serves for each interval) or
+  "synthetic" (deterministic random walks through the Euronext session, offline)
+- BarStore keeps one uncompressed .npz per interval/ticker/UTC day under
+  INTRADAY_DIR, one array per column: seconds since midnight as int32, prices
+  as int32 scaled by PRICE_SCALE, volume as int64: 28 bytes of data per bar,
+  about 31 on disk with the .npz container (1m bars, see `bench`).
+  Re-ingesting a day replaces the bars with the same timestamp.
+- resample_arrays() aggregates the base bars to any multiple of the base
+  interval in one vectorized pass (reduceat over bucket boundaries), on the
+  int-scaled columns; bars never cross a UTC day and are labelled by their start
+
+Timestamps are naive UTC outside this module, like the per-article sentiment
+dates stored by app.storage.
+
+Usage:
+  python -m app.intraday ingest --tickers MC.PA,BNP.PA --start 2025-10-13 --end 2025-10-17 --interval 1m
+  python -m app.intraday bars MC.PA --start 2025-10-13 --end 2025-10-17 --bar 15m
+  python -m app.intraday bench --tickers 10 --days 20
+"""
+import os
+import re
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from app.metrics import observe_call
+
+INTRADAY_DIR = os.getenv("INTRADAY_DIR", "./intraday")
+INTRADAY_INTERVAL = os.getenv("INTRADAY_INTERVAL", "1m")
+INTRADAY_FETCHER = os.getenv("INTRADAY_FETCHER", "yfinance")
+# Prices are stored as int32 in units of 1 / PRICE_SCALE (max 214748.3647 at 10_000)
+PRICE_SCALE = int(os.getenv("INTRADAY_PRICE_SCALE", "10000"))
+
+PRICE_FIELDS = ("open", "high", "low", "close")
+FIELDS = PRICE_FIELDS + ("volume",)
+DAY_SECONDS = 86400
+
+_UNITS = {"s": 1, "m": 60, "min": 60, "h": 3600}
+
+
+def parse_interval(interval: str) -> int:
+    """Bar size in seconds: "90s", "1m", "5min", "1h" ..."""
+    match = re.fullmatch(r"\s*(\d+)\s*(s|m|min|h)\s*", str(interval))
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Invalid bar size '{interval}' (expected e.g. 30s, 5m, 1h)")
+    seconds = int(match.group(1)) * _UNITS[match.group(2)]
+    if seconds > DAY_SECONDS:
+        raise ValueError(f"Bar size '{interval}' exceeds one day")
+    return seconds
+
+
+def _to_utc_index(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+
+
+def _day_epoch(day: date) -> int:
+    return (day - date(1970, 1, 1)).days * DAY_SECONDS
+
+
+# ============================ FETCHERS ============================
+
+class BarFetcher:
+    """Source of raw bars: fetch() returns open/high/low/close/volume indexed by UTC timestamps"""
+
+    name = "abstract"
+
+    def fetch(self, ticker: str, start: str, end: str, interval: str) -> pd.DataFrame:
+        """Bars of `ticker` from start to end (inclusive days) at `interval`"""
+        raise NotImplementedError
+
+
+class YFinanceBarFetcher(BarFetcher):
+    """
+    yf.download with an intraday interval. Yahoo only serves 1m bars for the last
+    30 days, 7 days per request, and 2m..90m bars for the last 60 days: longer
+    ranges are split into windows and older days come back empty.
+    """
+
+    name = "yfinance"
+
+    MAX_SPAN_DAYS = {"1m": 7, "2m": 60, "5m": 60, "15m": 60, "30m": 60, "60m": 60, "90m": 60, "1h": 60}
+
+    def fetch(self, ticker, start, end, interval):
+        import yfinance as yf
+
+        span = timedelta(days=self.MAX_SPAN_DAYS.get(interval, 60))
+        window_start = pd.Timestamp(start).to_pydatetime()
+        stop = pd.Timestamp(end).to_pydatetime() + timedelta(days=1)
+        frames = []
+        while window_start < stop:
+            window_end = min(window_start + span, stop)
+            with observe_call("yfinance"):
+                data = yf.download(ticker, start=window_start.strftime("%Y-%m-%d"),
+                                   end=window_end.strftime("%Y-%m-%d"), interval=interval,
+                                   progress=False, auto_adjust=False)
+            if not data.empty:
+                frames.append(data)
+            window_start = window_end
+        if not frames:
+            return pd.DataFrame(columns=list(FIELDS))
+        data = pd.concat(frames)
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+        data = data.rename(columns=str.lower)[list(FIELDS)]
+        data.index = _to_utc_index(data.index)
+        return data[~data.index.duplicated(keep="last")].sort_index()
+
+
+class SyntheticBarFetcher(BarFetcher):
+    """
+    Deterministic random-walk bars through the Euronext session (09:00-17:30
+    Europe/Paris) on business days; the same (ticker, day, seed) always gives
+    the same bars
+    """
+
+    name = "synthetic"
+
+    def __init__(self, seed: int = 0, volatility: float = 0.0008):
+        self.seed = seed
+        self.volatility = volatility
+
+    def fetch(self, ticker, start, end, interval):
+        step = parse_interval(interval)
+        base = 20 + zlib.crc32(ticker.encode("utf-8")) % 380
+        frames = []
+        for day in pd.bdate_range(start, end):
+            rng = np.random.default_rng(zlib.crc32(f"{ticker}|{day.date()}|{self.seed}".encode("utf-8")))
+            session = pd.date_range(day + pd.Timedelta(hours=9), day + pd.Timedelta(hours=17, minutes=30),
+                                    freq=f"{step}s", inclusive="left", tz="Europe/Paris")
+            n = len(session)
+            day_open = base * np.exp(0.02 * rng.standard_normal())
+            close = day_open * np.exp(np.cumsum(rng.normal(0, self.volatility, n)))
+            open_ = np.concatenate([[day_open], close[:-1]])
+            wick = np.abs(rng.normal(0, self.volatility / 2, (2, n)))
+            frames.append(pd.DataFrame({
+                "open": open_,
+                "high": np.maximum(open_, close) * (1 + wick[0]),
+                "low": np.minimum(open_, close) * (1 - wick[1]),
+                "close": close,
+                "volume": rng.lognormal(7, 1, n).round(),
+            }, index=session.tz_convert("UTC")))
+        if not frames:
+            return pd.DataFrame(columns=list(FIELDS))
+        return pd.concat(frames)
+
+
+FETCHERS = {
+    "yfinance": YFinanceBarFetcher,
+    "synthetic": SyntheticBarFetcher,
+}
+
+
+def get_fetcher(name: str = None) -> BarFetcher:
+    name = name or INTRADAY_FETCHER
+    if name not in FETCHERS:
+        raise ValueError(f"Unknown intraday fetcher '{name}' (expected one of {sorted(FETCHERS)})")
+    return FETCHERS[name]()
+
+
+# ============================ STORAGE ============================
+
+class BarStore:
+    """
+    Bars of one base interval, partitioned as <root>/<interval>/<ticker>/<YYYY-MM-DD>.npz
+    (UTC days). Reads only open the partitions of the requested days and the
+    requested columns.
+    """
+
+    def __init__(self, root: str = None, interval: str = None):
+        self.interval = interval or INTRADAY_INTERVAL
+        self.step = parse_interval(self.interval)
+        self.root = Path(root or INTRADAY_DIR) / self.interval
+
+    def _partition(self, ticker: str, day: date) -> Path:
+        return self.root / ticker / f"{day.isoformat()}.npz"
+
+    def tickers(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    def days(self, ticker: str, start: str = None, end: str = None) -> List[date]:
+        """Days stored for the ticker within [start, end] (ISO dates, inclusive)"""
+        folder = self.root / ticker
+        if not folder.exists():
+            return []
+        names = sorted(p.stem for p in folder.glob("*.npz"))
+        return [date.fromisoformat(n) for n in names
+                if (start is None or n >= start[:10]) and (end is None or n <= end[:10])]
+
+    @staticmethod
+    def _load(path: Path, columns: Iterable[str]) -> Dict[str, np.ndarray]:
+        with np.load(path) as z:
+            return {c: z[c] for c in columns}
+
+    def _save(self, path: Path, arrays: Dict[str, np.ndarray]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(tmp, **arrays)
+        tmp.replace(path)
+
+    def write(self, ticker: str, bars: pd.DataFrame) -> int:
+        """
+        Store bars (open/high/low/close/volume, UTC or naive UTC index), merged into
+        the existing day partitions: a bar with an already stored timestamp replaces it.
+        Returns the number of bars written.
+        """
+        bars = bars.dropna(subset=list(PRICE_FIELDS))
+        if bars.empty:
+            return 0
+        index = _to_utc_index(bars.index)
+        epoch = index.as_unit("s").asi8
+        days = epoch // DAY_SECONDS
+        prices = np.rint(bars[list(PRICE_FIELDS)].to_numpy(dtype=float) * PRICE_SCALE)
+        if prices.min() < 0 or prices.max() > np.iinfo(np.int32).max:
+            raise ValueError(f"{ticker}: prices outside the int32 range at scale {PRICE_SCALE}")
+        prices = prices.astype(np.int32)
+        volume = np.nan_to_num(bars["volume"].to_numpy(dtype=float)).astype(np.int64)
+
+        written = 0
+        for d in np.unique(days):
+            mask = days == d
+            day = date(1970, 1, 1) + timedelta(days=int(d))
+            arrays = {"t": (epoch[mask] - d * DAY_SECONDS).astype(np.int32), "volume": volume[mask]}
+            arrays.update({f: prices[mask, i] for i, f in enumerate(PRICE_FIELDS)})
+            path = self._partition(ticker, day)
+            if path.exists():
+                old = self._load(path, ("t",) + FIELDS)
+                arrays = {c: np.concatenate([old[c], arrays[c]]) for c in old}
+            # Stable sort then keep the last copy of each timestamp: new bars win
+            order = np.argsort(arrays["t"], kind="stable")
+            t = arrays["t"][order]
+            keep = order[np.append(t[1:] != t[:-1], True)]
+            self._save(path, {c: a[keep] for c, a in arrays.items()})
+            written += int(mask.sum())
+        return written
+
+    def read_arrays(self, ticker: str, start: str, end: str,
+                    columns: Iterable[str] = FIELDS) -> Dict[str, np.ndarray]:
+        """
+        Columns of the stored bars in [start, end] (inclusive days), ordered by time:
+        "ts" (epoch seconds, int64) plus the requested fields, prices still int-scaled
+        """
+        columns = [c for c in FIELDS if c in set(columns)]
+        parts = []
+        for day in self.days(ticker, start, end):
+            arrays = self._load(self._partition(ticker, day), ["t"] + columns)
+            arrays["ts"] = arrays.pop("t").astype(np.int64) + _day_epoch(day)
+            parts.append(arrays)
+        if not parts:
+            return {"ts": np.empty(0, np.int64),
+                    **{c: np.empty(0, np.int64 if c == "volume" else np.int32) for c in columns}}
+        return {c: np.concatenate([p[c] for p in parts]) for c in ["ts"] + columns}
+
+    def read(self, ticker: str, start: str, end: str, bar: str = None) -> pd.DataFrame:
+        """Bars as floats indexed by naive UTC start time, resampled to `bar` if given"""
+        arrays = self.read_arrays(ticker, start, end)
+        if bar is not None:
+            arrays = resample_arrays(arrays, parse_interval(bar), base=self.step)
+        return to_frame(arrays)
+
+
+def resample_arrays(arrays: Dict[str, np.ndarray], seconds: int, base: int = None) -> Dict[str, np.ndarray]:
+    """
+    Aggregate time-ordered bars into `seconds`-wide bars anchored on UTC midnight:
+    first open, max high, min low, last close, summed volume. Missing fields are skipped.
+    """
+    if base and seconds % base:
+        raise ValueError(f"Bar size {seconds}s is not a multiple of the stored {base}s bars")
+    ts = arrays["ts"]
+    if not len(ts) or (base and seconds == base):
+        return arrays
+    # Buckets restart at every UTC midnight, so sizes that do not divide a day still line up
+    bucket = ts - ts % DAY_SECONDS % seconds
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:] - 1, len(ts) - 1]
+    out = {"ts": bucket[starts]}
+    if "open" in arrays:
+        out["open"] = arrays["open"][starts]
+    if "high" in arrays:
+        out["high"] = np.maximum.reduceat(arrays["high"], starts)
+    if "low" in arrays:
+        out["low"] = np.minimum.reduceat(arrays["low"], starts)
+    if "close" in arrays:
+        out["close"] = arrays["close"][ends]
+    if "volume" in arrays:
+        out["volume"] = np.add.reduceat(arrays["volume"], starts)
+    return out
+
+
+def to_frame(arrays: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Int-scaled column arrays -> DataFrame of floats indexed by naive UTC timestamps"""
+    index = pd.DatetimeIndex(arrays["ts"].astype("datetime64[s]").astype("datetime64[ns]"), name="date")
+    data = {c: arrays[c] / PRICE_SCALE for c in PRICE_FIELDS if c in arrays}
+    if "volume" in arrays:
+        data["volume"] = arrays["volume"].astype(float)
+    return pd.DataFrame(data, index=index)
+
+
+# ============================ INGESTION ============================
+
+def ingest(tickers: List[str], start: str, end: str, interval: str = None, fetcher: BarFetcher = None,
+           store: BarStore = None) -> Dict[str, int]:
+    """Fetch and store the bars of each ticker; returns {ticker: bars written} (0 on failure)"""
+    store = store or BarStore(interval=interval)
+    fetcher = fetcher or get_fetcher()
+    results = {}
+    for ticker in tickers:
+        try:
+            results[ticker] = store.write(ticker, fetcher.fetch(ticker, start, end, store.interval))
+        except Exception as e:
+            print(f"Error ingesting intraday bars for {ticker}: {e}")
+            results[ticker] = 0
+    return results
+
+
+# ============================ BENCHMARK ============================
+
+def benchmark(n_tickers: int = 10, days: int = 20, end: str = "2025-10-17", bars: List[str] = None,
+              workdir: str = None, repeat: int = 20) -> Dict:
+    """
+    Synthetic 1m bars for n_tickers x `days` business days: bytes per bar on disk,
+    then read + resample of one ticker, vectorized vs pandas resample().agg()
+    """
+    import tempfile
+
+    bars = bars or ["5m", "15m", "1h"]
+    workdir = workdir or tempfile.mkdtemp(prefix="intraday_bench_")
+    store = BarStore(workdir, "1m")
+    start = pd.bdate_range(end=end, periods=days)[0].date().isoformat()
+    tickers = [f"SYM{i:02d}.PA" for i in range(n_tickers)]
+    t0 = time.perf_counter()
+    n_bars = sum(ingest(tickers, start, end, fetcher=SyntheticBarFetcher(), store=store).values())
+    ingest_s = time.perf_counter() - t0
+    size = sum(p.stat().st_size for p in store.root.rglob("*.npz"))
+
+    def timed(call) -> float:
+        t = time.perf_counter()
+        for _ in range(repeat):
+            call()
+        return (time.perf_counter() - t) / repeat * 1000
+
+    ticker = tickers[0]
+    frame = store.read(ticker, start, end)
+    agg = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    result = {
+        "tickers": n_tickers,
+        "days": days,
+        "bars": n_bars,
+        "ingest_s": round(ingest_s, 3),
+        "bytes_per_bar": round(size / max(n_bars, 1), 1),
+        "read_one_ticker_ms": round(timed(lambda: store.read_arrays(ticker, start, end)), 3),
+        "resample_ms": {},
+    }
+    arrays = store.read_arrays(ticker, start, end)
+    for bar in bars:
+        seconds = parse_interval(bar)
+        result["resample_ms"][bar] = {
+            "vectorized": round(timed(lambda: resample_arrays(arrays, seconds)), 3),
+            "pandas": round(timed(lambda: frame.resample(f"{seconds}s").agg(agg).dropna(subset=["open"])), 3),
+        }
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    ap = argparse.ArgumentParser(description="Intraday bar ingestion, storage and resampling")
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("ingest")
+    p.add_argument("--tickers", required=True, help="Comma-separated symbols")
+    p.add_argument("--start", required=True)
+    p.add_argument("--end", default=datetime.utcnow().date().isoformat())
+    p.add_argument("--interval", default=INTRADAY_INTERVAL)
+    p.add_argument("--fetcher", default=INTRADAY_FETCHER, choices=sorted(FETCHERS))
+    p.add_argument("--dir", default=INTRADAY_DIR)
+    p = sub.add_parser("bars")
+    p.add_argument("ticker")
+    p.add_argument("--start", required=True)
+    p.add_argument("--end", required=True)
+    p.add_argument("--bar", default=None, help="Resample to this size (default: stored interval)")
+    p.add_argument("--interval", default=INTRADAY_INTERVAL)
+    p.add_argument("--dir", default=INTRADAY_DIR)
+    p = sub.add_parser("bench")
+    p.add_argument("--tickers", type=int, default=10)
+    p.add_argument("--days", type=int, default=20)
+    p.add_argument("--bars", nargs="+", default=["5m", "15m", "1h"])
+    p.add_argument("--workdir", default=None)
+    args = ap.parse_args()
+
+    if args.command == "ingest":
+        tickers = [t.strip() for t in args.tickers.split(",") if t.strip()]
+        written = ingest(tickers, args.start, args.end, fetcher=get_fetcher(args.fetcher),
+                         store=BarStore(args.dir, args.interval))
+        print(json.dumps(written))
+    elif args.command == "bars":
+        frame = BarStore(args.dir, args.interval).read(args.ticker, args.start, args.end, bar=args.bar)
+        print(frame.to_csv(float_format="%.4f"), end="")
+    else:
+        print(json.dumps(benchmark(args.tickers, args.days, bars=args.bars, workdir=args.workdir), indent=2))
@@ -0,0 +1,308 @@
+"""
+Live push of dashboard updates over Server-Sent Events
+
+One LiveFeed per process polls its sources (callables returning {key: value})
+every LIVE_POLL_SECONDS, computes what changed since the previous poll and
+broadcasts it to every connected client:
+
+- "snapshot": the full current state, first event of every connection (and of a
+  client that fell behind)
+- one event per source ("prices", "sentiment", ...): only the changed keys,
+  a removed key maps to null
+
+Each event is encoded once into an SSE frame shared by all subscribers, and the
+sources are polled once per interval however many clients are connected, so the
+server load no longer grows with the number of open dashboards. Polling pauses
+while nobody is connected. Every subscriber has a bounded queue
+(LIVE_QUEUE_SIZE frames): a slow client is reset to a snapshot instead of
+holding frames for everyone else.
+
+Usage:
+  python -m app.live bench --clients 5000 --events 20
+"""
+import asyncio
+import json
+import os
+import time
+import weakref
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+
+from app.metrics import LIVE_EVENTS, LIVE_RESYNCS, REGISTRY
+from app.serialization import dumps
+
+LIVE_POLL_SECONDS = float(os.getenv("LIVE_POLL_SECONDS", "60"))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "32"))
+
+HEARTBEAT_FRAME = b": keepalive\n\n"
+
+_BROADCASTERS: "weakref.WeakSet[Broadcaster]" = weakref.WeakSet()
+
+
+def _collect_clients() -> List[str]:
+    return ["# HELP live_clients Connected live update (SSE) clients", "# TYPE live_clients gauge",
+            f"live_clients {sum(len(b) for b in list(_BROADCASTERS))}"]
+
+
+REGISTRY.add_collector(_collect_clients)
+
+
+def sse_frame(event: str, data, event_id: int = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\n".encode("utf-8") + b"data: " + dumps(data) + b"\n\n"
+
+
+def diff(previous: Dict, current: Dict) -> Dict:
+    """Changed or added keys with their new value, removed keys with None"""
+    changes = {key: value for key, value in current.items() if previous.get(key) != value}
+    changes.update({key: None for key in previous if key not in current})
+    return changes
+
+
+class Subscriber:
+    __slots__ = ("queue", "resync")
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.resync = False
+
+
+class Broadcaster:
+    """Fan-out of pre-encoded frames to per-subscriber bounded queues"""
+
+    def __init__(self, queue_size: int = None):
+        self.queue_size = queue_size or LIVE_QUEUE_SIZE
+        self._subscribers: Set[Subscriber] = set()
+        _BROADCASTERS.add(self)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, frame: bytes):
+        for subscriber in self._subscribers:
+            try:
+                subscriber.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Deltas after a gap are meaningless: drop the backlog, send a snapshot next
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.resync = True
+                subscriber.queue.put_nowait(None)
+                LIVE_RESYNCS.inc()
+
+
+class LiveFeed:
+    """Shared producer: polls the sources while clients are connected and publishes the deltas"""
+
+    def __init__(self, sources: Dict[str, Callable[[], Dict]], poll_seconds: float = None,
+                 heartbeat_seconds: float = None, queue_size: int = None):
+        self.sources = sources
+        self.poll_seconds = LIVE_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.heartbeat_seconds = LIVE_HEARTBEAT_SECONDS if heartbeat_seconds is None else heartbeat_seconds
+        self.broadcaster = Broadcaster(queue_size)
+        self.state: Dict[str, Dict] = {name: {} for name in sources}
+        self.updated_at: Dict[str, float] = {}
+        self.event_id = 0
+        self._task: Optional[asyncio.Task] = None
+        self._clients = asyncio.Event()
+
+    # ---- producer ----
+
+    def publish(self, name: str, changes: Dict):
+        """Apply changes to the state and send them to every subscriber"""
+        state = self.state.setdefault(name, {})
+        for key, value in changes.items():
+            if value is None:
+                state.pop(key, None)
+            else:
+                state[key] = value
+        self.event_id += 1
+        self.broadcaster.publish(sse_frame(name, changes, self.event_id))
+        LIVE_EVENTS.inc(event=name)
+
+    async def poll(self):
+        """Read every source once and publish what changed"""
+        for name, read in self.sources.items():
+            try:
+                current = await asyncio.to_thread(read)
+            except Exception as e:
+                print(f"Live feed: source '{name}' failed: {e}")
+                continue
+            self.updated_at[name] = time.monotonic()
+            changes = diff(self.state.get(name, {}), current)
+            if changes:
+                self.publish(name, changes)
+
+    async def _run(self):
+        while True:
+            if not len(self.broadcaster):
+                self._clients.clear()
+                await self._clients.wait()
+            await self.poll()
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def fresh(self, name: str) -> Optional[Dict]:
+        """The source's state if it was polled within the last interval"""
+        polled = self.updated_at.get(name)
+        if polled is None or time.monotonic() - polled > self.poll_seconds:
+            return None
+        return self.state.get(name)
+
+    # ---- subscribers ----
+
+    def snapshot_frame(self) -> bytes:
+        return sse_frame("snapshot", self.state, self.event_id)
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        subscriber = self.broadcaster.subscribe()
+        self._clients.set()
+        self.start()
+        try:
+            yield self.snapshot_frame()
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    frame = HEARTBEAT_FRAME
+                if subscriber.resync:
+                    subscriber.resync = False
+                    frame = self.snapshot_frame()
+                if frame is not None:
+                    yield frame
+        finally:
+            self.broadcaster.unsubscribe(subscriber)
+
+    def response(self):
+        from fastapi.responses import StreamingResponse
+
+        return StreamingResponse(self.stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ============================ FAN-OUT BENCHMARK ============================
+
+async def _asgi_client(app, path: str, received: List, done: asyncio.Event, stop: asyncio.Event):
+    """One SSE client driven through the ASGI app: records (receive time, frame) pairs"""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "root_path": "", "headers": [(b"accept", b"text/event-stream")],
+             "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80)}
+    buffer = b""
+
+    async def receive():
+        await stop.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal buffer
+        if message["type"] != "http.response.body":
+            return
+        buffer += message.get("body", b"")
+        while b"\n\n" in buffer:
+            frame, buffer = buffer.split(b"\n\n", 1)
+            received.append((time.perf_counter(), frame))
+            if frame.startswith(b"id: ") and b"event: snapshot" in frame:
+                done.set()
+
+    try:
+        await app(scope, receive, send)
+    except asyncio.CancelledError:
+        pass
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def fanout_benchmark(clients: int = 1000, events: int = 20, keys: int = 40, changed: int = 5,
+                           interval: float = 0.05) -> Dict:
+    """
+    `clients` SSE connections on a FastAPI app serving feed.response(), then `events`
+    deltas of `changed` keys published by the producer; reports publish cost and
+    end-to-end delivery latency
+    """
+    from fastapi import FastAPI
+
+    feed = LiveFeed({}, poll_seconds=3600, heartbeat_seconds=3600, queue_size=max(LIVE_QUEUE_SIZE, events + 1))
+    feed.state["prices"] = {f"K{i:03d}": {"last_price": 100.0 + i, "price_change": 0.0} for i in range(keys)}
+    app = FastAPI()
+    app.get("/live")(feed.response)
+
+    stop = asyncio.Event()
+    logs = [[] for _ in range(clients)]
+    ready = [asyncio.Event() for _ in range(clients)]
+    t0 = time.perf_counter()
+    tasks = [asyncio.create_task(_asgi_client(app, "/live", logs[i], ready[i], stop)) for i in range(clients)]
+    await asyncio.gather(*(r.wait() for r in ready))
+    connect_s = time.perf_counter() - t0
+
+    published, publish_ms = [], []
+    for n in range(events):
+        changes = {f"K{(n * changed + j) % keys:03d}": {"last_price": 100.0 + n + j, "price_change": n / 10}
+                   for j in range(changed)}
+        start = time.perf_counter()
+        feed.publish("prices", changes)
+        publish_ms.append((time.perf_counter() - start) * 1000)
+        published.append(start)
+        await asyncio.sleep(interval)
+    await asyncio.sleep(interval)
+
+    latencies, delivered = [], 0
+    for log in logs:
+        deltas = [t for t, frame in log if b"event: prices" in frame]
+        delivered += len(deltas)
+        latencies.extend((t - p) * 1000 for t, p in zip(deltas, published))
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    return {
+        "clients": clients,
+        "events": events,
+        "frame_bytes": len(sse_frame("prices", changes, feed.event_id)),
+        "connect_s": round(connect_s, 3),
+        "delivered": delivered,
+        "expected": clients * events,
+        "publish_ms": {"median": round(_percentile(publish_ms, 0.5), 3), "max": round(max(publish_ms), 3)},
+        "latency_ms": {"p50": round(_percentile(latencies, 0.5), 3), "p95": round(_percentile(latencies, 0.95), 3),
+                       "p99": round(_percentile(latencies, 0.99), 3), "max": round(max(latencies, default=0), 3)},
+        "resyncs": int(sum(1 for log in logs for _, f in log if b"event: snapshot" in f) - clients),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Live update (SSE) fan-out benchmark with simulated local clients")
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("bench")
+    p.add_argument("--clients", type=int, nargs="+", default=[100, 1000, 5000])
+    p.add_argument("--events", type=int, default=20)
+    p.add_argument("--keys", type=int, default=40, help="Keys in the published state (e.g. stocks)")
+    p.add_argument("--changed", type=int, default=5, help="Keys changed per event")
+    p.add_argument("--interval", type=float, default=0.05, help="Seconds between events")
+    args = ap.parse_args()
+
+    for n in args.clients:
+        result = asyncio.run(fanout_benchmark(n, args.events, args.keys, args.changed, args.interval))
+        print(json.dumps(result))
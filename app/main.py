@@ -1,15 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import sentiment, prices, correlation, dashboard
+from app.routers import sentiment, prices, correlation, dashboard, pipeline
+from app.metrics import enable_metrics
+from app.serialization import ApiJSONResponse, enable_compression
 from app.models.sql_models import init_db
-from app.models.mongo_models import init_mongodb
+from app.storage import get_repository
+from app.traffic import enable_traffic_recording
 
 # Initialize FastAPI app
 app = FastAPI(
     title="CAC40 Sentiment-Price Correlation API",
     description="API for analyzing correlations between sentiment and price variations for CAC40 stocks",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ApiJSONResponse
 )
 
 # CORS middleware
@@ -21,11 +25,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli compression of JSON responses (API_COMPRESSION=1)
+enable_compression(app)
+
+# Prometheus metrics at /metrics
+enable_metrics(app, app_name="pipeline")
+
+# Sampled request recording for load replay (TRAFFIC_RECORD_FILE)
+enable_traffic_recording(app, app_name="pipeline")
+
 # Include routers
 app.include_router(sentiment.router)
 app.include_router(prices.router)
 app.include_router(correlation.router)
 app.include_router(dashboard.router)
+app.include_router(pipeline.router)
 
 
 @app.on_event("startup")
@@ -33,10 +47,17 @@ async def startup_event():
     """Initialize databases on startup"""
     print("Initializing databases...")
     init_db()
-    init_mongodb()
+    get_repository().init()
     print("Databases initialized successfully")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the streaming pipeline and background inference workers"""
+    await pipeline.shutdown()
+    sentiment.sentiment_analyzer.close()
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -48,7 +69,8 @@ async def root():
             "sentiment_analyze": "/sentiment/analyze",
             "prices_scrape": "/prices/scrape",
             "correlation_run": "/correlation/run",
-            "dashboard": "/dashboard"
+            "dashboard": "/dashboard",
+            "pipeline": "/pipeline/start"
         },
         "docs": "/docs"
     }
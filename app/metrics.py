@@ -0,0 +1,350 @@
+"""
+In-process metrics with a Prometheus text exposition endpoint
+
+- Counter / Histogram with label sets, thread-safe, O(log buckets) per observation
+- MetricsMiddleware: request latency per route template and status class
+- observe_call(): latency + error counts for external calls (yfinance, NewsAPI)
+- instrumented(): duration of service methods, and the "current operation" used to
+  attribute SQLAlchemy query counts/durations to the method that issued them
+- register_cache(): hit ratios of ResultCache instances, read at scrape time
+
+Everything is plain Python without a client library, cheap enough to stay on.
+The same hooks open app.tracing spans (and feed its slow-query log) when
+TRACE_FILE is set.
+"""
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from app import tracing
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond cache hits up to slow model batches / external calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+_current_operation: contextvars.ContextVar[str] = contextvars.ContextVar("current_operation", default="other")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """collector() returns exposition lines computed at scrape time"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("app", "method", "route", "status"))
+EXTERNAL_CALL_LATENCY = REGISTRY.histogram(
+    "external_call_duration_seconds", "Latency of calls to external services", ("service",))
+EXTERNAL_CALL_ERRORS = REGISTRY.counter(
+    "external_call_errors_total", "Failed calls to external services", ("service",))
+OPERATION_LATENCY = REGISTRY.histogram(
+    "service_operation_duration_seconds", "Duration of instrumented service methods", ("operation",))
+DB_QUERY_LATENCY = REGISTRY.histogram(
+    "db_query_duration_seconds", "Database query duration by calling service method", ("backend", "operation"))
+ARTICLES_SCORED = REGISTRY.counter(
+    "sentiment_articles_scored_total", "Articles scored by the sentiment model or fallback", ("scorer",))
+MODEL_BATCH_SIZE = REGISTRY.histogram(
+    "sentiment_model_batch_size", "Number of texts per model call", ("backend",), buckets=SIZE_BUCKETS)
+MODEL_INFERENCE_LATENCY = REGISTRY.histogram(
+    "sentiment_model_inference_seconds", "Model inference time per call", ("backend",))
+PIPELINE_ITEMS = REGISTRY.counter(
+    "pipeline_items_total", "Articles through each stage of the streaming pipeline", ("stage",))
+PIPELINE_LATENCY = REGISTRY.histogram(
+    "pipeline_ingest_to_rollup_seconds", "Time from ingest to the article's day being written to the daily rollup")
+LIVE_EVENTS = REGISTRY.counter(
+    "live_events_total", "Events broadcast to live update (SSE) clients", ("event",))
+LIVE_RESYNCS = REGISTRY.counter(
+    "live_resyncs_total", "Live update clients that fell behind and were reset to a snapshot")
+
+
+def current_operation() -> str:
+    return _current_operation.get()
+
+
+def instrumented(operation: str):
+    """Decorator timing a service method and tagging the DB queries it issues"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _current_operation.set(operation)
+            t0 = time.perf_counter()
+            try:
+                with tracing.span(operation):
+                    return func(*args, **kwargs)
+            finally:
+                OPERATION_LATENCY.observe(time.perf_counter() - t0, operation=operation)
+                _current_operation.reset(token)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def observe_call(service: str):
+    """Time an external call and count it as an error if it raises"""
+    t0 = time.perf_counter()
+    try:
+        with tracing.span(f"external.{service}"):
+            yield
+    except Exception:
+        EXTERNAL_CALL_ERRORS.inc(service=service)
+        raise
+    finally:
+        EXTERNAL_CALL_LATENCY.observe(time.perf_counter() - t0, service=service)
+
+
+@contextmanager
+def observe_query(backend: str, statement=None, params=None):
+    """
+    Time a non-SQLAlchemy query (Mongo, embedded SQLite) under the current operation;
+    statement/params only end up in the trace and the slow-query log
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        operation = current_operation()
+        DB_QUERY_LATENCY.observe(elapsed, backend=backend, operation=operation)
+        tracing.record_query(backend, operation, statement, params, elapsed)
+
+
+def instrument_sqlalchemy():
+    """Record every SQLAlchemy cursor execution (all engines) in DB_QUERY_LATENCY and the trace"""
+    try:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+    except ImportError:
+        return
+    if getattr(instrument_sqlalchemy, "_installed", False):
+        return
+    instrument_sqlalchemy._installed = True
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_query_start")
+        if starts:
+            elapsed = time.perf_counter() - starts.pop()
+            operation = current_operation()
+            DB_QUERY_LATENCY.observe(elapsed, backend=conn.dialect.name, operation=operation)
+            tracing.record_query(conn.dialect.name, operation, statement, parameters, elapsed)
+
+
+_CACHES: Dict[str, object] = {}
+
+CACHE_FAMILIES = (
+    ("cache_entries", "gauge", "Entries held in memory"),
+    ("cache_hits_total", "counter", "Lookups answered from memory"),
+    ("cache_disk_hits_total", "counter", "Lookups answered from the disk tier"),
+    ("cache_misses_total", "counter", "Lookups that ran the computation"),
+    ("cache_hit_ratio", "gauge", "Share of lookups that did not run the computation"),
+)
+
+
+def _collect_caches() -> List[str]:
+    samples = {family: [] for family, _, _ in CACHE_FAMILIES}
+    for name, cache in sorted(_CACHES.items()):
+        s = cache.stats()
+        lookups = s["hits"] + s["disk_hits"] + s["misses"] + s["waits"]
+        label = f'{{cache="{_escape(name)}"}}'
+        values = {
+            "cache_entries": s["entries"],
+            "cache_hits_total": s["hits"],
+            "cache_disk_hits_total": s["disk_hits"],
+            "cache_misses_total": s["misses"],
+            "cache_hit_ratio": (lookups - s["misses"]) / lookups if lookups else 0.0,
+        }
+        for family, value in values.items():
+            samples[family].append(f"{family}{label} {value}")
+    lines = []
+    for family, kind, documentation in CACHE_FAMILIES:
+        if samples[family]:
+            lines += [f"# HELP {family} {documentation}", f"# TYPE {family} {kind}", *samples[family]]
+    return lines
+
+
+REGISTRY.add_collector(_collect_caches)
+
+
+def register_cache(name: str, cache):
+    """Expose a ResultCache's counters and hit ratio under cache=name"""
+    _CACHES[name] = cache
+
+
+def render_latest() -> str:
+    return REGISTRY.render()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency by matched route template"""
+
+    def __init__(self, app, app_name: str = "api"):
+        self.app = app
+        self.app_name = app_name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        status = {"code": 500}
+
+        async def wrapped_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        with tracing.span("http.request", app=self.app_name, method=scope.get("method", "")) as request_span:
+            try:
+                await self.app(scope, receive, wrapped_send)
+            finally:
+                route = scope.get("route")
+                if request_span is not None:
+                    request_span.set(route=getattr(route, "path", "unmatched"), status=status["code"])
+                REQUEST_LATENCY.observe(
+                    time.perf_counter() - t0,
+                    app=self.app_name,
+                    method=scope.get("method", ""),
+                    # Route template keeps the label set bounded (no raw paths / query strings)
+                    route=getattr(route, "path", "unmatched"),
+                    status=f"{status['code'] // 100}xx",
+                )
+
+
+def enable_metrics(app, app_name: str = "api"):
+    """Install the request middleware, SQLAlchemy listeners and a /metrics route on a FastAPI app"""
+    from fastapi.responses import Response
+
+    instrument_sqlalchemy()
+    app.add_middleware(MetricsMiddleware, app_name=app_name)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(render_latest(), media_type=CONTENT_TYPE)
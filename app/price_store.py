@@ -0,0 +1,420 @@
+"""
+Managed schema for the cac40_open_prices SQLite table
+
+The notebook creates the table with PRIMARY KEY(date, symbol) and pandas writes
+dates as "YYYY-MM-DD HH:MM:SS". Every reader filters on one symbol and a date
+range, which goes against that key. Schema v3:
+
+- WITHOUT ROWID table clustered on (symbol, date): a ticker's history is one
+  contiguous B-tree range and is returned already ordered
+- ISO "YYYY-MM-DD" dates, so BETWEEN :start AND :end is inclusive on both ends.
+  A CHECK rejects anything else, and a BEFORE INSERT trigger folds timestamped
+  inserts (pandas to_sql writes "YYYY-MM-DD HH:MM:SS") into the row of that day
+- price_coverage(symbol, first_date, last_date, n_rows), maintained by triggers,
+  answers "which tickers have data in [start, end]" and the data version
+  without scanning prices
+- WAL journal and mmap reads (per-connection pragmas)
+
+Usage:
+  python -m app.price_store migrate --db cac40_open_prices.db
+  python -m app.price_store check   --db cac40_open_prices.db
+  python -m app.price_store bench   --years 20
+"""
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+SCHEMA_VERSION = 3
+PRICES_TABLE = "cac40_open_prices"
+COVERAGE_TABLE = "price_coverage"
+# Derived open-to-open log returns, maintained by app.incremental
+RETURNS_TABLE = "daily_returns"
+
+MMAP_SIZE = int(os.getenv("PRICES_MMAP_SIZE", str(256 * 1024 * 1024)))
+CACHE_SIZE_KB = int(os.getenv("PRICES_CACHE_SIZE_KB", str(64 * 1024)))
+
+PRICE_COLUMNS = ("open_price", "high_price", "low_price", "volume")
+
+
+def _schema(table: str) -> List[str]:
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            symbol      TEXT NOT NULL,
+            date        TEXT NOT NULL CHECK (length(date) = 10 AND date(date) IS date),
+            open_price  REAL,
+            high_price  REAL,
+            low_price   REAL,
+            volume      REAL,
+            PRIMARY KEY (symbol, date)
+        ) WITHOUT ROWID
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS {COVERAGE_TABLE} (
+            symbol      TEXT PRIMARY KEY,
+            first_date  TEXT NOT NULL,
+            last_date   TEXT NOT NULL,
+            n_rows      INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+    ]
+
+
+def _upsert_clause() -> str:
+    """ON CONFLICT clause shared by upsert_prices and the date normalization trigger"""
+    updates = ", ".join(f"{c} = COALESCE(excluded.{c}, {c})" for c in PRICE_COLUMNS)
+    return f"ON CONFLICT(symbol, date) DO UPDATE SET {updates}"
+
+
+def _triggers(table: str) -> List[str]:
+    columns = ", ".join(PRICE_COLUMNS)
+    values = ", ".join(f"NEW.{c}" for c in PRICE_COLUMNS)
+    return [
+        # Re-issues a timestamped insert as an upsert on its ISO day, then drops the original row
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_iso_date
+        BEFORE INSERT ON {table}
+        WHEN length(NEW.date) > 10
+        BEGIN
+            INSERT INTO {table} (symbol, date, {columns})
+            VALUES (NEW.symbol, substr(NEW.date, 1, 10), {values})
+            {_upsert_clause()};
+            SELECT RAISE(IGNORE);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_coverage_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {COVERAGE_TABLE} (symbol, first_date, last_date, n_rows)
+            VALUES (NEW.symbol, NEW.date, NEW.date, 1)
+            ON CONFLICT(symbol) DO UPDATE SET
+                first_date = MIN(first_date, excluded.first_date),
+                last_date  = MAX(last_date, excluded.last_date),
+                n_rows     = n_rows + 1;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_coverage_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            UPDATE {COVERAGE_TABLE} SET
+                n_rows     = n_rows - 1,
+                first_date = COALESCE((SELECT MIN(date) FROM {table} WHERE symbol = OLD.symbol), first_date),
+                last_date  = COALESCE((SELECT MAX(date) FROM {table} WHERE symbol = OLD.symbol), last_date)
+            WHERE symbol = OLD.symbol;
+            DELETE FROM {COVERAGE_TABLE} WHERE symbol = OLD.symbol AND n_rows <= 0;
+        END
+        """,
+    ]
+
+
+def apply_pragmas(conn: sqlite3.Connection, read_only: bool = False):
+    """Per-connection settings: WAL, relaxed fsync in WAL mode, mmap reads, larger page cache"""
+    if not read_only:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(conn)
+    return conn
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def migrate(conn: sqlite3.Connection, table: str = PRICES_TABLE) -> bool:
+    """
+    Bring the database to SCHEMA_VERSION. A legacy (or v2) table is copied into the
+    new layout (dates truncated to ISO days, duplicates and unparseable dates dropped)
+    then removed.
+    Returns True if anything was changed.
+    """
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return False
+
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        legacy = None
+        if table in existing:
+            legacy = f"{table}_legacy"
+            conn.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        for statement in _schema(table):
+            conn.execute(statement)
+
+        if legacy:
+            columns = set(_table_columns(conn, legacy))
+            values = ", ".join(c if c in columns else "NULL" for c in PRICE_COLUMNS)
+            conn.execute(f"""
+                INSERT OR IGNORE INTO {table} (symbol, date, {", ".join(PRICE_COLUMNS)})
+                SELECT symbol, substr(date, 1, 10), {values}
+                FROM {legacy}
+                WHERE symbol IS NOT NULL AND date IS NOT NULL
+                ORDER BY symbol, date
+            """)
+            conn.execute(f"DROP TABLE {legacy}")
+
+        # Coverage is rebuilt in one pass, then kept up to date by the triggers
+        conn.execute(f"DELETE FROM {COVERAGE_TABLE}")
+        conn.execute(f"""
+            INSERT INTO {COVERAGE_TABLE} (symbol, first_date, last_date, n_rows)
+            SELECT symbol, MIN(date), MAX(date), COUNT(*) FROM {table} GROUP BY symbol
+        """)
+        for statement in _triggers(table):
+            conn.execute(statement)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.isolation_level = previous_isolation
+
+    conn.execute("ANALYZE")
+    return True
+
+
+def upsert_prices(conn: sqlite3.Connection, rows: Iterable[Sequence], table: str = PRICES_TABLE) -> int:
+    """
+    Bulk insert (symbol, date, open_price[, high_price, low_price, volume]) rows in one
+    transaction. Existing (symbol, date) rows are updated in place, so coverage
+    counts stay exact.
+    """
+    rows = [tuple(r) + (None,) * (2 + len(PRICE_COLUMNS) - len(r)) for r in rows]
+    rows = [(symbol, str(date)[:10], *rest) for symbol, date, *rest in rows]
+    if not rows:
+        return 0
+    sql = f"""
+        INSERT INTO {table} (symbol, date, {", ".join(PRICE_COLUMNS)})
+        VALUES (?, ?, ?, ?, ?, ?)
+        {_upsert_clause()}
+    """
+    if conn.in_transaction:
+        conn.executemany(sql, rows)
+        return len(rows)
+    # Autocommit connections (see connect()) would otherwise commit row by row
+    conn.execute("BEGIN")
+    try:
+        conn.executemany(sql, rows)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return len(rows)
+
+
+def month_fingerprints(conn: sqlite3.Connection, table: str = PRICES_TABLE) -> Dict[Tuple[str, str], str]:
+    """
+    {(symbol, "YYYY-MM"): fingerprint} over the whole table, from one ordered scan of
+    the (symbol, date) key: any added, removed or corrected row changes its month's value
+    """
+    rows = conn.execute(f"""
+        SELECT symbol, substr(date, 1, 7), COUNT(*), MAX(date), TOTAL(open_price), TOTAL(volume)
+        FROM {table}
+        GROUP BY symbol, substr(date, 1, 7)
+    """)
+    return {(symbol, month): f"{n}:{last}:{opens!r}:{volume!r}" for symbol, month, n, last, opens, volume in rows}
+
+
+def ensure_returns_table(conn: sqlite3.Connection):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {RETURNS_TABLE} (
+            symbol      TEXT NOT NULL,
+            date        TEXT NOT NULL,
+            log_return  REAL NOT NULL,
+            PRIMARY KEY (symbol, date)
+        ) WITHOUT ROWID
+    """)
+
+
+def replace_returns(conn: sqlite3.Connection, symbol: str, start: str, end: str,
+                    rows: Iterable[Tuple[str, float]]) -> int:
+    """Replace a symbol's (date, log_return) rows in [start, end] in one transaction"""
+    rows = [(symbol, date, value) for date, value in rows]
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"DELETE FROM {RETURNS_TABLE} WHERE symbol = ? AND date BETWEEN ? AND ?", (symbol, start, end))
+        conn.executemany(f"INSERT INTO {RETURNS_TABLE} (symbol, date, log_return) VALUES (?, ?, ?)", rows)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return len(rows)
+
+
+def covered_symbols(conn: sqlite3.Connection, start: str, end: str) -> List[str]:
+    """Symbols whose history overlaps [start, end], from the coverage table"""
+    rows = conn.execute(f"""
+        SELECT symbol FROM {COVERAGE_TABLE}
+        WHERE first_date <= ? AND last_date >= ?
+        ORDER BY symbol
+    """, (end, start))
+    return [r[0] for r in rows]
+
+
+# ============================ QUERY PLANS ============================
+
+# (description, SQL, parameters, substring expected in the plan, substrings that must not appear)
+def _plan_checks(table: str) -> List[Tuple[str, str, tuple, str, Tuple[str, ...]]]:
+    return [
+        ("one ticker over a date range",
+         f"SELECT date, open_price FROM {table} WHERE symbol = ? AND date BETWEEN ? AND ? ORDER BY date",
+         ("MC.PA", "2024-01-01", "2024-12-31"),
+         "SEARCH", ("SCAN", "TEMP B-TREE")),
+        ("several tickers over a date range",
+         f"SELECT symbol, date, open_price FROM {table} WHERE symbol IN (?, ?) AND date BETWEEN ? AND ? "
+         f"ORDER BY symbol, date",
+         ("MC.PA", "BNP.PA", "2024-01-01", "2024-12-31"),
+         "SEARCH", ("SCAN", "TEMP B-TREE")),
+        ("tickers present in a date range",
+         f"SELECT symbol FROM {COVERAGE_TABLE} WHERE first_date <= ? AND last_date >= ? ORDER BY symbol",
+         ("2024-12-31", "2024-01-01"),
+         COVERAGE_TABLE, (table, "TEMP B-TREE")),
+    ]
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> str:
+    return "\n".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def check_query_plans(conn: sqlite3.Connection, table: str = PRICES_TABLE) -> List[Dict]:
+    """Run EXPLAIN QUERY PLAN on the reader queries and flag plans that scan or sort"""
+    results = []
+    for name, sql, params, expected, forbidden in _plan_checks(table):
+        plan = explain(conn, sql, params)
+        ok = expected in plan and not any(f in plan for f in forbidden)
+        results.append({"query": name, "ok": ok, "plan": plan})
+    return results
+
+
+# ============================ BENCHMARK ============================
+
+LEGACY_SCHEMA = f"""
+CREATE TABLE {PRICES_TABLE} (
+    date TEXT,
+    symbol TEXT,
+    open_price REAL,
+    PRIMARY KEY(date, symbol)
+)
+"""
+
+
+def build_synthetic(path: str, years: int = 20, n_symbols: int = 40, legacy: bool = False, seed: int = 0) -> int:
+    """Business-day random walks for n_symbols tickers over `years` years, in the legacy or v2 layout"""
+    import random
+    from datetime import date, timedelta
+
+    rnd = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = connect(path)
+    symbols = [f"SYM{i:02d}.PA" for i in range(n_symbols)]
+    start = date(2025 - years, 1, 1)
+    days = [start + timedelta(days=i) for i in range(years * 365)]
+    days = [d.isoformat() for d in days if d.weekday() < 5]
+
+    if legacy:
+        conn.execute(LEGACY_SCHEMA)
+    else:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        for statement in _schema(PRICES_TABLE) + _triggers(PRICES_TABLE):
+            conn.execute(statement)
+
+    rows = []
+    for symbol in symbols:
+        price = 100.0
+        for d in days:
+            price *= 1 + rnd.gauss(0, 0.01)
+            rows.append((symbol, d, price))
+    if legacy:
+        conn.execute("BEGIN")
+        conn.executemany(f"INSERT INTO {PRICES_TABLE} (symbol, date, open_price) VALUES (?, ?, ?)", rows)
+        conn.execute("COMMIT")
+    else:
+        upsert_prices(conn, rows)
+    conn.execute("ANALYZE")
+    conn.close()
+    return len(rows)
+
+
+def _time(conn: sqlite3.Connection, sql: str, params: tuple, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def benchmark(years: int = 20, n_symbols: int = 40, workdir: str = None, repeat: int = 50) -> List[Dict]:
+    """Legacy (date, symbol) key vs v2 layout on the reader queries of sentiment_price_corr_json"""
+    import tempfile
+
+    workdir = workdir or tempfile.mkdtemp(prefix="price_store_bench_")
+    queries = [
+        ("fetch_prices 1 ticker x 1 year",
+         f"SELECT date, open_price FROM {PRICES_TABLE} WHERE symbol = ? AND date BETWEEN ? AND ? ORDER BY date",
+         ("SYM07.PA", "2023-01-01", "2023-12-31")),
+        ("fetch_prices_many 10 tickers x 1 year",
+         f"SELECT symbol, date, open_price FROM {PRICES_TABLE} WHERE symbol IN ({','.join('?' * 10)}) "
+         f"AND date BETWEEN ? AND ? ORDER BY symbol, date",
+         tuple(f"SYM{i:02d}.PA" for i in range(10)) + ("2023-01-01", "2023-12-31")),
+    ]
+    results = []
+    for layout in ("legacy", "v2"):
+        path = os.path.join(workdir, f"{layout}.db")
+        n_rows = build_synthetic(path, years, n_symbols, legacy=(layout == "legacy"))
+        conn = connect(path)
+        row = {"layout": layout, "rows": n_rows, "file_mb": round(os.path.getsize(path) / 1e6, 1)}
+        for name, sql, params in queries:
+            row[f"{name} (ms)"] = round(_time(conn, sql, params, repeat), 3)
+        if layout == "legacy":
+            sql, params = (f"SELECT DISTINCT symbol FROM {PRICES_TABLE} WHERE date BETWEEN ? AND ?",
+                           ("2023-01-01", "2023-12-31"))
+        else:
+            sql, params = (f"SELECT symbol FROM {COVERAGE_TABLE} WHERE first_date <= ? AND last_date >= ?",
+                           ("2023-12-31", "2023-01-01"))
+        row["list tickers in range (ms)"] = round(_time(conn, sql, params, repeat), 3)
+        conn.close()
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    ap = argparse.ArgumentParser(description="cac40_open_prices schema management")
+    sub = ap.add_subparsers(dest="command", required=True)
+    for name in ("migrate", "check"):
+        p = sub.add_parser(name)
+        p.add_argument("--db", default="cac40_open_prices.db")
+    p = sub.add_parser("bench")
+    p.add_argument("--years", type=int, default=20)
+    p.add_argument("--symbols", type=int, default=40)
+    p.add_argument("--workdir", default=None)
+    args = ap.parse_args()
+
+    if args.command == "migrate":
+        conn = connect(args.db)
+        changed = migrate(conn)
+        print(json.dumps({"db": args.db, "migrated": changed, "schema_version": schema_version(conn)}))
+    elif args.command == "check":
+        conn = connect(args.db)
+        checks = check_query_plans(conn)
+        print(json.dumps(checks, indent=2))
+        raise SystemExit(0 if all(c["ok"] for c in checks) else 1)
+    else:
+        print(json.dumps(benchmark(args.years, args.symbols, args.workdir), indent=2))
@@ -0,0 +1,139 @@
+"""
+Memoization of computed API payloads
+
+- Bounded in-memory LRU, optionally backed by an on-disk tier of JSON files
+- Keys are tuples of request parameters; callers include a data version so that
+  entries computed on older data are simply never looked up again
+- Stampede protection: concurrent requests for the same key wait for a single
+  computation instead of all running it
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.serialization import dumps
+
+
+class ResultCache:
+    """Thread-safe LRU of JSON-serializable results with an optional disk tier"""
+
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[str] = None,
+                 max_disk_entries: int = 2000):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    @staticmethod
+    def make_key(parts: Tuple) -> str:
+        raw = json.dumps(list(parts), default=str, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _store(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.json"
+
+    def _disk_get(self, key: str) -> Tuple[bool, Any]:
+        if self.disk_dir is None:
+            return False, None
+        path = self._disk_path(key)
+        try:
+            return True, json.loads(path.read_bytes())
+        except (FileNotFoundError, ValueError):
+            return False, None
+
+    def _disk_put(self, key: str, value: Any):
+        if self.disk_dir is None:
+            return
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        path = self._disk_path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(dumps(value))
+        tmp.replace(path)
+        self._prune_disk()
+
+    def _prune_disk(self):
+        files = list(self.disk_dir.glob("*.json"))
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for path in files[:len(files) - self.max_disk_entries]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_or_compute(self, parts: Tuple, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for parts, computing it at most once even under
+        concurrent calls. Exceptions are propagated to every waiter and not cached.
+        """
+        key = self.make_key(parts)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.waits += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            found, value = self._disk_get(key)
+            if found:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                value = compute()
+                self._disk_put(key, value)
+            self._store(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self, disk: bool = False):
+        with self._lock:
+            self._entries.clear()
+        if disk and self.disk_dir is not None and self.disk_dir.exists():
+            for path in self.disk_dir.glob("*.json"):
+                path.unlink()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "waits": self.waits,
+            }
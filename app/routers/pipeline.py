@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+
+from app.config import settings
+from app.routers.sentiment import news_scraper, sentiment_analyzer
+from app.services.pipeline import StreamingPipeline
+
+router = APIRouter(prefix="/pipeline", tags=["pipeline"])
+
+# Current streaming run (a new StreamingPipeline per start)
+pipeline: Optional[StreamingPipeline] = None
+
+
+@router.post("/start")
+async def start_pipeline(
+    tickers: Optional[List[str]] = Query(None, description="List of tickers to follow (default: top 5 CAC40)"),
+    days_back: int = Query(1, description="Number of days of news requested at each poll"),
+    poll_seconds: float = Query(settings.PIPELINE_POLL_SECONDS, description="Seconds between news polls")
+):
+    """
+    Start the streaming news -> sentiment -> daily rollup pipeline in the background
+    
+    New articles are scored in micro-batches and merged into the daily sentiment
+    file within PIPELINE_FLUSH_SECONDS, without chaining /sentiment/scrape and /sentiment/analyze
+    """
+    global pipeline
+    if pipeline is not None and pipeline.running:
+        raise HTTPException(status_code=409, detail="Pipeline already running")
+    pipeline = StreamingPipeline(tickers=tickers, scraper=news_scraper, analyzer=sentiment_analyzer,
+                                 repository=sentiment_analyzer.repository,
+                                 days_back=days_back, poll_seconds=poll_seconds)
+    pipeline.start()
+    return {"status": "started", "data": pipeline.status()}
+
+
+@router.post("/stop")
+async def stop_pipeline(
+    drain: bool = Query(True, description="Finish scoring and rolling up queued articles before stopping")
+):
+    """Stop the streaming pipeline"""
+    if pipeline is None or not pipeline.running:
+        raise HTTPException(status_code=404, detail="Pipeline not running")
+    await pipeline.stop(drain=drain)
+    return {"status": "stopped", "data": pipeline.status()}
+
+
+@router.get("/status")
+async def pipeline_status():
+    """Queue depths, stage counters and last rollup time of the current or last run"""
+    if pipeline is None:
+        return {"status": "idle", "data": None}
+    return {"status": "running" if pipeline.running else "stopped", "data": pipeline.status()}
+
+
+async def shutdown():
+    """Cancel the pipeline when the app stops (the rollup still writes what it holds)"""
+    if pipeline is not None:
+        await pipeline.stop(drain=False)
@@ -0,0 +1,231 @@
+"""
+Compact JSON serialization and response compression shared by the APIs
+
+- dumps(): orjson when installed (NumPy arrays/scalars, datetimes), json fallback otherwise
+- ApiJSONResponse: JSONResponse using dumps() when API_FAST_JSON=1
+- CompressionMiddleware: brotli/gzip negotiation for JSON responses when API_COMPRESSION=1
+- to_columnar(): list of dicts -> {"dates": [...], "open": [...]} layout for time series
+"""
+import gzip
+import json
+import os
+from datetime import date, datetime
+from typing import Dict, List
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FAST_JSON_ENABLED = os.getenv("API_FAST_JSON", "0") == "1"
+COMPRESSION_ENABLED = os.getenv("API_COMPRESSION", "0") == "1"
+COMPRESSION_MIN_SIZE = int(os.getenv("API_COMPRESSION_MIN_SIZE", "1024"))
+
+
+def _default(obj):
+    """Fallback encoder for types the json module does not handle"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+    if hasattr(obj, "isoformat"):
+        # pandas Timestamp
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def to_columnar(records: List[Dict], date_key: str = "date", rename: Dict[str, str] = None) -> Dict[str, list]:
+    """
+    Convert a list of row dicts to an array-of-arrays layout
+
+    [{"date": d1, "open_price": 1.0}, ...] -> {"dates": [d1, ...], "open_price": [1.0, ...]}
+    """
+    rename = rename or {}
+    if not records:
+        return {"dates": []}
+    columns = {"dates": [r.get(date_key) for r in records]}
+    for key in records[0]:
+        if key == date_key:
+            continue
+        columns[rename.get(key, key)] = [r.get(key) for r in records]
+    return columns
+
+
+try:
+    from fastapi.responses import JSONResponse
+
+    class ApiJSONResponse(JSONResponse):
+        """JSONResponse rendered with dumps() when API_FAST_JSON is enabled"""
+
+        def render(self, content) -> bytes:
+            if FAST_JSON_ENABLED:
+                return dumps(content)
+            return super().render(content)
+
+    class CompressionMiddleware:
+        """
+        ASGI middleware compressing buffered JSON responses with brotli or gzip,
+        depending on the client's Accept-Encoding. Streaming responses
+        (NDJSON, Arrow, SSE) and small bodies are passed through untouched.
+        """
+
+        COMPRESSIBLE_TYPES = ("application/json",)
+
+        def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, gzip_level: int = 6,
+                     brotli_quality: int = 5):
+            self.app = app
+            self.minimum_size = minimum_size
+            self.gzip_level = gzip_level
+            self.brotli_quality = brotli_quality
+
+        def _choose_encoding(self, scope) -> str:
+            accept = ""
+            for name, value in scope.get("headers", []):
+                if name == b"accept-encoding":
+                    accept = value.decode("latin-1").lower()
+                    break
+            offered = {part.split(";")[0].strip() for part in accept.split(",")}
+            if BROTLI_AVAILABLE and "br" in offered:
+                return "br"
+            if "gzip" in offered:
+                return "gzip"
+            return ""
+
+        def _compress(self, body: bytes, encoding: str) -> bytes:
+            if encoding == "br":
+                return brotli.compress(body, quality=self.brotli_quality)
+            return gzip.compress(body, compresslevel=self.gzip_level)
+
+        async def __call__(self, scope, receive, send):
+            if scope["type"] != "http":
+                await self.app(scope, receive, send)
+                return
+            encoding = self._choose_encoding(scope)
+            if not encoding:
+                await self.app(scope, receive, send)
+                return
+
+            start_message = None
+            body_parts: List[bytes] = []
+            passthrough = False
+
+            async def wrapped_send(message):
+                nonlocal start_message, passthrough
+                if passthrough:
+                    await send(message)
+                    return
+                if message["type"] == "http.response.start":
+                    headers = dict(message.get("headers", []))
+                    content_type = headers.get(b"content-type", b"").decode("latin-1")
+                    if (not content_type.startswith(self.COMPRESSIBLE_TYPES)
+                            or b"content-encoding" in headers):
+                        passthrough = True
+                        await send(message)
+                        return
+                    start_message = message
+                    return
+                if message["type"] == "http.response.body":
+                    body_parts.append(message.get("body", b""))
+                    if message.get("more_body", False):
+                        return
+                    body = b"".join(body_parts)
+                    headers = [(k, v) for k, v in start_message.get("headers", [])
+                               if k not in (b"content-length", b"vary")]
+                    if len(body) >= self.minimum_size:
+                        body = self._compress(body, encoding)
+                        headers.append((b"content-encoding", encoding.encode("latin-1")))
+                    headers.append((b"content-length", str(len(body)).encode("latin-1")))
+                    headers.append((b"vary", b"Accept-Encoding"))
+                    await send({**start_message, "headers": headers})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(message)
+
+            await self.app(scope, receive, wrapped_send)
+
+    def enable_compression(app):
+        """Install CompressionMiddleware on an app when API_COMPRESSION=1"""
+        if COMPRESSION_ENABLED:
+            app.add_middleware(CompressionMiddleware)
+
+except ImportError:
+    # FastAPI not installed: only dumps()/to_columnar() are available
+    pass
+
+
+# ============================ BENCHMARK ============================
+
+def benchmark_history_payload(n_tickers: int = 40, days: int = 30, repeat: int = 200) -> List[Dict]:
+    """
+    Payload size and encode time for an all-CAC40 history, row vs columnar layout,
+    json vs orjson, raw vs gzip vs brotli
+    """
+    import random
+    import time
+    from datetime import timedelta
+
+    rnd = random.Random(0)
+    start = date(2025, 1, 1)
+    rows_payload = {}
+    for t in range(n_tickers):
+        price = 50 + 10 * t
+        series = []
+        for d in range(days):
+            price *= 1 + rnd.gauss(0, 0.01)
+            series.append({"date": (start + timedelta(days=d)).isoformat(), "open_price": round(price, 2)})
+        rows_payload[f"T{t}.PA"] = {"symbol": f"T{t}.PA", "open_prices": series}
+    columnar_payload = {k: {"symbol": v["symbol"], "open_prices": to_columnar(v["open_prices"])}
+                        for k, v in rows_payload.items()}
+
+    encoders = [("json-indent2", lambda o: json.dumps(o, indent=2, ensure_ascii=False).encode("utf-8")),
+                ("json-compact", lambda o: json.dumps(o, separators=(",", ":")).encode("utf-8"))]
+    if ORJSON_AVAILABLE:
+        encoders.append(("orjson", dumps))
+
+    results = []
+    for layout, payload in (("rows", rows_payload), ("columnar", columnar_payload)):
+        for name, encode in encoders:
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                body = encode(payload)
+            encode_ms = (time.perf_counter() - t0) / repeat * 1000
+            row = {
+                "layout": layout,
+                "encoder": name,
+                "encode_ms": round(encode_ms, 3),
+                "raw_bytes": len(body),
+                "gzip_bytes": len(gzip.compress(body, compresslevel=6)),
+            }
+            if BROTLI_AVAILABLE:
+                row["brotli_bytes"] = len(brotli.compress(body, quality=5))
+            results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    for row in benchmark_history_payload():
+        print(row)
@@ -7,13 +7,18 @@ from collections import defaultdict
 import json
 
 from app.config import settings
+from app.metrics import instrumented
 from app.models.sql_models import StockPrice, CorrelationMetric
-from app.models.mongo_models import sentiment_collection, MONGODB_AVAILABLE
+from app.storage import NewsSentimentRepository, get_repository
 
 
 class CorrelationService:
     """Service for computing correlations between sentiment and price changes"""
     
+    def __init__(self, repository: NewsSentimentRepository = None):
+        self.repository = repository or get_repository()
+    
+    @instrumented("correlation_service.compute_correlations")
     def compute_correlations(self, db: Session, tickers: List[str] = None, days_back: int = 30) -> Dict:
         """
         Compute correlations between sentiment and price variations
@@ -137,19 +142,11 @@ class CorrelationService:
     def _aggregate_daily_sentiment(self, ticker: str, start_date: datetime, 
                                    end_date: datetime) -> Dict:
         """Aggregate sentiment scores by day"""
-        if not MONGODB_AVAILABLE:
+        if not self.repository.available:
             return {}
         
-        # Query sentiment data from MongoDB
-        query = {
-            "ticker": ticker,
-            "date": {
-                "$gte": start_date,
-                "$lte": end_date
-            }
-        }
-        
-        sentiments = list(sentiment_collection.find(query))
+        # Query sentiment data from storage
+        sentiments = self.repository.find_sentiments(ticker, start_date, end_date)
         
         if not sentiments:
             return {}
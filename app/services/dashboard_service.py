@@ -6,13 +6,18 @@ from collections import Counter
 import json
 
 from app.config import settings
+from app.metrics import instrumented
 from app.models.sql_models import CorrelationMetric
-from app.models.mongo_models import sentiment_collection, MONGODB_AVAILABLE
+from app.storage import NewsSentimentRepository, get_repository
 
 
 class DashboardService:
     """Service for generating dashboard data"""
     
+    def __init__(self, repository: NewsSentimentRepository = None):
+        self.repository = repository or get_repository()
+    
+    @instrumented("dashboard_service.get_dashboard_data")
     def get_dashboard_data(self, db: Session, tickers: List[str] = None, days_back: int = 30) -> Dict:
         """
         Generate dashboard summary data
@@ -104,17 +109,10 @@ class DashboardService:
             for m in metrics
         ]
         
-        # Get sentiment counts from MongoDB
+        # Get sentiment counts from storage
         sentiments = []
-        if MONGODB_AVAILABLE:
-            query = {
-                "ticker": ticker,
-                "date": {
-                    "$gte": start_date,
-                    "$lte": end_date
-                }
-            }
-            sentiments = list(sentiment_collection.find(query))
+        if self.repository.available:
+            sentiments = self.repository.find_sentiments(ticker, start_date, end_date)
         
         # Count bullish vs bearish
         bullish = sum(1 for s in sentiments if s["sentiment_score"] > 0.2)
@@ -0,0 +1,278 @@
+import json
+import os
+import resource
+import time
+from typing import List, Dict
+
+from app.config import settings
+
+# Try to import transformers and torch, but don't fail if not available
+try:
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    import torch
+    TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    TRANSFORMERS_AVAILABLE = False
+
+try:
+    import numpy as np
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+
+LABEL_MAP = {0: "negative", 1: "neutral", 2: "positive"}
+
+
+class TorchBackend:
+    """Plain fp32 PyTorch eager-mode inference"""
+
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        self.model = self._prepare_model(model)
+
+    def _prepare_model(self, model):
+        return model
+
+    def predict_proba(self, texts: List[str], max_length: int = 512) -> List[List[float]]:
+        """Return class probabilities (negative, neutral, positive) for each text"""
+        inputs = self.tokenizer(texts, return_tensors="pt", truncation=True,
+                                max_length=max_length, padding=True)
+        with torch.no_grad():
+            logits = self.model(**inputs).logits
+        return torch.nn.functional.softmax(logits, dim=-1).tolist()
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch inference with dynamic int8 quantization of the Linear layers"""
+
+    name = "torch-int8"
+
+    def _prepare_model(self, model):
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxBackend:
+    """ONNX Runtime inference, exporting the model on first use"""
+
+    name = "onnx"
+
+    def __init__(self, model_name: str, onnx_path: str = None):
+        self.model_name = model_name
+        self.onnx_path = onnx_path or settings.SENTIMENT_ONNX_PATH
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        if not os.path.exists(self.onnx_path):
+            self._export()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self.onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _export(self):
+        """Export the fp32 model to ONNX with dynamic batch and sequence axes"""
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        model.eval()
+        dummy = self.tokenizer(["export"], return_tensors="pt")
+        os.makedirs(os.path.dirname(os.path.abspath(self.onnx_path)), exist_ok=True)
+        dynamic_axes = {"input_ids": {0: "batch", 1: "sequence"},
+                        "attention_mask": {0: "batch", 1: "sequence"},
+                        "logits": {0: "batch"}}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (dummy["input_ids"], dummy["attention_mask"]),
+                self.onnx_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+        print(f"Exported sentiment model to {self.onnx_path}")
+
+    def predict_proba(self, texts: List[str], max_length: int = 512) -> List[List[float]]:
+        """Return class probabilities (negative, neutral, positive) for each text"""
+        inputs = self.tokenizer(texts, return_tensors="np", truncation=True,
+                                max_length=max_length, padding=True)
+        feeds = {name: inputs[name].astype(np.int64) for name in self.input_names}
+        logits = self.session.run(None, feeds)[0]
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return (exp / exp.sum(axis=-1, keepdims=True)).tolist()
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def load_backend(name: str = None, model_name: str = None):
+    """
+    Instantiate an inference backend
+
+    Args:
+        name: Backend name ("torch", "torch-int8" or "onnx", default: settings.SENTIMENT_BACKEND)
+        model_name: Hugging Face model id (default: settings.SENTIMENT_MODEL)
+
+    Returns:
+        Backend instance exposing predict_proba(texts, max_length)
+    """
+    name = name or settings.SENTIMENT_BACKEND
+    model_name = model_name or settings.SENTIMENT_MODEL
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend '{name}' (expected one of {sorted(BACKENDS)})")
+    if not TRANSFORMERS_AVAILABLE:
+        raise RuntimeError("Transformers/Torch not available")
+    if name == OnnxBackend.name and not ONNXRUNTIME_AVAILABLE:
+        raise RuntimeError("onnxruntime not available")
+    return BACKENDS[name](model_name)
+
+
+def probabilities_to_result(probs: List[float]) -> Dict:
+    """Convert class probabilities to the {label, score} format stored in MongoDB"""
+    predicted_class = max(range(len(probs)), key=lambda i: probs[i])
+    confidence = probs[predicted_class]
+    label = LABEL_MAP.get(predicted_class, "neutral")
+    # Convert to score -1 to 1
+    score = (predicted_class - 1) * confidence
+    return {"label": label, "score": score}
+
+
+# ============================ PARITY / BENCHMARK ============================
+
+def load_parity_corpus(path: str = "synthese_cac40_mensuelle.json") -> List[str]:
+    """Build a fixed corpus from the articles stored in the monthly summary file"""
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+
+    corpus = []
+    for item in items:
+        for key in ("article_plus_positif", "article_plus_negatif", "article_random"):
+            article = item.get(key) or {}
+            text = f"{article.get('title') or ''} {article.get('description') or ''}".strip()
+            if text:
+                corpus.append(text)
+    return corpus
+
+
+def _predict_all(backend, corpus: List[str], batch_size: int) -> List[List[float]]:
+    probs = []
+    for i in range(0, len(corpus), batch_size):
+        probs.extend(backend.predict_proba(corpus[i:i + batch_size]))
+    return probs
+
+
+def check_parity(backend, reference, corpus: List[str], tolerance: float = None,
+                 batch_size: int = None) -> Dict:
+    """
+    Compare a backend against the fp32 reference on a fixed corpus
+
+    Returns:
+        Dictionary with label agreement, score differences and pass/fail status
+    """
+    tolerance = settings.SENTIMENT_PARITY_TOLERANCE if tolerance is None else tolerance
+    batch_size = batch_size or settings.SENTIMENT_BATCH_SIZE
+
+    ref = [probabilities_to_result(p) for p in _predict_all(reference, corpus, batch_size)]
+    cand = [probabilities_to_result(p) for p in _predict_all(backend, corpus, batch_size)]
+
+    agree = sum(1 for r, c in zip(ref, cand) if r["label"] == c["label"])
+    diffs = [abs(r["score"] - c["score"]) for r, c in zip(ref, cand)]
+    agreement = agree / len(corpus) if corpus else 1.0
+
+    return {
+        "backend": backend.name,
+        "reference": reference.name,
+        "n_texts": len(corpus),
+        "label_agreement": agreement,
+        "mean_abs_score_diff": sum(diffs) / len(diffs) if diffs else 0.0,
+        "max_abs_score_diff": max(diffs) if diffs else 0.0,
+        "tolerance": tolerance,
+        "passed": agreement >= tolerance
+    }
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def benchmark_backend(name: str, corpus: List[str], batch_size: int = None, repeat: int = 3) -> Dict:
+    """
+    Measure load time, throughput (texts/sec) and peak memory of a backend in the
+    current process. ru_maxrss is a process-wide high-water mark, so the memory
+    figures are only meaningful in a fresh process: see benchmark_backend_isolated.
+    """
+    batch_size = batch_size or settings.SENTIMENT_BATCH_SIZE
+    rss_before = _peak_rss_mb()
+
+    t0 = time.perf_counter()
+    backend = load_backend(name)
+    load_s = time.perf_counter() - t0
+
+    # Warm-up pass so that lazy initialisation is not measured
+    backend.predict_proba(corpus[:batch_size])
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        _predict_all(backend, corpus, batch_size)
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "backend": name,
+        "batch_size": batch_size,
+        "n_texts": len(corpus) * repeat,
+        "load_seconds": round(load_s, 3),
+        "texts_per_second": round(len(corpus) * repeat / elapsed, 2) if elapsed > 0 else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "peak_rss_delta_mb": round(_peak_rss_mb() - rss_before, 1)
+    }
+
+
+def benchmark_backend_isolated(name: str, corpus: List[str], batch_size: int = None, repeat: int = 3) -> Dict:
+    """benchmark_backend in a freshly spawned interpreter, so each backend's peak memory starts from zero"""
+    import multiprocessing as mp
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as executor:
+        return executor.submit(benchmark_backend, name, corpus, batch_size, repeat).result()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    ap = argparse.ArgumentParser(description="Sentiment backend parity check and benchmark")
+    ap.add_argument("--backends", default="torch,torch-int8,onnx",
+                    help="Backends to evaluate, comma separated")
+    ap.add_argument("--corpus", default="synthese_cac40_mensuelle.json")
+    ap.add_argument("--batch-size", type=int, default=settings.SENTIMENT_BATCH_SIZE)
+    ap.add_argument("--tolerance", type=float, default=settings.SENTIMENT_PARITY_TOLERANCE)
+    ap.add_argument("--bench", action="store_true", help="Also run the throughput/memory benchmark")
+    args = ap.parse_args()
+
+    corpus = load_parity_corpus(args.corpus)
+    names = [n.strip() for n in args.backends.split(",") if n.strip()]
+
+    reference = load_backend("torch")
+    report = {"parity": [], "benchmark": []}
+    for name in names:
+        if name == "torch":
+            continue
+        report["parity"].append(check_parity(load_backend(name), reference, corpus,
+                                             args.tolerance, args.batch_size))
+
+    if args.bench:
+        # One fresh process per backend: peak RSS is per process and never goes down
+        for name in names:
+            report["benchmark"].append(benchmark_backend_isolated(name, corpus, args.batch_size))
+
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if all(p["passed"] for p in report["parity"]) else 1)
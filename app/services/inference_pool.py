@@ -0,0 +1,332 @@
+import atexit
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing import connection as mp_connection
+from typing import List, Dict, Tuple
+
+from app.config import settings
+from app import tracing
+from app.metrics import MODEL_BATCH_SIZE, MODEL_INFERENCE_LATENCY
+
+
+def _pin_worker(index: int, threads: int):
+    """Pin a worker to its own block of cores and fix the torch thread count"""
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already set once in this process
+        pass
+
+    if hasattr(os, "sched_setaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+        start = (index * threads) % len(cores)
+        block = {cores[(start + i) % len(cores)] for i in range(threads)}
+        os.sched_setaffinity(0, block)
+
+
+def _worker_main(index: int, backend_name: str, model_name: str, threads: int, conn):
+    """
+    Worker loop: load the model once, then score the batches the pool sends on `conn`
+    until a None sentinel arrives. Messages are (kind, payload): "ready", "load_error",
+    "ok" / "error" ((key, value)). Each worker has its own pipe, written synchronously:
+    a worker killed mid-message cannot hold a lock or a half-written message that
+    would stall the other workers.
+    """
+    try:
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        os.environ["MKL_NUM_THREADS"] = str(threads)
+        _pin_worker(index, threads)
+
+        from app.services.inference_backends import load_backend
+        backend = load_backend(backend_name, model_name)
+    except Exception as e:
+        conn.send(("load_error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            # The pool went away
+            break
+        if task is None:
+            break
+        key, texts, max_length = task
+        try:
+            conn.send(("ok", (key, backend.predict_proba(texts, max_length=max_length))))
+        except Exception as e:
+            conn.send(("error", (key, str(e))))
+
+
+class InferencePool:
+    """
+    Pool of model-holding processes, each fed its batches through its own pipe
+
+    Exposes the same predict_proba(texts, max_length) interface as the in-process
+    backends so SentimentAnalyzer can use either transparently.
+    """
+
+    # predict_proba splits its input into batch_size chunks itself
+    handles_batching = True
+
+    def __init__(self, workers: int = None, threads_per_worker: int = None,
+                 backend_name: str = None, model_name: str = None,
+                 batch_size: int = None, task_timeout: float = 300.0, max_restarts: int = 3,
+                 max_resubmits: int = 2):
+        self.workers = workers or settings.SENTIMENT_WORKERS
+        self.threads_per_worker = threads_per_worker or settings.SENTIMENT_THREADS_PER_WORKER
+        self.backend_name = backend_name or settings.SENTIMENT_BACKEND
+        self.model_name = model_name or settings.SENTIMENT_MODEL
+        self.batch_size = batch_size or settings.SENTIMENT_BATCH_SIZE
+        self.task_timeout = task_timeout
+        # Consecutive deaths of one worker slot (without reaching "ready") before giving up
+        self.max_restarts = max_restarts
+        # Times one batch may be resubmitted after crashing its worker before the call fails
+        self.max_resubmits = max_resubmits
+        self.name = f"pool[{self.workers}x{self.threads_per_worker}]:{self.backend_name}"
+
+        self._ctx = mp.get_context("spawn")
+        # Per worker slot: process, pool end of its pipe, model loaded, consecutive deaths
+        self._processes: List = []
+        self._conns: List = []
+        self._ready: List[bool] = []
+        self._restarts: List[int] = []
+        # slot -> key of the batch that worker is scoring (sent by the pool, so always known)
+        self._inflight: Dict[int, int] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self, wait_ready: bool = True):
+        """Spawn the worker processes (called lazily on first use)"""
+        if self._started:
+            return
+        self._processes, self._conns = [], []
+        for i in range(self.workers):
+            proc, conn = self._spawn(i)
+            self._processes.append(proc)
+            self._conns.append(conn)
+        self._ready = [False] * self.workers
+        self._restarts = [0] * self.workers
+        self._started = True
+        atexit.register(self.shutdown)
+
+        if wait_ready:
+            deadline = time.monotonic() + self.task_timeout
+            try:
+                while not all(self._ready):
+                    self._check_workers()
+                    messages = self._poll(0.2)
+                    if not messages and time.monotonic() > deadline:
+                        raise TimeoutError("Sentiment worker pool did not start in time")
+                    for slot, kind, payload in messages:
+                        self._handle_control(slot, kind, payload)
+            except Exception:
+                self.shutdown()
+                raise
+        print(f"Started sentiment worker pool: {self.workers} workers x {self.threads_per_worker} threads")
+
+    def _spawn(self, index: int) -> Tuple:
+        conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self.backend_name, self.model_name, self.threads_per_worker, child_conn),
+            daemon=True
+        )
+        proc.start()
+        # Only the worker keeps its end open, so a dead worker reads as EOF here
+        child_conn.close()
+        return proc, conn
+
+    def _check_workers(self) -> List[int]:
+        """
+        Respawn dead workers and return the keys of the batches they were scoring.
+        Raises RuntimeError once a slot died max_restarts times in a row without loading.
+        """
+        lost = []
+        for i, proc in enumerate(self._processes):
+            if proc.is_alive():
+                continue
+            key = self._inflight.pop(i, None)
+            if key is not None:
+                lost.append(key)
+            self._conns[i].close()
+            self._restarts[i] += 1
+            if self._restarts[i] > self.max_restarts:
+                raise RuntimeError(f"Sentiment worker {i} died {self._restarts[i]} times in a row "
+                                   f"(last exit code {proc.exitcode}), giving up")
+            print(f"Sentiment worker {i} (pid {proc.pid}) died with exit code {proc.exitcode}, restarting")
+            self._processes[i], self._conns[i] = self._spawn(i)
+            self._ready[i] = False
+        return lost
+
+    def _poll(self, timeout: float) -> List[Tuple[int, str, object]]:
+        """(slot, kind, payload) of the messages available within timeout"""
+        messages = []
+        for conn in mp_connection.wait(self._conns, timeout):
+            slot = self._conns.index(conn)
+            try:
+                kind, payload = conn.recv()
+            except (EOFError, OSError):
+                # Worker gone, possibly mid-message: let it finish exiting for _check_workers
+                self._processes[slot].join(timeout=1.0)
+                continue
+            messages.append((slot, kind, payload))
+        return messages
+
+    def _handle_control(self, slot: int, kind: str, payload) -> None:
+        """Bookkeeping for "ready" / "load_error" messages"""
+        if kind == "load_error":
+            # Respawning cannot fix a model that does not load
+            raise RuntimeError(f"Sentiment worker failed to load the model: {payload}")
+        if kind == "ready":
+            self._ready[slot] = True
+            self._restarts[slot] = 0
+
+    def predict_proba(self, texts: List[str], max_length: int = 512) -> List[List[float]]:
+        """Split texts into batches, hand them to idle workers and reassemble the results in order"""
+        if not texts:
+            return []
+        with self._lock, MODEL_INFERENCE_LATENCY.time(backend=self.name), \
+                tracing.span("model.predict", backend=self.name, texts=len(texts)):
+            self.start()
+
+            pending: Dict[int, List[str]] = {}
+            for i in range(0, len(texts), self.batch_size):
+                key = next(self._counter)
+                pending[key] = texts[i:i + self.batch_size]
+                MODEL_BATCH_SIZE.observe(len(pending[key]), backend=self.name)
+
+            order = list(pending)
+            todo = deque(order)
+            results: Dict[int, List[List[float]]] = {}
+            resubmits: Dict[int, int] = {}
+            deadline = time.monotonic() + self.task_timeout
+
+            def resubmit(key: int):
+                resubmits[key] = resubmits.get(key, 0) + 1
+                if resubmits[key] > self.max_resubmits:
+                    raise RuntimeError(f"Sentiment batch {order.index(key)} of {len(order)} "
+                                       f"({len(pending[key])} texts) crashed a worker "
+                                       f"{resubmits[key]} times, giving up")
+                todo.appendleft(key)
+
+            while len(results) < len(order):
+                # Checked every iteration: other workers' results must not hide a crash
+                for key in self._check_workers():
+                    if key in pending and key not in results:
+                        resubmit(key)
+
+                for i, conn in enumerate(self._conns):
+                    if todo and self._ready[i] and i not in self._inflight:
+                        key = todo.popleft()
+                        try:
+                            conn.send((key, pending[key], max_length))
+                        except OSError:
+                            # Died since the last check: the next one respawns it
+                            todo.appendleft(key)
+                            continue
+                        self._inflight[i] = key
+
+                messages = self._poll(0.2)
+                if not messages and time.monotonic() > deadline:
+                    raise TimeoutError("Sentiment worker pool did not answer in time")
+                for slot, kind, payload in messages:
+                    if kind not in ("ok", "error"):
+                        self._handle_control(slot, kind, payload)
+                        continue
+                    key, value = payload
+                    self._inflight.pop(slot, None)
+                    if key not in pending or key in results:
+                        # Result of an earlier, aborted call
+                        continue
+                    if kind == "error":
+                        raise RuntimeError(f"Sentiment worker error: {value}")
+                    results[key] = value
+                    deadline = time.monotonic() + self.task_timeout
+
+            return [probs for key in order for probs in results[key]]
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stop the workers, terminating any that do not exit cleanly"""
+        if not self._started:
+            return
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for proc in self._processes:
+            proc.join(timeout=timeout)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+        for conn in self._conns:
+            conn.close()
+        self._processes, self._conns, self._ready = [], [], []
+        self._inflight.clear()
+        self._started = False
+
+
+# ============================ BENCHMARK ============================
+
+def benchmark_pool(corpus: List[str], workers: List[int], threads: List[int],
+                   backend_name: str = None, batch_size: int = None, repeat: int = 3) -> List[Dict]:
+    """Sweep workers x threads-per-worker and report throughput for each configuration"""
+    rows = []
+    for n_workers in workers:
+        for n_threads in threads:
+            pool = InferencePool(workers=n_workers, threads_per_worker=n_threads,
+                                 backend_name=backend_name, batch_size=batch_size)
+            try:
+                pool.start()
+                pool.predict_proba(corpus[:pool.batch_size])  # warm-up
+                t0 = time.perf_counter()
+                for _ in range(repeat):
+                    pool.predict_proba(corpus)
+                elapsed = time.perf_counter() - t0
+            finally:
+                pool.shutdown()
+            rows.append({
+                "workers": n_workers,
+                "threads_per_worker": n_threads,
+                "cores_used": n_workers * n_threads,
+                "texts_per_second": round(len(corpus) * repeat / elapsed, 2)
+            })
+            print(rows[-1])
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from app.services.inference_backends import load_parity_corpus
+
+    ap = argparse.ArgumentParser(description="Benchmark the sentiment worker pool (workers x threads sweep)")
+    ap.add_argument("--workers", default="1,2,4,8,16")
+    ap.add_argument("--threads", default="1,2,4")
+    ap.add_argument("--backend", default=settings.SENTIMENT_BACKEND)
+    ap.add_argument("--batch-size", type=int, default=settings.SENTIMENT_BATCH_SIZE)
+    ap.add_argument("--corpus", default="synthese_cac40_mensuelle.json")
+    ap.add_argument("--copies", type=int, default=10, help="Repeat the corpus to get a larger workload")
+    args = ap.parse_args()
+
+    corpus = load_parity_corpus(args.corpus) * args.copies
+    max_cores = os.cpu_count() or 1
+    sweep = benchmark_pool(
+        corpus,
+        workers=[int(w) for w in args.workers.split(",")],
+        threads=[int(t) for t in args.threads.split(",")],
+        backend_name=args.backend,
+        batch_size=args.batch_size
+    )
+    print(json.dumps({"cpu_count": max_cores, "results": sweep}, indent=2))
@@ -4,15 +4,19 @@ from typing import List, Dict
 import re
 
 from app.config import settings
-from app.models.mongo_models import news_collection, NewsDocument, MONGODB_AVAILABLE
+from app.metrics import EXTERNAL_CALL_ERRORS, instrumented, observe_call
+from app.tickers import company_name
+from app.storage import NewsSentimentRepository, get_repository
 
 
 class NewsScraper:
     """Service for scraping news about CAC40 stocks"""
     
-    def __init__(self):
+    def __init__(self, repository: NewsSentimentRepository = None):
         self.api_key = settings.NEWS_API_KEY
+        self.repository = repository or get_repository()
     
+    @instrumented("news_scraper.scrape_news")
     def scrape_news(self, tickers: List[str] = None, days_back: int = 7) -> Dict:
         """
         Scrape news for specified tickers
@@ -33,38 +37,27 @@ class NewsScraper:
             "articles_by_ticker": {}
         }
         
-        from_date = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
-        
         for ticker in tickers:
-            # Extract company name from ticker (simplified)
-            company_name = self._ticker_to_company_name(ticker)
-            articles = self._fetch_news_for_company(company_name, ticker, from_date)
+            articles = self.fetch_news(ticker, days_back)
             
             results["articles_by_ticker"][ticker] = len(articles)
             results["total_articles"] += len(articles)
             results["tickers_processed"].append(ticker)
             
-            # Store articles in MongoDB
-            if articles and MONGODB_AVAILABLE:
-                news_collection.insert_many(articles)
+            # Store articles
+            if articles:
+                self.repository.insert_news(articles)
         
         return results
     
+    def fetch_news(self, ticker: str, days_back: int = 7) -> List[Dict]:
+        """News documents published for a ticker in the last days_back days, without storing them"""
+        from_date = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
+        return self._fetch_news_for_company(self._ticker_to_company_name(ticker), ticker, from_date)
+    
     def _ticker_to_company_name(self, ticker: str) -> str:
         """Convert ticker to company name for search"""
-        # Simplified mapping for major CAC40 companies
-        ticker_map = {
-            "AIR.PA": "Airbus",
-            "BNP.PA": "BNP Paribas",
-            "MC.PA": "LVMH",
-            "OR.PA": "L'Oréal",
-            "SAN.PA": "Sanofi",
-            "TTE.PA": "TotalEnergies",
-            "CA.PA": "Carrefour",
-            "RNO.PA": "Renault",
-            "CS.PA": "AXA"
-        }
-        return ticker_map.get(ticker, ticker.replace(".PA", "").replace(".AS", ""))
+        return company_name(ticker)
     
     def _fetch_news_for_company(self, company_name: str, ticker: str, from_date: str) -> List[Dict]:
         """Fetch news from NewsAPI or use mock data"""
@@ -82,11 +75,14 @@ class NewsScraper:
                     "apiKey": self.api_key,
                     "pageSize": 10
                 }
-                response = requests.get(url, params=params, timeout=10)
-                if response.status_code == 200:
+                with observe_call("newsapi"):
+                    response = requests.get(url, params=params, timeout=10)
+                if response.status_code != 200:
+                    EXTERNAL_CALL_ERRORS.inc(service="newsapi")
+                else:
                     data = response.json()
                     for article in data.get("articles", []):
-                        articles.append(NewsDocument.create(
+                        articles.append(self.repository.new_news_document(
                             ticker=ticker,
                             title=article.get("title", ""),
                             content=article.get("description", "") or article.get("content", ""),
@@ -122,7 +118,7 @@ class NewsScraper:
         
         articles = []
         for i, mock in enumerate(mock_articles):
-            articles.append(NewsDocument.create(
+            articles.append(self.repository.new_news_document(
                 ticker=ticker,
                 title=mock["title"],
                 content=mock["content"],
@@ -0,0 +1,332 @@
+"""
+Streaming pipeline: news ingest -> sentiment scoring -> daily rollup
+
+Three asyncio stages connected by bounded queues, running concurrently:
+
+- ingest: polls NewsScraper.fetch_news per ticker, drops articles already seen,
+  stores the new ones and queues them (blocks when scoring falls behind)
+- score: takes micro-batches (up to SENTIMENT_BATCH_SIZE articles or
+  PIPELINE_BATCH_WAIT_MS after the first one), scores them with
+  SentimentAnalyzer.score_articles and stores the sentiment documents
+- rollup: folds scores into per (ticker, day) sums and merges them into the daily
+  sentiment file read by sentiment_price_corr_json every PIPELINE_FLUSH_SECONDS
+
+Blocking work (HTTP, model, storage) runs in worker threads. stop(drain=True) lets
+queued articles finish; cancellation stops at once but still writes the rollup
+(articles still queued at that point stay stored, unscored, for /sentiment/analyze).
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app import tracing
+from app.config import settings
+from app.metrics import PIPELINE_ITEMS, PIPELINE_LATENCY
+from app.services.news_scraper import NewsScraper
+from app.services.sentiment_analyzer import SentimentAnalyzer
+from app.storage import NewsSentimentRepository, get_repository
+
+# End-of-stream marker passed down the queues on a graceful stop
+_DONE = object()
+
+
+class DailySentimentFile:
+    """
+    Daily sentiment JSON as read by sentiment_price_corr_json
+    ({ticker, published_date, sentiment_score_mean, nb_articles} records).
+    merge() folds per-day score sums and counts into it, replace() overwrites whole days;
+    both replace the file atomically.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or settings.DAILY_SENTIMENT_PATH)
+
+    def _load(self):
+        payload = []
+        if self.path.exists():
+            try:
+                payload = json.loads(self.path.read_text(encoding="utf-8"))
+            except ValueError:
+                payload = []
+        items = payload.get("data", []) if isinstance(payload, dict) else payload
+        return payload, items
+
+    def _save(self, payload, items: List[Dict]):
+        items.sort(key=lambda r: (str(r.get("ticker")), str(r.get("published_date"))))
+        if isinstance(payload, dict):
+            payload["data"] = items
+        else:
+            payload = items
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def _update(self, values: Dict[Tuple[str, str], List[float]], accumulate: bool) -> int:
+        payload, items = self._load()
+        index = {(r.get("ticker"), r.get("published_date")): r for r in items}
+
+        for (ticker, day), (total, count) in values.items():
+            record = index.get((ticker, day))
+            if record is None:
+                record = index[(ticker, day)] = {"ticker": ticker, "published_date": day,
+                                                 "sentiment_score_mean": 0.0, "nb_articles": 0}
+                items.append(record)
+            previous = int(record.get("nb_articles") or 0) if accumulate else 0
+            mean = float(record.get("sentiment_score_mean") or 0.0)
+            record["nb_articles"] = previous + int(count)
+            record["sentiment_score_mean"] = round((mean * previous + total) / record["nb_articles"], 6)
+
+        self._save(payload, items)
+        return len(values)
+
+    def merge(self, deltas: Dict[Tuple[str, str], List[float]]) -> int:
+        """Add {(ticker, day): [score sum, count]} to the existing days"""
+        return self._update(deltas, accumulate=True)
+
+    def replace(self, days: Dict[Tuple[str, str], List[float]]) -> int:
+        """Overwrite {(ticker, day): [score sum, count]} days with these totals"""
+        return self._update(days, accumulate=False)
+
+
+class StreamingPipeline:
+    """One run of the ingest -> score -> rollup pipeline (create a new instance to run again)"""
+
+    def __init__(self, tickers: List[str] = None, repository: NewsSentimentRepository = None,
+                 scraper: NewsScraper = None, analyzer: SentimentAnalyzer = None, sink: DailySentimentFile = None,
+                 days_back: int = 1, poll_seconds: float = None, queue_size: int = None,
+                 batch_size: int = None, batch_wait_ms: int = None, flush_seconds: float = None):
+        self.tickers = tickers or settings.CAC40_TICKERS[:5]
+        self.repository = repository or get_repository()
+        self.scraper = scraper or NewsScraper(repository=self.repository)
+        self.analyzer = analyzer or SentimentAnalyzer(repository=self.repository)
+        self.sink = sink or DailySentimentFile()
+        self.days_back = days_back
+        self.poll_seconds = settings.PIPELINE_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.batch_size = batch_size or settings.SENTIMENT_BATCH_SIZE
+        self.batch_wait = (settings.PIPELINE_BATCH_WAIT_MS if batch_wait_ms is None else batch_wait_ms) / 1000
+        self.flush_seconds = settings.PIPELINE_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+
+        queue_size = queue_size or settings.PIPELINE_QUEUE_SIZE
+        self.articles: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.scored: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._seen: Dict[str, set] = {}
+        self.counts = {"ingested": 0, "duplicates": 0, "scored": 0, "batches": 0, "flushes": 0, "polls": 0}
+        self.started_at: Optional[datetime] = None
+        self.last_flush_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+
+    # ---- lifecycle ----
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, once: bool = False) -> asyncio.Task:
+        """Run in the background on the current event loop"""
+        if self._task is not None:
+            raise RuntimeError("Pipeline already started")
+        self._task = asyncio.create_task(self.run(once))
+        return self._task
+
+    async def stop(self, drain: bool = True, timeout: float = 30.0):
+        """Stop ingesting; with drain, queued articles are scored and rolled up first"""
+        if self._task is None or self._task.done():
+            return
+        self._stopping.set()
+        if drain:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout)
+                return
+            except asyncio.TimeoutError:
+                pass
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    async def run(self, once: bool = False):
+        """Run the stages until stop(), or until one ingest pass is fully processed when once=True"""
+        self.started_at = datetime.utcnow()
+        tasks = [asyncio.create_task(self._ingest(once)), asyncio.create_task(self._score()),
+                 asyncio.create_task(self._rollup())]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException as e:
+            # A failing stage or a cancellation stops the others; the rollup still writes what it holds
+            if not isinstance(e, asyncio.CancelledError):
+                self.error = f"{type(e).__name__}: {e}"
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    # ---- stages ----
+
+    def _fetch_fresh(self, ticker: str) -> List[Dict]:
+        seen = self._seen.get(ticker)
+        if seen is None:
+            # Articles stored by earlier runs are not scored again
+            seen = self._seen[ticker] = {self._article_key(a) for a in self.repository.find_news(ticker, limit=1000)}
+        fresh = []
+        for article in self.scraper.fetch_news(ticker, self.days_back):
+            key = self._article_key(article)
+            if key in seen:
+                self.counts["duplicates"] += 1
+                continue
+            seen.add(key)
+            fresh.append(article)
+        if fresh:
+            self.repository.insert_news(fresh)
+        return fresh
+
+    @staticmethod
+    def _article_key(article: Dict) -> str:
+        return article.get("url") or f"{article.get('title')}|{article.get('published_at')}"
+
+    async def submit(self, articles: List[Dict]):
+        """Store and queue articles pushed by a caller instead of polled (waits if the queue is full)"""
+        await asyncio.to_thread(self.repository.insert_news, articles)
+        await self._enqueue(articles)
+
+    async def _enqueue(self, articles: List[Dict]):
+        now = time.monotonic()
+        for article in articles:
+            await self.articles.put((now, article))
+        self.counts["ingested"] += len(articles)
+        PIPELINE_ITEMS.inc(len(articles), stage="ingest")
+
+    async def _ingest(self, once: bool):
+        while not self._stopping.is_set():
+            for ticker in self.tickers:
+                if self._stopping.is_set():
+                    break
+                try:
+                    fresh = await asyncio.to_thread(self._fetch_fresh, ticker)
+                except Exception as e:
+                    print(f"Pipeline ingest failed for {ticker}: {e}")
+                    continue
+                await self._enqueue(fresh)
+            self.counts["polls"] += 1
+            if once:
+                break
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+        await self.articles.put(_DONE)
+
+    def _score_batch(self, articles: List[Dict]) -> List[Dict]:
+        with tracing.span("pipeline.score", batch_size=len(articles)):
+            documents = self.analyzer.score_articles(articles)
+            self.repository.insert_sentiments(documents)
+        return documents
+
+    async def _score(self):
+        loop = asyncio.get_running_loop()
+        finished = False
+        while not finished:
+            item = await self.articles.get()
+            if item is _DONE:
+                break
+            batch = [item]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.articles.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is _DONE:
+                    finished = True
+                    break
+                batch.append(item)
+
+            documents = await asyncio.to_thread(self._score_batch, [article for _, article in batch])
+            self.counts["batches"] += 1
+            self.counts["scored"] += len(documents)
+            PIPELINE_ITEMS.inc(len(documents), stage="score")
+            for (ingested_at, _), document in zip(batch, documents):
+                await self.scored.put((ingested_at, document))
+        await self.scored.put(_DONE)
+
+    def _flush(self, pending: Dict[Tuple[str, str], List[float]], ingested: List[float]):
+        with tracing.span("pipeline.rollup", days=len(pending), articles=len(ingested)):
+            self.sink.merge(pending)
+        now = time.monotonic()
+        for t0 in ingested:
+            PIPELINE_LATENCY.observe(now - t0)
+        PIPELINE_ITEMS.inc(len(ingested), stage="rollup")
+        self.counts["flushes"] += 1
+        self.last_flush_at = datetime.utcnow()
+
+    async def _rollup(self):
+        loop = asyncio.get_running_loop()
+        pending: Dict[Tuple[str, str], List[float]] = {}
+        ingested: List[float] = []
+        last_flush = loop.time()
+        try:
+            while True:
+                timeout = max(0.0, last_flush + self.flush_seconds - loop.time()) if pending else None
+                try:
+                    item = await asyncio.wait_for(self.scored.get(), timeout)
+                except asyncio.TimeoutError:
+                    item = None
+                if item is _DONE:
+                    break
+                if item is not None:
+                    ingested_at, document = item
+                    date = document.get("date")
+                    day = date.date().isoformat() if isinstance(date, datetime) else str(date)[:10]
+                    total = pending.setdefault((document["ticker"], day), [0.0, 0])
+                    total[0] += float(document.get("sentiment_score") or 0.0)
+                    total[1] += 1
+                    ingested.append(ingested_at)
+                if pending and loop.time() - last_flush >= self.flush_seconds:
+                    batch, times = pending, ingested
+                    pending, ingested = {}, []
+                    await asyncio.to_thread(self._flush, batch, times)
+                    last_flush = loop.time()
+        finally:
+            if pending:
+                self._flush(pending, ingested)
+
+    def status(self) -> Dict:
+        return {
+            "running": self.running,
+            "tickers": self.tickers,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "last_flush_at": self.last_flush_at.isoformat() if self.last_flush_at else None,
+            "queued": {"articles": self.articles.qsize(), "scored": self.scored.qsize()},
+            "counts": dict(self.counts),
+            "daily_sentiment_path": str(self.sink.path),
+            "error": self.error,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Run the streaming news -> sentiment -> daily rollup pipeline")
+    ap.add_argument("--tickers", nargs="*", default=None)
+    ap.add_argument("--days-back", type=int, default=1)
+    ap.add_argument("--poll-seconds", type=float, default=settings.PIPELINE_POLL_SECONDS)
+    ap.add_argument("--once", action="store_true", help="One ingest pass, then drain and exit")
+    args = ap.parse_args()
+
+    async def main():
+        pipeline = StreamingPipeline(tickers=args.tickers, days_back=args.days_back, poll_seconds=args.poll_seconds)
+        try:
+            await pipeline.run(once=args.once)
+        finally:
+            print(json.dumps(pipeline.status(), indent=2))
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -4,12 +4,14 @@ from typing import List, Dict
 from sqlalchemy.orm import Session
 
 from app.config import settings
+from app.metrics import instrumented, observe_call
 from app.models.sql_models import StockPrice
 
 
 class PriceScraper:
     """Service for scraping stock price data"""
     
+    @instrumented("price_scraper.scrape_prices")
     def scrape_prices(self, db: Session, tickers: List[str] = None, days_back: int = 30) -> Dict:
         """
         Scrape price data for specified tickers
@@ -38,7 +40,8 @@ class PriceScraper:
             try:
                 # Fetch data from Yahoo Finance
                 stock = yf.Ticker(ticker)
-                hist = stock.history(start=start_date, end=end_date)
+                with observe_call("yfinance"):
+                    hist = stock.history(start=start_date, end=end_date)
                 
                 if hist.empty:
                     print(f"No data found for {ticker}")
@@ -0,0 +1,172 @@
+import json
+import statistics
+import time
+from collections import Counter
+from typing import List, Dict, Tuple
+
+from app.config import settings
+from app import tracing
+from app.metrics import MODEL_BATCH_SIZE, MODEL_INFERENCE_LATENCY
+from app.services.inference_backends import probabilities_to_result
+
+SCORING_MODES = ("full", "headline", "budget")
+MODEL_MAX_LENGTH = 512
+
+
+class ScoringPolicy:
+    """Decides which part of an article is scored and how many tokens the model sees"""
+
+    def __init__(self, mode: str = None, token_budget: int = None, sort_by_length: bool = None):
+        self.mode = mode or settings.SENTIMENT_SCORING_MODE
+        if self.mode not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode '{self.mode}' (expected one of {SCORING_MODES})")
+        self.token_budget = settings.SENTIMENT_TOKEN_BUDGET if token_budget is None else token_budget
+        if self.token_budget <= 0:
+            raise ValueError(f"token_budget must be a positive number of tokens, got {self.token_budget}")
+        self.sort_by_length = settings.SENTIMENT_SORT_BY_LENGTH if sort_by_length is None else sort_by_length
+
+    @property
+    def max_length(self) -> int:
+        """Tokenizer truncation length for this policy"""
+        if self.mode == "full":
+            return MODEL_MAX_LENGTH
+        return min(self.token_budget, MODEL_MAX_LENGTH)
+
+    def build_text(self, article: Dict) -> str:
+        """Text fed to the model for an article (missing descriptions are skipped)"""
+        title = article.get("title") or ""
+        if self.mode == "headline":
+            return title
+        content = article.get("content") or article.get("description") or ""
+        return f"{title} {content}".strip()
+
+    def describe(self) -> str:
+        if self.mode == "full":
+            return "full"
+        return f"{self.mode}:{self.max_length}"
+
+
+def predict_in_batches(backend, texts: List[str], max_length: int, batch_size: int,
+                       sort_by_length: bool = True) -> List[List[float]]:
+    """
+    Run the backend over texts batch by batch and return probabilities in input order
+
+    With sort_by_length, texts of similar length are batched together so padding is
+    minimal (character length is used as a cheap proxy for token count).
+    """
+    order = list(range(len(texts)))
+    if sort_by_length:
+        order.sort(key=lambda i: len(texts[i]))
+
+    probs: List[List[float]] = [None] * len(texts)
+    if getattr(backend, "handles_batching", False):
+        # Worker pool: hand over the whole sorted list so batches are dispatched concurrently
+        for i, p in zip(order, backend.predict_proba([texts[i] for i in order], max_length=max_length)):
+            probs[i] = p
+        return probs
+
+    backend_name = getattr(backend, "name", type(backend).__name__)
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        MODEL_BATCH_SIZE.observe(len(idx), backend=backend_name)
+        with MODEL_INFERENCE_LATENCY.time(backend=backend_name), \
+                tracing.span("model.predict", backend=backend_name, batch_size=len(idx)):
+            batch_probs = backend.predict_proba([texts[i] for i in idx], max_length=max_length)
+        for i, p in zip(idx, batch_probs):
+            probs[i] = p
+    return probs
+
+
+def run_policy(backend, articles: List[Dict], policy: ScoringPolicy,
+               batch_size: int = None) -> Tuple[List[Dict], float]:
+    """Score articles under a policy, returning ({label, score} results, elapsed seconds)"""
+    batch_size = batch_size or settings.SENTIMENT_BATCH_SIZE
+    texts = [policy.build_text(a) for a in articles]
+    t0 = time.perf_counter()
+    probs = predict_in_batches(backend, texts, policy.max_length, batch_size, policy.sort_by_length)
+    elapsed = time.perf_counter() - t0
+    return [probabilities_to_result(p) for p in probs], elapsed
+
+
+def _distribution(results: List[Dict]) -> Dict:
+    scores = [r["score"] for r in results]
+    labels = Counter(r["label"] for r in results)
+    n = len(results) or 1
+    return {
+        "mean_score": statistics.fmean(scores) if scores else 0.0,
+        "std_score": statistics.pstdev(scores) if scores else 0.0,
+        "label_share": {label: labels.get(label, 0) / n for label in ("negative", "neutral", "positive")}
+    }
+
+
+def compare_policies(backend, articles: List[Dict], candidates: List[ScoringPolicy],
+                     batch_size: int = None) -> Dict:
+    """
+    Report how the score distribution and throughput shift versus the full-text policy
+
+    Returns:
+        Dictionary with the baseline distribution and, per candidate policy, its
+        distribution, label agreement, mean absolute score shift and speed-up
+    """
+    baseline_policy = ScoringPolicy(mode="full", sort_by_length=False)
+    baseline, baseline_s = run_policy(backend, articles, baseline_policy, batch_size)
+
+    report = {
+        "n_articles": len(articles),
+        "baseline": {
+            "policy": baseline_policy.describe(),
+            "seconds": round(baseline_s, 3),
+            **_distribution(baseline)
+        },
+        "candidates": []
+    }
+
+    for policy in candidates:
+        results, seconds = run_policy(backend, articles, policy, batch_size)
+        agree = sum(1 for b, c in zip(baseline, results) if b["label"] == c["label"])
+        shifts = [c["score"] - b["score"] for b, c in zip(baseline, results)]
+        report["candidates"].append({
+            "policy": policy.describe(),
+            "sort_by_length": policy.sort_by_length,
+            "seconds": round(seconds, 3),
+            "speedup": round(baseline_s / seconds, 2) if seconds > 0 else None,
+            "label_agreement": agree / len(articles) if articles else 1.0,
+            "mean_score_shift": statistics.fmean(shifts) if shifts else 0.0,
+            "mean_abs_score_shift": statistics.fmean(abs(s) for s in shifts) if shifts else 0.0,
+            **_distribution(results)
+        })
+    return report
+
+
+def load_summary_articles(path: str = "synthese_cac40_mensuelle.json") -> List[Dict]:
+    """Articles (title + nullable description) from the monthly summary file"""
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    articles = []
+    for item in items:
+        for key in ("article_plus_positif", "article_plus_negatif", "article_random"):
+            article = item.get(key)
+            if article and article.get("title"):
+                articles.append({"title": article["title"], "content": article.get("description")})
+    return articles
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.services.inference_backends import load_backend
+
+    ap = argparse.ArgumentParser(description="Compare sentiment scoring policies against full-text scoring")
+    ap.add_argument("--backend", default=settings.SENTIMENT_BACKEND)
+    ap.add_argument("--corpus", default="synthese_cac40_mensuelle.json")
+    ap.add_argument("--budgets", default="32,64,128", help="Token budgets to evaluate")
+    ap.add_argument("--batch-size", type=int, default=settings.SENTIMENT_BATCH_SIZE)
+    args = ap.parse_args()
+
+    candidates = [ScoringPolicy(mode="full", sort_by_length=True),
+                  ScoringPolicy(mode="headline", token_budget=64)]
+    candidates += [ScoringPolicy(mode="budget", token_budget=int(b)) for b in args.budgets.split(",")]
+
+    report = compare_policies(load_backend(args.backend), load_summary_articles(args.corpus),
+                              candidates, args.batch_size)
+    print(json.dumps(report, indent=2))
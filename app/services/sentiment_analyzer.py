@@ -1,42 +1,53 @@
 from datetime import datetime
 from typing import List, Dict
-import re
 from collections import Counter
 
 from app.config import settings
-from app.models.mongo_models import news_collection, sentiment_collection, SentimentDocument, MONGODB_AVAILABLE
+from app.metrics import ARTICLES_SCORED, instrumented
+from app.storage import NewsSentimentRepository, get_repository
+from app.services.inference_backends import load_backend, probabilities_to_result, TRANSFORMERS_AVAILABLE
+from app.services.inference_pool import InferencePool
+from app.services.scoring_policy import ScoringPolicy, predict_in_batches
+from app.services.text_processing import tokenize, extract_keywords, lexicon_sentiment, process_articles
 
-# Try to import transformers and torch, but don't fail if not available
-try:
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification
-    import torch
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
+if not TRANSFORMERS_AVAILABLE:
     print("Transformers/Torch not available, using fallback sentiment analysis")
 
 
 class SentimentAnalyzer:
     """Service for analyzing sentiment of text using pretrained models"""
     
-    def __init__(self):
+    def __init__(self, repository: NewsSentimentRepository = None):
+        self.repository = repository or get_repository()
         self.model_name = settings.SENTIMENT_MODEL
-        self.tokenizer = None
-        self.model = None
+        self.backend_name = settings.SENTIMENT_BACKEND
+        self.batch_size = settings.SENTIMENT_BATCH_SIZE
+        self.policy = ScoringPolicy()
+        self.backend = None
         if TRANSFORMERS_AVAILABLE:
             self._load_model()
     
     def _load_model(self):
-        """Load the pretrained sentiment analysis model"""
+        """Load the pretrained sentiment analysis model with the configured backend"""
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
-            self.model.eval()
-            print(f"Loaded sentiment model: {self.model_name}")
+            if settings.SENTIMENT_WORKERS > 0:
+                # Model is loaded by the worker processes on first use
+                self.backend = InferencePool(backend_name=self.backend_name, model_name=self.model_name,
+                                             batch_size=self.batch_size)
+                print(f"Using sentiment worker pool: {self.backend.name}")
+                return
+            self.backend = load_backend(self.backend_name, self.model_name)
+            print(f"Loaded sentiment model: {self.model_name} ({self.backend_name} backend)")
         except Exception as e:
             print(f"Error loading model: {e}")
             print("Will use fallback sentiment analysis")
     
+    def close(self):
+        """Release inference resources (stops the worker pool if one is running)"""
+        if isinstance(self.backend, InferencePool):
+            self.backend.shutdown()
+    
+    @instrumented("sentiment_analyzer.analyze_sentiment")
     def analyze_sentiment(self, tickers: List[str] = None, limit: int = 100) -> Dict:
         """
         Analyze sentiment for news articles
@@ -58,41 +69,21 @@ class SentimentAnalyzer:
         }
         
         for ticker in tickers:
-            # Fetch unanalyzed news from MongoDB
-            if not MONGODB_AVAILABLE:
-                print(f"MongoDB not available, skipping {ticker}")
+            # Fetch news from storage
+            if not self.repository.available:
+                print(f"Storage backend '{self.repository.name}' not available, skipping {ticker}")
                 continue
             
-            query = {"ticker": ticker}
-            articles = list(news_collection.find(query).limit(limit))
+            articles = self.repository.find_news(ticker, limit=limit)
             
             if not articles:
                 continue
             
-            ticker_sentiments = []
+            sentiment_docs = self.score_articles(articles)
+            ticker_sentiments = [doc["sentiment_label"] for doc in sentiment_docs]
             
-            for article in articles:
-                # Analyze sentiment
-                text = f"{article.get('title', '')} {article.get('content', '')}"
-                sentiment_result = self._analyze_text(text)
-                
-                # Extract keywords
-                keywords = self._extract_keywords(text)
-                
-                # Create sentiment document
-                sentiment_doc = SentimentDocument.create(
-                    ticker=ticker,
-                    text=text[:500],  # Store first 500 chars
-                    sentiment_label=sentiment_result["label"],
-                    sentiment_score=sentiment_result["score"],
-                    source=article.get("source", "Unknown"),
-                    date=article.get("published_at", datetime.utcnow()),
-                    keywords=keywords
-                )
-                
-                # Store in MongoDB
-                sentiment_collection.insert_one(sentiment_doc)
-                ticker_sentiments.append(sentiment_result["label"])
+            # Store all of the ticker's results in one bulk write
+            self.repository.insert_sentiments(sentiment_docs)
             
             # Summarize sentiments for this ticker
             sentiment_counts = Counter(ticker_sentiments)
@@ -107,75 +98,65 @@ class SentimentAnalyzer:
         
         return results
     
+    def score_articles(self, articles: List[Dict]) -> List[Dict]:
+        """
+        Score news documents in batches and return one sentiment document per article
+        (not stored), for the article's own ticker
+        """
+        if not articles:
+            return []
+        
+        # Analyze sentiment in batches, scoring the part of each article selected by the policy
+        texts = [f"{article.get('title') or ''} {article.get('content') or ''}".strip() for article in articles]
+        scoring_texts = [self.policy.build_text(article) for article in articles]
+        
+        # Tokenize each article once for both keyword extraction and the lexicon fallback
+        processed = process_articles(texts)
+        sentiment_results = self._analyze_batch(
+            scoring_texts,
+            max_length=self.policy.max_length,
+            fallback_results=[p["sentiment"] for p in processed]
+        )
+        
+        return [
+            self.repository.new_sentiment_document(
+                ticker=article["ticker"],
+                text=text[:500],  # Store first 500 chars
+                sentiment_label=sentiment_result["label"],
+                sentiment_score=sentiment_result["score"],
+                source=article.get("source", "Unknown"),
+                date=article.get("published_at", datetime.utcnow()),
+                keywords=text_info["keywords"]
+            )
+            for article, text, sentiment_result, text_info in zip(articles, texts, sentiment_results, processed)
+        ]
+    
     def _analyze_text(self, text: str) -> Dict:
         """Analyze sentiment of a single text"""
-        if TRANSFORMERS_AVAILABLE and self.model and self.tokenizer:
+        return self._analyze_batch([text])[0]
+    
+    def _analyze_batch(self, texts: List[str], max_length: int = 512,
+                       fallback_results: List[Dict] = None) -> List[Dict]:
+        """Analyze sentiment of a list of texts, running the model batch by batch"""
+        if TRANSFORMERS_AVAILABLE and self.backend:
             try:
-                # Tokenize and analyze
-                inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-                with torch.no_grad():
-                    outputs = self.model(**inputs)
-                    scores = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                
-                # Get prediction
-                predicted_class = torch.argmax(scores).item()
-                confidence = scores[0][predicted_class].item()
-                
-                # Map to labels (depends on model)
-                label_map = {0: "negative", 1: "neutral", 2: "positive"}
-                label = label_map.get(predicted_class, "neutral")
-                
-                # Convert to score -1 to 1
-                score = (predicted_class - 1) * confidence
-                
-                return {"label": label, "score": score}
+                probs = predict_in_batches(self.backend, texts, max_length, self.batch_size,
+                                           self.policy.sort_by_length)
+                ARTICLES_SCORED.inc(len(texts), scorer=self.backend.name)
+                return [probabilities_to_result(p) for p in probs]
             except Exception as e:
                 print(f"Error in model inference: {e}")
         
         # Fallback: Simple keyword-based sentiment
-        return self._fallback_sentiment(text)
+        ARTICLES_SCORED.inc(len(texts), scorer="lexicon")
+        if fallback_results is not None:
+            return fallback_results
+        return [self._fallback_sentiment(text) for text in texts]
     
     def _fallback_sentiment(self, text: str) -> Dict:
         """Simple keyword-based sentiment analysis as fallback"""
-        text_lower = text.lower()
-        
-        positive_words = [
-            "good", "great", "excellent", "strong", "growth", "profit", "gain",
-            "success", "upgrade", "bullish", "exceed", "positive", "rise", "up"
-        ]
-        negative_words = [
-            "bad", "poor", "weak", "decline", "loss", "fail", "downgrade",
-            "bearish", "miss", "negative", "fall", "down", "concern", "risk"
-        ]
-        
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        
-        if positive_count > negative_count:
-            return {"label": "positive", "score": 0.6}
-        elif negative_count > positive_count:
-            return {"label": "negative", "score": -0.6}
-        else:
-            return {"label": "neutral", "score": 0.0}
+        return lexicon_sentiment(tokenize(text))
     
     def _extract_keywords(self, text: str, top_n: int = 5) -> List[str]:
         """Extract top keywords from text"""
-        # Simple keyword extraction based on word frequency
-        # Remove common words and extract meaningful terms
-        stop_words = {
-            "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for",
-            "of", "with", "by", "from", "as", "is", "was", "are", "were", "be",
-            "been", "being", "have", "has", "had", "do", "does", "did", "will",
-            "would", "could", "should", "may", "might", "can", "this", "that",
-            "these", "those", "it", "its", "they", "them", "their"
-        }
-        
-        # Extract words
-        words = re.findall(r'\b[a-z]{4,}\b', text.lower())
-        
-        # Filter and count
-        filtered_words = [w for w in words if w not in stop_words]
-        word_counts = Counter(filtered_words)
-        
-        # Return top keywords
-        return [word for word, count in word_counts.most_common(top_n)]
+        return extract_keywords(tokenize(text), top_n)
@@ -0,0 +1,128 @@
+import re
+import time
+from collections import Counter
+from typing import List, Dict, Iterable
+
+# Tokens are runs of Unicode letters in the lowercased text, so lexicon matches
+# respect word boundaries ("up" no longer matches "support", "miss" no longer matches "mission")
+# and accented words stay whole ("société", not "soci" + "t")
+TOKEN_RE = re.compile(r"[^\W\d_]+")
+
+KEYWORD_MIN_LENGTH = 4
+
+STOP_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for",
+    "of", "with", "by", "from", "as", "is", "was", "are", "were", "be",
+    "been", "being", "have", "has", "had", "do", "does", "did", "will",
+    "would", "could", "should", "may", "might", "can", "this", "that",
+    "these", "those", "it", "its", "they", "them", "their"
+})
+
+# Lexicon for the fallback scorer, with the usual inflections spelled out since
+# matching is now on whole words rather than substrings
+POSITIVE_WORDS = frozenset({
+    "good", "great", "excellent", "strong", "stronger", "growth", "grow", "grows", "growing",
+    "profit", "profits", "profitable", "gain", "gains", "gained", "success", "successful",
+    "upgrade", "upgrades", "upgraded", "bullish", "exceed", "exceeds", "exceeded",
+    "positive", "rise", "rises", "rising", "rose", "up"
+})
+NEGATIVE_WORDS = frozenset({
+    "bad", "poor", "weak", "weaker", "decline", "declines", "declined", "declining",
+    "loss", "losses", "fail", "fails", "failed", "failure", "downgrade", "downgrades",
+    "downgraded", "bearish", "miss", "misses", "missed", "negative", "fall", "falls",
+    "falling", "fell", "down", "concern", "concerns", "risk", "risks"
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split a text into word tokens"""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def extract_keywords(tokens: List[str], top_n: int = 5) -> List[str]:
+    """Most frequent non stop-word tokens of at least KEYWORD_MIN_LENGTH letters"""
+    counts = Counter(t for t in tokens if len(t) >= KEYWORD_MIN_LENGTH and t not in STOP_WORDS)
+    return [word for word, count in counts.most_common(top_n)]
+
+
+def lexicon_sentiment(tokens: List[str]) -> Dict:
+    """Keyword-based sentiment: compares the number of distinct positive and negative lexicon words"""
+    vocabulary = set(tokens)
+    positive_count = len(vocabulary & POSITIVE_WORDS)
+    negative_count = len(vocabulary & NEGATIVE_WORDS)
+
+    if positive_count > negative_count:
+        return {"label": "positive", "score": 0.6}
+    elif negative_count > positive_count:
+        return {"label": "negative", "score": -0.6}
+    else:
+        return {"label": "neutral", "score": 0.0}
+
+
+def process_text(text: str, top_n: int = 5) -> Dict:
+    """Tokenize a text once and derive both its keywords and its lexicon sentiment"""
+    tokens = tokenize(text)
+    return {
+        "keywords": extract_keywords(tokens, top_n),
+        "sentiment": lexicon_sentiment(tokens)
+    }
+
+
+def process_articles(texts: Iterable[str], top_n: int = 5) -> List[Dict]:
+    """Batch version of process_text over a list of article texts"""
+    return [process_text(text, top_n) for text in texts]
+
+
+# (text, expected tokenize() output, expected extract_keywords() output)
+SELF_CHECKS = [
+    ("La Société Générale publie ses résultats après une décision réglementaire",
+     ["la", "société", "générale", "publie", "ses", "résultats", "après", "une", "décision", "réglementaire"],
+     ["société", "générale", "publie", "résultats", "après"]),
+    ("Shares rise 5% on support: no mission-critical miss",
+     ["shares", "rise", "on", "support", "no", "mission", "critical", "miss"],
+     ["shares", "rise", "support", "mission", "critical"]),
+]
+
+
+def self_check() -> List[Dict]:
+    """Run tokenize / extract_keywords on SELF_CHECKS and report mismatches"""
+    failures = []
+    for text, tokens, keywords in SELF_CHECKS:
+        got_tokens = tokenize(text)
+        got_keywords = extract_keywords(got_tokens)
+        if got_tokens != tokens or got_keywords != keywords:
+            failures.append({"text": text, "tokens": got_tokens, "keywords": got_keywords})
+    return failures
+
+
+def benchmark(n_articles: int = 100_000, corpus_path: str = "synthese_cac40_mensuelle.json") -> Dict:
+    """Time process_articles over n_articles texts built by cycling the local article corpus"""
+    from app.services.scoring_policy import load_summary_articles
+
+    base = [f"{a['title']} {a['content'] or ''}" for a in load_summary_articles(corpus_path)]
+    texts = [base[i % len(base)] for i in range(n_articles)]
+
+    t0 = time.perf_counter()
+    process_articles(texts)
+    elapsed = time.perf_counter() - t0
+    return {
+        "n_articles": n_articles,
+        "seconds": round(elapsed, 3),
+        "articles_per_second": round(n_articles / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    ap = argparse.ArgumentParser(description="Benchmark keyword extraction + lexicon scoring")
+    ap.add_argument("--n", type=int, default=100_000, help="Number of articles")
+    ap.add_argument("--corpus", default="synthese_cac40_mensuelle.json")
+    ap.add_argument("--check", action="store_true", help="Only run the tokenizer self-check (accented text, word boundaries)")
+    args = ap.parse_args()
+    if args.check:
+        failures = self_check()
+        print(json.dumps({"ok": not failures, "failures": failures}, indent=2, ensure_ascii=False))
+        raise SystemExit(1 if failures else 0)
+    print(json.dumps(benchmark(args.n, args.corpus), indent=2))
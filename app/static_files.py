@@ -0,0 +1,210 @@
+"""
+Static file serving with HTTP caching
+
+- Strong content-hash ETags and Last-Modified headers
+- Cache-Control policy per file type
+- 304 Not Modified on If-None-Match / If-Modified-Since
+- Optional precompressed .gz/.br variants generated at startup, keyed by content
+  hash and rebuilt on first request after a file's content changes
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# HTML is always revalidated so new deployments are picked up; data files are
+# revalidated after a short delay; images rarely change
+CACHE_POLICIES = {
+    ".html": "no-cache",
+    ".js": "public, max-age=300, must-revalidate",
+    ".css": "public, max-age=300, must-revalidate",
+    ".json": "public, max-age=600, must-revalidate",
+    ".png": "public, max-age=86400",
+}
+DEFAULT_CACHE_POLICY = "no-cache"
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".js", ".css", ".json"}
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+class StaticFileCache:
+    """Serves a fixed set of files with validators and precompressed variants"""
+
+    def __init__(self, files: Iterable[str], directory: str = ".",
+                 precompressed_dir: str = None):
+        self.files = set(files)
+        self.directory = directory
+        self.precompressed_dir = precompressed_dir or os.getenv("STATIC_PRECOMPRESSED_DIR", ".static_cache")
+        self._entries: Dict[str, Dict] = {}
+        # ETags whose variants were built (or attempted); empty until precompress() enables variants
+        self._built: Set[str] = set()
+        self._variants_enabled = False
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.directory, filename)
+
+    def entry(self, filename: str) -> Optional[Dict]:
+        """Validators for a file, recomputed only when its mtime or size changes"""
+        path = self._path(filename)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        cached = self._entries.get(filename)
+        if cached and cached["mtime"] == st.st_mtime and cached["size"] == st.st_size:
+            return cached
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+
+        ext = os.path.splitext(filename)[1].lower()
+        entry = {
+            "path": path,
+            "mtime": st.st_mtime,
+            "size": st.st_size,
+            "etag": f'"{digest.hexdigest()[:32]}"',
+            "last_modified": formatdate(st.st_mtime, usegmt=True),
+            "cache_control": CACHE_POLICIES.get(ext, DEFAULT_CACHE_POLICY),
+            "media_type": mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            "compressible": ext in COMPRESSIBLE_EXTENSIONS,
+        }
+        self._entries[filename] = entry
+        return entry
+
+    def _variant_path(self, filename: str, encoding: str, entry: Dict) -> str:
+        # The content hash in the name ties a variant to the exact bytes it was built from,
+        # whatever the source's mtime says (cp -p, rsync -t and tar keep older mtimes)
+        return os.path.join(self.precompressed_dir,
+                            f"{filename}.{entry['etag'][1:17]}{ENCODING_SUFFIXES[encoding]}")
+
+    @staticmethod
+    def _encodings() -> List[str]:
+        return ["gzip", "br"] if BROTLI_AVAILABLE else ["gzip"]
+
+    def _write_variants(self, filename: str, entry: Dict) -> Dict[str, int]:
+        """Write the missing variants of a file's current content; {variant name: size} of those written"""
+        self._built.add(entry["etag"])
+        written = {}
+        data = None
+        for encoding in self._encodings():
+            target = self._variant_path(filename, encoding, entry)
+            if os.path.exists(target):
+                continue
+            if data is None:
+                with open(entry["path"], "rb") as f:
+                    data = f.read()
+                if f'"{hashlib.sha256(data).hexdigest()[:32]}"' != entry["etag"]:
+                    # Changed since it was hashed: the next request rehashes and rebuilds
+                    self._built.discard(entry["etag"])
+                    return written
+            if encoding == "br":
+                compressed = brotli.compress(data, quality=11)
+            else:
+                compressed = gzip.compress(data, compresslevel=9)
+            tmp = f"{target}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as out:
+                out.write(compressed)
+            os.replace(tmp, target)
+            written[os.path.basename(target)] = len(compressed)
+        return written
+
+    def _prune_variants(self, filename: str, entry: Dict):
+        """Remove the variants of a file's earlier contents (and unkeyed ones from older versions)"""
+        keep = {os.path.basename(self._variant_path(filename, e, entry)) for e in ENCODING_SUFFIXES}
+        pattern = re.compile(re.escape(filename) + r"(\.[0-9a-f]{16})?\.(gz|br)")
+        for name in os.listdir(self.precompressed_dir):
+            if name not in keep and pattern.fullmatch(name):
+                os.remove(os.path.join(self.precompressed_dir, name))
+
+    def precompress(self) -> Dict[str, int]:
+        """
+        Write .gz (and .br when brotli is installed) variants of compressible files that are
+        missing for their current content, and drop outdated ones. Also enables rebuilding
+        variants on the first request after a file changes.
+        """
+        os.makedirs(self.precompressed_dir, exist_ok=True)
+        self._variants_enabled = True
+        written = {}
+        for filename in sorted(self.files):
+            entry = self.entry(filename)
+            if not entry or not entry["compressible"]:
+                continue
+            written.update(self._write_variants(filename, entry))
+            self._prune_variants(filename, entry)
+        return written
+
+    @staticmethod
+    def _not_modified(request: Request, entry: Dict) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+            etag = entry["etag"]
+            # Encoded variants carry a suffixed ETag; any of them validates the file
+            return "*" in tags or etag in tags or any(t.startswith(etag[:-1] + "-") for t in tags)
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(entry["mtime"]) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _choose_encoding(self, request: Request, filename: str, entry: Dict) -> Optional[str]:
+        if not entry["compressible"]:
+            return None
+        accepted = {p.split(";")[0].strip() for p in request.headers.get("accept-encoding", "").lower().split(",")}
+        if not accepted & set(self._encodings()):
+            return None
+        if self._variants_enabled and entry["etag"] not in self._built:
+            # Content changed since startup: build its variants once, outdated ones are never served
+            try:
+                self._write_variants(filename, entry)
+            except OSError:
+                return None
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self._encodings():
+                if os.path.exists(self._variant_path(filename, encoding, entry)):
+                    return encoding
+        return None
+
+    def response(self, request: Request, filename: str) -> Optional[Response]:
+        """Build a 200/304 response for a served file, or None if it is unknown or missing"""
+        if filename not in self.files:
+            return None
+        entry = self.entry(filename)
+        if entry is None:
+            return None
+
+        headers = {
+            "ETag": entry["etag"],
+            "Last-Modified": entry["last_modified"],
+            "Cache-Control": entry["cache_control"],
+        }
+        if entry["compressible"]:
+            headers["Vary"] = "Accept-Encoding"
+
+        if self._not_modified(request, entry):
+            return Response(status_code=304, headers=headers)
+
+        encoding = self._choose_encoding(request, filename, entry)
+        if encoding is None:
+            return FileResponse(entry["path"], media_type=entry["media_type"], headers=headers)
+
+        headers["Content-Encoding"] = encoding
+        headers["ETag"] = f'{entry["etag"][:-1]}-{encoding}"'
+        return FileResponse(self._variant_path(filename, encoding, entry), media_type=entry["media_type"], headers=headers)
@@ -0,0 +1,364 @@
+"""
+Storage repositories for news articles and sentiment documents
+
+NewsScraper, SentimentAnalyzer, CorrelationService and DashboardService go
+through a NewsSentimentRepository instead of the MongoDB collections, so the
+pipeline can run on:
+
+- MongoRepository: the existing news/sentiment collections (app.models.mongo_models)
+- SQLiteRepository: an embedded single-file database with (ticker, date) indexes
+  and bulk writes, for single-node deployments and runs without external services
+
+STORAGE_BACKEND selects one ("mongo", "sqlite"); "auto" uses MongoDB when it is
+reachable and the embedded database otherwise.
+"""
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.metrics import observe_query
+from app.price_store import apply_pragmas
+
+
+class NewsSentimentRepository(ABC):
+    """Persistence of scraped articles and per-article sentiment results"""
+
+    name = "abstract"
+
+    @property
+    @abstractmethod
+    def available(self) -> bool:
+        """Whether the backend can be used (connected / initialized)"""
+
+    def init(self):
+        """Create collections, tables or indexes if needed"""
+
+    @abstractmethod
+    def new_news_document(self, ticker: str, title: str, content: str, source: str, url: str,
+                          published_at: datetime) -> Dict:
+        """Build a news document in the backend's format"""
+
+    @abstractmethod
+    def new_sentiment_document(self, ticker: str, text: str, sentiment_label: str, sentiment_score: float,
+                               source: str, date: datetime, keywords: List[str]) -> Dict:
+        """Build a sentiment document in the backend's format"""
+
+    @abstractmethod
+    def insert_news(self, articles: List[Dict]) -> int:
+        """Bulk insert news documents, returns the number written"""
+
+    @abstractmethod
+    def find_news(self, ticker: str, limit: int = 100) -> List[Dict]:
+        """News documents for a ticker"""
+
+    @abstractmethod
+    def find_news_between(self, ticker: str, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """News documents for a ticker with start_date <= published_at <= end_date"""
+
+    @abstractmethod
+    def insert_sentiments(self, documents: List[Dict]) -> int:
+        """Bulk insert sentiment documents, returns the number written"""
+
+    @abstractmethod
+    def find_sentiments(self, ticker: str, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """Sentiment documents for a ticker with start_date <= date <= end_date"""
+
+    @abstractmethod
+    def sentiment_fingerprints(self) -> Dict[Tuple[str, str], str]:
+        """{(ticker, "YYYY-MM"): value that changes whenever that month's sentiment documents do}"""
+
+
+class MongoRepository(NewsSentimentRepository):
+    """Repository over the news/sentiment MongoDB collections"""
+
+    name = "mongo"
+
+    def __init__(self):
+        try:
+            from app.models import mongo_models
+            self._models = mongo_models
+        except ImportError as e:
+            print(f"MongoDB models not available: {e}")
+            self._models = None
+
+    @property
+    def available(self) -> bool:
+        return self._models is not None and bool(self._models.MONGODB_AVAILABLE)
+
+    def init(self):
+        if self._models is not None:
+            self._models.init_mongodb()
+
+    def new_news_document(self, ticker, title, content, source, url, published_at):
+        return self._models.NewsDocument.create(ticker=ticker, title=title, content=content,
+                                                source=source, url=url, published_at=published_at)
+
+    def new_sentiment_document(self, ticker, text, sentiment_label, sentiment_score, source, date, keywords):
+        return self._models.SentimentDocument.create(ticker=ticker, text=text, sentiment_label=sentiment_label,
+                                                     sentiment_score=sentiment_score, source=source,
+                                                     date=date, keywords=keywords)
+
+    def insert_news(self, articles):
+        if not articles or not self.available:
+            return 0
+        with observe_query("mongo", "news.insert_many", {"documents": len(articles)}):
+            self._models.news_collection.insert_many(articles)
+        return len(articles)
+
+    def find_news(self, ticker, limit=100):
+        if not self.available:
+            return []
+        with observe_query("mongo", "news.find", {"ticker": ticker, "limit": limit}):
+            return list(self._models.news_collection.find({"ticker": ticker}).limit(limit))
+
+    def find_news_between(self, ticker, start_date, end_date):
+        if not self.available:
+            return []
+        query = {"ticker": ticker, "published_at": {"$gte": start_date, "$lte": end_date}}
+        with observe_query("mongo", "news.find", query):
+            return list(self._models.news_collection.find(query).sort("published_at", 1))
+
+    def insert_sentiments(self, documents):
+        if not documents or not self.available:
+            return 0
+        with observe_query("mongo", "sentiment.insert_many", {"documents": len(documents)}):
+            self._models.sentiment_collection.insert_many(documents)
+        return len(documents)
+
+    def find_sentiments(self, ticker, start_date, end_date):
+        if not self.available:
+            return []
+        query = {"ticker": ticker, "date": {"$gte": start_date, "$lte": end_date}}
+        with observe_query("mongo", "sentiment.find", query):
+            return list(self._models.sentiment_collection.find(query))
+
+    def sentiment_fingerprints(self):
+        if not self.available:
+            return {}
+        pipeline = [{"$group": {
+            "_id": {"ticker": "$ticker", "month": {"$dateToString": {"format": "%Y-%m", "date": "$date"}}},
+            "n": {"$sum": 1}, "last": {"$max": "$date"}, "total": {"$sum": "$sentiment_score"},
+        }}]
+        with observe_query("mongo", "sentiment.aggregate", pipeline):
+            groups = list(self._models.sentiment_collection.aggregate(pipeline))
+        return {(g["_id"]["ticker"], g["_id"]["month"]): f"{g['n']}:{g['last']}:{g['total']!r}" for g in groups}
+
+
+class SQLiteRepository(NewsSentimentRepository):
+    """
+    Embedded repository: one SQLite file, WAL mode, composite (ticker, date)
+    indexes matching the read patterns, executemany for bulk writes. Datetimes
+    are stored as ISO strings so range filters are plain string comparisons.
+    """
+
+    name = "sqlite"
+
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS news (
+            id            INTEGER PRIMARY KEY,
+            ticker        TEXT NOT NULL,
+            title         TEXT,
+            content       TEXT,
+            source        TEXT,
+            url           TEXT,
+            published_at  TEXT NOT NULL,
+            created_at    TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_news_ticker_published ON news (ticker, published_at DESC)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_news_ticker_url ON news (ticker, url) WHERE url <> ''",
+        """
+        CREATE TABLE IF NOT EXISTS sentiments (
+            id               INTEGER PRIMARY KEY,
+            ticker           TEXT NOT NULL,
+            date             TEXT NOT NULL,
+            text             TEXT,
+            sentiment_label  TEXT,
+            sentiment_score  REAL,
+            source           TEXT,
+            keywords         TEXT,
+            created_at       TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sentiments_ticker_date ON sentiments (ticker, date)",
+    ]
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.EMBEDDED_DB_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            apply_pragmas(conn)
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    def init(self):
+        with self._lock:
+            self._connection()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _iso(value) -> str:
+        if isinstance(value, datetime):
+            # Naive UTC, like the datetimes produced by the scrapers
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            return value.isoformat(timespec="seconds")
+        return str(value)
+
+    def new_news_document(self, ticker, title, content, source, url, published_at):
+        return {"ticker": ticker, "title": title, "content": content, "source": source, "url": url,
+                "published_at": published_at, "created_at": datetime.utcnow()}
+
+    def new_sentiment_document(self, ticker, text, sentiment_label, sentiment_score, source, date, keywords):
+        return {"ticker": ticker, "text": text, "sentiment_label": sentiment_label,
+                "sentiment_score": sentiment_score, "source": source, "date": date,
+                "keywords": keywords, "created_at": datetime.utcnow()}
+
+    def _write_many(self, sql: str, rows: List[tuple]) -> int:
+        with self._lock, observe_query("sqlite", sql, {"rows": len(rows)}):
+            conn = self._connection()
+            before = conn.total_changes
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(sql, rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return conn.total_changes - before
+
+    def insert_news(self, articles):
+        if not articles:
+            return 0
+        now = self._iso(datetime.utcnow())
+        rows = [(a["ticker"], a.get("title"), a.get("content"), a.get("source"), a.get("url") or "",
+                 self._iso(a.get("published_at") or now), self._iso(a.get("created_at") or now))
+                for a in articles]
+        # Re-scraping the same article URL for a ticker is a no-op
+        return self._write_many("""
+            INSERT OR IGNORE INTO news (ticker, title, content, source, url, published_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+    FIND_NEWS = """
+        SELECT id AS _id, ticker, title, content, source, url, published_at, created_at
+        FROM news WHERE ticker = ?
+        ORDER BY published_at DESC
+        LIMIT ?
+    """
+
+    FIND_SENTIMENTS = """
+        SELECT id AS _id, ticker, date, text, sentiment_label, sentiment_score, source, keywords
+        FROM sentiments
+        WHERE ticker = ? AND date BETWEEN ? AND ?
+        ORDER BY date
+    """
+
+    FIND_NEWS_BETWEEN = """
+        SELECT id AS _id, ticker, title, content, source, url, published_at, created_at
+        FROM news
+        WHERE ticker = ? AND published_at BETWEEN ? AND ?
+        ORDER BY published_at
+    """
+
+    SENTIMENT_FINGERPRINTS = """
+        SELECT ticker, substr(date, 1, 7), COUNT(*), MAX(id), TOTAL(sentiment_score)
+        FROM sentiments
+        GROUP BY ticker, substr(date, 1, 7)
+    """
+
+    def _news_query(self, sql: str, params: tuple) -> List[Dict]:
+        with self._lock, observe_query("sqlite", sql, params):
+            rows = self._connection().execute(sql, params).fetchall()
+        docs = []
+        for row in rows:
+            doc = dict(row)
+            doc["published_at"] = datetime.fromisoformat(doc["published_at"])
+            doc["created_at"] = datetime.fromisoformat(doc["created_at"])
+            docs.append(doc)
+        return docs
+
+    def find_news(self, ticker, limit=100):
+        return self._news_query(self.FIND_NEWS, (ticker, limit))
+
+    def find_news_between(self, ticker, start_date, end_date):
+        return self._news_query(self.FIND_NEWS_BETWEEN, (ticker, self._iso(start_date), self._iso(end_date)))
+
+    def insert_sentiments(self, documents):
+        if not documents:
+            return 0
+        now = self._iso(datetime.utcnow())
+        rows = [(d["ticker"], self._iso(d.get("date") or now), d.get("text"), d.get("sentiment_label"),
+                 d.get("sentiment_score"), d.get("source"), json.dumps(d.get("keywords") or []),
+                 self._iso(d.get("created_at") or now))
+                for d in documents]
+        return self._write_many("""
+            INSERT INTO sentiments (ticker, date, text, sentiment_label, sentiment_score, source,
+                                    keywords, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+    def find_sentiments(self, ticker, start_date, end_date):
+        params = (ticker, self._iso(start_date), self._iso(end_date))
+        with self._lock, observe_query("sqlite", self.FIND_SENTIMENTS, params):
+            rows = self._connection().execute(self.FIND_SENTIMENTS, params).fetchall()
+        docs = []
+        for row in rows:
+            doc = dict(row)
+            doc["date"] = datetime.fromisoformat(doc["date"])
+            doc["keywords"] = json.loads(doc["keywords"]) if doc["keywords"] else []
+            docs.append(doc)
+        return docs
+
+    def sentiment_fingerprints(self):
+        with self._lock, observe_query("sqlite", self.SENTIMENT_FINGERPRINTS, ()):
+            rows = self._connection().execute(self.SENTIMENT_FINGERPRINTS).fetchall()
+        return {(ticker, month): f"{n}:{last_id}:{total!r}" for ticker, month, n, last_id, total in rows}
+
+
+REPOSITORIES = {
+    "mongo": MongoRepository,
+    "sqlite": SQLiteRepository,
+}
+
+_repository: Optional[NewsSentimentRepository] = None
+_repository_lock = threading.Lock()
+
+
+def get_repository() -> NewsSentimentRepository:
+    """Process-wide repository selected by settings.STORAGE_BACKEND"""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            backend = settings.STORAGE_BACKEND
+            if backend == "auto":
+                mongo = MongoRepository()
+                _repository = mongo if mongo.available else SQLiteRepository()
+            elif backend in REPOSITORIES:
+                _repository = REPOSITORIES[backend]()
+            else:
+                raise ValueError(f"Unknown storage backend '{backend}', expected one of "
+                                 f"{', '.join(['auto', *REPOSITORIES])}")
+            print(f"Using '{_repository.name}' storage backend")
+        return _repository
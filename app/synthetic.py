@@ -0,0 +1,258 @@
+"""
+Deterministic synthetic datasets at any scale
+
+generate() writes tickers x years x articles/day of data in the formats the
+application reads, into one directory:
+
+- cac40_open_prices.db: price table in the app.price_store layout (open/high/low/volume)
+- articles_epures_groupes.json: daily sentiment per ticker
+  (ticker, published_date, sentiment_score_mean, nb_articles)
+- cac40_news.db: news and per-article sentiment documents (SQLiteRepository)
+- synthese_cac40_mensuelle.json, batch_corr_2025-09.json: the files main.py serves,
+  so the front API can run from the directory
+- dataset.json: the generation parameters
+
+Returns are a market factor plus noise with a planted lead from sentiment changes
+to next-day returns, so correlations and forecasts have something to find. The
+first 40 tickers are the CAC40 symbols (the only ones main.py resolves). The same
+parameters and seed always produce the same data.
+
+Usage:
+  python -m app.synthetic --out .bench_data/demo --tickers 40 --years 5 --articles-per-day 20
+"""
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from app import price_store
+from app.incremental import monthly_summary
+from app.tickers import all_symbols, company_name
+
+PRICES_FILE = "cac40_open_prices.db"
+SENTIMENT_FILE = "articles_epures_groupes.json"
+NEWS_FILE = "cac40_news.db"
+SUMMARY_FILE = "synthese_cac40_mensuelle.json"
+BATCH_CORR_FILE = "batch_corr_2025-09.json"
+MANIFEST_FILE = "dataset.json"
+
+DEFAULT_END = "2025-10-17"
+# Next-day return per unit of sentiment change: small enough to look like market data
+SENTIMENT_LEAD_BETA = 0.02
+
+POSITIVE_PHRASES = ["beats estimates as profits rise", "shares gain after upgrade", "reports strong growth",
+                    "posts record profit", "rises on bullish outlook", "exceeds guidance"]
+NEGATIVE_PHRASES = ["shares fall after downgrade", "misses estimates on weak demand", "reports loss",
+                    "declines as risks mount", "falls on bearish outlook", "warns of weaker margins"]
+NEUTRAL_PHRASES = ["holds annual meeting", "announces board changes", "publishes quarterly report",
+                   "updates investors on strategy", "confirms dividend calendar", "comments on sector news"]
+SOURCES = ["Reuters", "Les Echos", "Bloomberg", "Boursorama", "Zonebourse", "Investing.com"]
+
+
+def symbols(n: int) -> List[str]:
+    """The CAC40 symbols first, then SYMnnn.PA placeholders"""
+    base = all_symbols()
+    return base[:n] + [f"SYM{i:03d}.PA" for i in range(len(base), n)]
+
+
+def simulate(n_tickers: int = 40, years: float = 5, articles_per_day: float = 20, seed: int = 0,
+             end: str = DEFAULT_END) -> Dict:
+    """
+    Business-day panel (dates x tickers): daily mean sentiment, article counts and
+    open/high/low/volume. All arrays are (n_days, n_tickers).
+    """
+    rng = np.random.default_rng(seed)
+    end_ts = pd.Timestamp(end)
+    dates = pd.bdate_range(end=end_ts, periods=max(2, int(round(years * 261))))
+    T, N = len(dates), n_tickers
+
+    # Sentiment: per-ticker AR(1) around a small positive bias
+    sentiment = np.empty((T, N))
+    sentiment[0] = rng.normal(0.05, 0.1, N)
+    shocks = rng.normal(0, 0.08, (T, N))
+    for t in range(1, T):
+        sentiment[t] = 0.05 + 0.8 * (sentiment[t - 1] - 0.05) + shocks[t]
+    sentiment = np.clip(sentiment, -1, 1)
+    counts = rng.poisson(articles_per_day, (T, N))
+    sentiment[counts == 0] = np.nan
+
+    dsent = np.nan_to_num(np.diff(sentiment, axis=0, prepend=np.nan))
+    market = rng.normal(0.0002, 0.009, T)
+    betas = rng.uniform(0.6, 1.4, N)
+    returns = market[:, None] * betas + rng.normal(0, 0.012, (T, N))
+    returns[1:] += SENTIMENT_LEAD_BETA * dsent[:-1]
+
+    open_ = rng.uniform(10, 400, N) * np.exp(np.cumsum(returns, axis=0))
+    spread = np.abs(rng.normal(0, 0.01, (T, N)))
+    return {
+        "dates": dates,
+        "symbols": symbols(N),
+        "sentiment": sentiment,
+        "counts": counts,
+        "open": open_,
+        "high": open_ * (1 + spread),
+        "low": open_ * (1 - spread),
+        "volume": rng.lognormal(13, 0.5, (T, N)).round(),
+    }
+
+
+def write_prices(path: Path, sim: Dict) -> int:
+    if path.exists():
+        path.unlink()
+    conn = price_store.connect(str(path))
+    price_store.migrate(conn)
+    days = [d.date().isoformat() for d in sim["dates"]]
+    rows = [(symbol, day, float(sim["open"][t, i]), float(sim["high"][t, i]), float(sim["low"][t, i]),
+             float(sim["volume"][t, i]))
+            for i, symbol in enumerate(sim["symbols"]) for t, day in enumerate(days)]
+    n = price_store.upsert_prices(conn, rows)
+    conn.execute("ANALYZE")
+    conn.close()
+    return n
+
+
+def sentiment_records(sim: Dict) -> List[Dict]:
+    days = [d.date().isoformat() for d in sim["dates"]]
+    return [{"ticker": symbol, "published_date": day, "sentiment_score_mean": round(float(sim["sentiment"][t, i]), 4),
+             "nb_articles": int(sim["counts"][t, i])}
+            for i, symbol in enumerate(sim["symbols"]) for t, day in enumerate(days)
+            if sim["counts"][t, i] > 0]
+
+
+def articles(sim: Dict, seed: int = 0) -> List[Dict]:
+    """One dict per article: ticker, title, content, source, url, published_at, score"""
+    rng = np.random.default_rng(seed + 1)
+    out = []
+    for i, symbol in enumerate(sim["symbols"]):
+        name = company_name(symbol) or symbol.split(".")[0]
+        n_total = int(sim["counts"][:, i].sum())
+        if n_total == 0:
+            continue
+        day_index = np.repeat(np.arange(len(sim["dates"])), sim["counts"][:, i])
+        scores = np.clip(np.nan_to_num(sim["sentiment"][day_index, i]) + rng.normal(0, 0.35, n_total), -1, 1)
+        phrase = rng.integers(0, len(POSITIVE_PHRASES), n_total)
+        source = rng.integers(0, len(SOURCES), n_total)
+        seconds = rng.integers(7 * 3600, 20 * 3600, n_total)
+        for k in range(n_total):
+            score = float(scores[k])
+            phrases = POSITIVE_PHRASES if score > 0.2 else NEGATIVE_PHRASES if score < -0.2 else NEUTRAL_PHRASES
+            headline = f"{name} {phrases[phrase[k]]}"
+            published = sim["dates"][day_index[k]].to_pydatetime() + pd.Timedelta(seconds=int(seconds[k]))
+            out.append({
+                "ticker": symbol,
+                "title": headline,
+                "content": f"{headline}. Analysts covering {name} discussed the update with investors "
+                           f"and compared it with the rest of the sector.",
+                "source": SOURCES[source[k]],
+                "url": f"https://news.example/{symbol.lower()}/{day_index[k]}-{k}",
+                "published_at": published,
+                "score": round(score, 4),
+            })
+    return out
+
+
+def write_news(repository, docs: List[Dict], chunk: int = 50_000) -> Dict[str, int]:
+    """News and sentiment documents through a NewsSentimentRepository (any backend)"""
+    from app.services.text_processing import extract_keywords, tokenize
+
+    written = {"news": 0, "sentiments": 0}
+    for start in range(0, len(docs), chunk):
+        batch = docs[start:start + chunk]
+        written["news"] += repository.insert_news([
+            repository.new_news_document(ticker=a["ticker"], title=a["title"], content=a["content"],
+                                         source=a["source"], url=a["url"], published_at=a["published_at"])
+            for a in batch])
+        written["sentiments"] += repository.insert_sentiments([
+            repository.new_sentiment_document(
+                ticker=a["ticker"], text=a["title"],
+                sentiment_label="positive" if a["score"] > 0.2 else "negative" if a["score"] < -0.2 else "neutral",
+                sentiment_score=a["score"], source=a["source"], date=a["published_at"],
+                keywords=extract_keywords(tokenize(a["content"])))
+            for a in batch])
+    return written
+
+
+def write_batch_corr(out_dir: Path, sim: Dict, days: int = 30) -> int:
+    """Correlation batch over the last `days` calendar days, computed by sentiment_price_corr_json"""
+    import sentiment_price_corr_json as corr
+
+    end = sim["dates"][-1]
+    start = (end - pd.Timedelta(days=days)).date().isoformat()
+    saved = (corr.CFG.PRICES_DB_PATH, corr.CFG.DB_URI, corr.CFG.SENTI_JSON_PATH)
+    corr.CFG.PRICES_DB_PATH = out_dir / PRICES_FILE
+    corr.CFG.DB_URI = f"sqlite:///{(out_dir / PRICES_FILE).as_posix()}"
+    corr.CFG.SENTI_JSON_PATH = out_dir / SENTIMENT_FILE
+    try:
+        batch = corr.run_batch_dict(list(sim["symbols"]), start, end.date().isoformat())
+    finally:
+        corr.CFG.PRICES_DB_PATH, corr.CFG.DB_URI, corr.CFG.SENTI_JSON_PATH = saved
+    ok = {t: r for t, r in batch.items() if "error" not in r}
+    (out_dir / BATCH_CORR_FILE).write_text(json.dumps(ok, ensure_ascii=False), encoding="utf-8")
+    return len(ok)
+
+
+def generate(out_dir: str, n_tickers: int = 40, years: float = 5, articles_per_day: float = 20,
+             seed: int = 0, end: str = DEFAULT_END, force: bool = False) -> Dict:
+    """
+    Write the dataset to out_dir and return its manifest. An existing directory
+    generated with the same parameters is reused unless force is set.
+    """
+    from app.storage import SQLiteRepository
+
+    out = Path(out_dir)
+    params = {"tickers": n_tickers, "years": years, "articles_per_day": articles_per_day, "seed": seed, "end": end}
+    manifest_path = out / MANIFEST_FILE
+    if not force and manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("params") == params:
+            return manifest
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True)
+
+    sim = simulate(n_tickers, years, articles_per_day, seed, end)
+    n_prices = write_prices(out / PRICES_FILE, sim)
+    records = sentiment_records(sim)
+    (out / SENTIMENT_FILE).write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+
+    docs = articles(sim, seed)
+    repository = SQLiteRepository(str(out / NEWS_FILE))
+    written = write_news(repository, docs)
+    repository.close()
+
+    summary = monthly_summary(docs, sim["dates"][-1].strftime("%Y-%m"))
+    (out / SUMMARY_FILE).write_text(json.dumps(summary, ensure_ascii=False), encoding="utf-8")
+    n_batch = write_batch_corr(out, sim)
+
+    manifest = {
+        "params": params,
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "symbols": sim["symbols"],
+        "start": sim["dates"][0].date().isoformat(),
+        "end": sim["dates"][-1].date().isoformat(),
+        "rows": {"prices": n_prices, "daily_sentiment": len(records), **written, "batch_corr": n_batch},
+        "bytes": {name: (out / name).stat().st_size
+                  for name in (PRICES_FILE, SENTIMENT_FILE, NEWS_FILE, SUMMARY_FILE, BATCH_CORR_FILE)},
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    return manifest
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Generate a deterministic synthetic dataset")
+    ap.add_argument("--out", required=True, help="Output directory")
+    ap.add_argument("--tickers", type=int, default=40)
+    ap.add_argument("--years", type=float, default=5)
+    ap.add_argument("--articles-per-day", type=float, default=20, help="Mean articles per ticker and business day")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--end", default=DEFAULT_END, help="Last business day (YYYY-MM-DD)")
+    ap.add_argument("--force", action="store_true", help="Regenerate even if the directory is up to date")
+    args = ap.parse_args()
+    manifest = generate(args.out, args.tickers, args.years, args.articles_per_day, args.seed, args.end, args.force)
+    print(json.dumps({k: manifest[k] for k in ("params", "start", "end", "rows", "bytes")}, indent=2))
@@ -0,0 +1,108 @@
+"""
+CAC40 ticker reference table
+
+Single source for symbol, company name, sector and index weight, used by
+Settings.CAC40_TICKERS, main.py's name -> symbol lookup, NewsScraper search
+queries and the sector / index rollups.
+"""
+import json
+import os
+from typing import Dict, List, Optional
+
+# Sector labels match the ones displayed by the front-end (script.js)
+CAC40_REFERENCE: List[Dict] = [
+    {"symbol": "AI.PA", "name": "Air Liquide", "sector": "Industrie"},
+    {"symbol": "AIR.PA", "name": "Airbus", "sector": "Industrie"},
+    {"symbol": "ALO.PA", "name": "Alstom", "sector": "Industrie"},
+    {"symbol": "MT.AS", "name": "ArcelorMittal", "sector": "Industrie"},
+    {"symbol": "CS.PA", "name": "AXA", "sector": "Assurance"},
+    {"symbol": "BNP.PA", "name": "BNP Paribas", "sector": "Banque"},
+    {"symbol": "EN.PA", "name": "Bouygues", "sector": "Construction"},
+    {"symbol": "CAP.PA", "name": "Capgemini", "sector": "Technologie"},
+    {"symbol": "CA.PA", "name": "Carrefour", "sector": "Distribution"},
+    {"symbol": "ACA.PA", "name": "Crédit Agricole", "sector": "Banque"},
+    {"symbol": "BN.PA", "name": "Danone", "sector": "Consommation"},
+    {"symbol": "DSY.PA", "name": "Dassault Systèmes", "sector": "Technologie"},
+    {"symbol": "ENGI.PA", "name": "Engie", "sector": "Énergie"},
+    {"symbol": "EL.PA", "name": "EssilorLuxottica", "sector": "Santé"},
+    {"symbol": "ERF.PA", "name": "Eurofins Scientific", "sector": "Santé"},
+    {"symbol": "RMS.PA", "name": "Hermès", "sector": "Luxe"},
+    {"symbol": "KER.PA", "name": "Kering", "sector": "Luxe"},
+    {"symbol": "LR.PA", "name": "Legrand", "sector": "Industrie"},
+    {"symbol": "OR.PA", "name": "L'Oréal", "sector": "Consommation"},
+    {"symbol": "MC.PA", "name": "LVMH", "sector": "Luxe"},
+    {"symbol": "ML.PA", "name": "Michelin", "sector": "Industrie"},
+    {"symbol": "ORA.PA", "name": "Orange", "sector": "Technologie"},
+    {"symbol": "RI.PA", "name": "Pernod Ricard", "sector": "Consommation"},
+    {"symbol": "PUB.PA", "name": "Publicis", "sector": "Médias"},
+    {"symbol": "RNO.PA", "name": "Renault", "sector": "Automobile"},
+    {"symbol": "SAF.PA", "name": "Safran", "sector": "Industrie"},
+    {"symbol": "SGO.PA", "name": "Saint-Gobain", "sector": "Industrie"},
+    {"symbol": "SAN.PA", "name": "Sanofi", "sector": "Santé"},
+    {"symbol": "SU.PA", "name": "Schneider Electric", "sector": "Industrie"},
+    {"symbol": "GLE.PA", "name": "Société Générale", "sector": "Banque"},
+    {"symbol": "STLAP.PA", "name": "Stellantis", "sector": "Automobile"},
+    {"symbol": "STMPA.PA", "name": "STMicroelectronics", "sector": "Technologie"},
+    {"symbol": "TEP.PA", "name": "Teleperformance", "sector": "Services"},
+    {"symbol": "HO.PA", "name": "Thales", "sector": "Défense"},
+    {"symbol": "TTE.PA", "name": "TotalEnergies", "sector": "Énergie"},
+    {"symbol": "URW.AS", "name": "Unibail-Rodamco-Westfield", "sector": "Immobilier"},
+    {"symbol": "VIE.PA", "name": "Veolia", "sector": "Services"},
+    {"symbol": "DG.PA", "name": "Vinci", "sector": "Construction"},
+    {"symbol": "VIV.PA", "name": "Vivendi", "sector": "Médias"},
+    {"symbol": "WLN.PA", "name": "Worldline", "sector": "Technologie"},
+]
+
+# Optional JSON file {"MC.PA": 11.2, ...} with index weights (any scale, renormalized).
+# Without it every constituent gets the same weight.
+WEIGHTS_PATH = os.getenv("CAC40_WEIGHTS_PATH", "cac40_weights.json")
+
+_BY_SYMBOL = {row["symbol"]: row for row in CAC40_REFERENCE}
+_BY_NAME = {row["name"]: row for row in CAC40_REFERENCE}
+
+
+def all_symbols() -> List[str]:
+    return [row["symbol"] for row in CAC40_REFERENCE]
+
+
+def name_to_symbol() -> Dict[str, str]:
+    """{company name: symbol}, as used by main.py's stock-name routes"""
+    return {row["name"]: row["symbol"] for row in CAC40_REFERENCE}
+
+
+def get_by_symbol(symbol: str) -> Optional[Dict]:
+    return _BY_SYMBOL.get(symbol)
+
+
+def get_by_name(name: str) -> Optional[Dict]:
+    return _BY_NAME.get(name)
+
+
+def company_name(symbol: str) -> str:
+    """Company name for a symbol, falling back to the bare ticker"""
+    row = _BY_SYMBOL.get(symbol)
+    if row:
+        return row["name"]
+    return symbol.split(".")[0]
+
+
+def sectors() -> Dict[str, List[str]]:
+    """{sector: [symbols]}"""
+    out: Dict[str, List[str]] = {}
+    for row in CAC40_REFERENCE:
+        out.setdefault(row["sector"], []).append(row["symbol"])
+    return out
+
+
+def index_weights(symbols: List[str] = None) -> Dict[str, float]:
+    """Index weights for the given symbols (default: all), normalized to sum to 1"""
+    symbols = symbols or all_symbols()
+    raw = {}
+    if WEIGHTS_PATH and os.path.exists(WEIGHTS_PATH):
+        with open(WEIGHTS_PATH, "r", encoding="utf-8") as f:
+            raw = {k: float(v) for k, v in json.load(f).items()}
+    weights = {s: raw.get(s, 0.0 if raw else 1.0) for s in symbols}
+    total = sum(weights.values())
+    if total <= 0:
+        return {s: 1.0 / len(symbols) for s in symbols} if symbols else {}
+    return {s: w / total for s, w in weights.items()}
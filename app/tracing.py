@@ -0,0 +1,244 @@
+"""
+Lightweight tracing and slow-query log
+
+- span(name, **attrs): context manager recording one timed span; the parent is
+  taken from a contextvar, so nesting follows the call stack, asyncio tasks and
+  threads started with contextvars.copy_context() / asyncio.to_thread
+- Finished spans are appended as JSON lines to TRACE_FILE (tracing is off and
+  costs one contextvar lookup when TRACE_FILE is empty)
+- record_query(): span for a database statement, plus an entry in the slow-query
+  log (SLOW_QUERY_LOG file, or the "app.slow_query" logger) when it exceeds SLOW_QUERY_MS
+
+Usage:
+  TRACE_FILE=traces.jsonl uvicorn sentiment_price_corr_json:app
+  python -m app.tracing summarize traces.jsonl [--folded]
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "")
+MAX_STATEMENT_CHARS = 2000
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class JsonlWriter:
+    """Append-only JSON lines file shared by all threads"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict):
+        line = json.dumps(record, default=str, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_trace_writer: Optional[JsonlWriter] = JsonlWriter(TRACE_FILE) if TRACE_FILE else None
+_slow_writer: Optional[JsonlWriter] = JsonlWriter(SLOW_QUERY_LOG) if SLOW_QUERY_LOG else None
+
+
+def configure(trace_file: str = None, slow_query_ms: float = None, slow_query_log: str = None):
+    """Change the outputs at runtime (an empty string disables a file)"""
+    global _trace_writer, _slow_writer, SLOW_QUERY_MS
+    if trace_file is not None:
+        if _trace_writer:
+            _trace_writer.close()
+        _trace_writer = JsonlWriter(trace_file) if trace_file else None
+    if slow_query_log is not None:
+        if _slow_writer:
+            _slow_writer.close()
+        _slow_writer = JsonlWriter(slow_query_log) if slow_query_log else None
+    if slow_query_ms is not None:
+        SLOW_QUERY_MS = slow_query_ms
+
+
+def enabled() -> bool:
+    return _trace_writer is not None
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "attrs", "_t0")
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: Dict):
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.start = time.time()
+        self.attrs = attrs
+        self._t0 = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def record(self, duration_ms: float) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(duration_ms, 3),
+            "attrs": self.attrs,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block as a child of the current span; yields the Span (None when tracing is off)"""
+    writer = _trace_writer
+    if writer is None:
+        yield None
+        return
+    s = Span(name, _current_span.get(), attrs)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs["error"] = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        _current_span.reset(token)
+        writer.write(s.record((time.perf_counter() - s._t0) * 1000))
+
+
+def _short(value) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    text = " ".join(text.split())
+    return text if len(text) <= MAX_STATEMENT_CHARS else text[:MAX_STATEMENT_CHARS] + "…"
+
+
+def record_query(backend: str, operation: str, statement, params, duration_s: float):
+    """Emit a finished span for a DB statement and log it if it was slow"""
+    duration_ms = duration_s * 1000
+    parent = _current_span.get()
+    writer = _trace_writer
+    if writer is not None:
+        s = Span(f"db.{backend}", parent, {"operation": operation, "statement": _short(statement)})
+        s.start -= duration_s
+        writer.write(s.record(duration_ms))
+
+    if duration_ms >= SLOW_QUERY_MS:
+        entry = {
+            "ts": round(time.time(), 3),
+            "backend": backend,
+            "operation": operation,
+            "duration_ms": round(duration_ms, 3),
+            "statement": _short(statement),
+            "params": _short(params),
+            "trace_id": parent.trace_id if parent else None,
+        }
+        if _slow_writer is not None:
+            _slow_writer.write(entry)
+        else:
+            slow_query_logger.warning("slow query (%.1f ms) [%s/%s]: %s params=%s", duration_ms,
+                                      backend, operation, entry["statement"], entry["params"])
+
+
+# ============================ SUMMARY CLI ============================
+
+def load_spans(path: str) -> List[Dict]:
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                spans.append(json.loads(line))
+    return spans
+
+
+def summarize(spans: List[Dict], trace_id: str = None) -> Dict[tuple, Dict]:
+    """
+    Aggregate spans by call path (root → … → span name): count, total and self time
+    (self = own duration minus the duration of direct children)
+    """
+    if trace_id:
+        spans = [s for s in spans if s["trace_id"] == trace_id]
+    by_id = {s["span_id"]: s for s in spans}
+    children_ms = defaultdict(float)
+    for s in spans:
+        if s["parent_id"] in by_id:
+            children_ms[s["parent_id"]] += s["duration_ms"]
+
+    paths: Dict[str, tuple] = {}
+
+    def path_of(s) -> tuple:
+        cached = paths.get(s["span_id"])
+        if cached is None:
+            parent = by_id.get(s["parent_id"])
+            cached = (path_of(parent) if parent else ()) + (s["name"],)
+            paths[s["span_id"]] = cached
+        return cached
+
+    stages: Dict[tuple, Dict] = defaultdict(lambda: {"count": 0, "total_ms": 0.0, "self_ms": 0.0})
+    for s in spans:
+        stage = stages[path_of(s)]
+        stage["count"] += 1
+        stage["total_ms"] += s["duration_ms"]
+        stage["self_ms"] += max(0.0, s["duration_ms"] - children_ms[s["span_id"]])
+    return dict(stages)
+
+
+def format_tree(stages: Dict[tuple, Dict]) -> str:
+    """Indented per-stage breakdown, children sorted by total time"""
+    children = defaultdict(list)
+    for path in stages:
+        children[path[:-1]].append(path)
+    lines = [f"{'total ms':>12} {'self ms':>12} {'count':>7}  stage"]
+
+    def walk(prefix: tuple, depth: int):
+        for path in sorted(children.get(prefix, []), key=lambda p: -stages[p]["total_ms"]):
+            st = stages[path]
+            lines.append(f"{st['total_ms']:12.1f} {st['self_ms']:12.1f} {st['count']:7d}  {'  ' * depth}{path[-1]}")
+            walk(path, depth + 1)
+
+    walk((), 0)
+    return "\n".join(lines)
+
+
+def format_folded(stages: Dict[tuple, Dict]) -> str:
+    """Folded stacks (flamegraph.pl / speedscope input): "a;b;c <self µs>" per line"""
+    return "\n".join(f"{';'.join(path)} {int(st['self_ms'] * 1000)}"
+                     for path, st in sorted(stages.items()) if st["self_ms"] > 0)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Summarize a JSONL trace file into a per-stage breakdown")
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("summarize")
+    p.add_argument("trace_file")
+    p.add_argument("--trace-id", help="Only this trace (default: all traces aggregated)")
+    p.add_argument("--folded", action="store_true", help="Print folded stacks instead of the tree")
+    args = ap.parse_args()
+
+    stages = summarize(load_spans(args.trace_file), trace_id=args.trace_id)
+    print(format_folded(stages) if args.folded else format_tree(stages))
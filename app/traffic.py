@@ -0,0 +1,301 @@
+"""
+Traffic recording and replay for the FastAPI apps
+
+- TrafficRecorder: ASGI middleware appending a sample of requests to TRAFFIC_RECORD_FILE
+  as JSON lines (time, app, method, route template, path, query string, status,
+  duration, response size). Only request shapes are kept: no headers, no bodies.
+- replay: drives one of the apps in-process (ASGI transport, no network) or a running
+  server with the recorded mix, at a given concurrency and speedup, and reports
+  throughput and p50/p95/p99 latency per route next to the recorded latencies.
+
+Usage:
+  TRAFFIC_RECORD_FILE=traffic.jsonl TRAFFIC_SAMPLE_RATE=0.1 uvicorn main:app
+  python -m app.traffic mix traffic.jsonl
+  python -m app.traffic replay traffic.jsonl --app front --concurrency 16 --speedup 10
+  python -m app.traffic replay traffic.jsonl --base-url http://127.0.0.1:8000 --speedup 0
+"""
+import asyncio
+import importlib
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from app.tracing import JsonlWriter
+
+TRAFFIC_RECORD_FILE = os.getenv("TRAFFIC_RECORD_FILE", "")
+TRAFFIC_SAMPLE_RATE = float(os.getenv("TRAFFIC_SAMPLE_RATE", "1.0"))
+EXCLUDED_PATHS = ("/metrics",)
+
+# Names used by enable_metrics/enable_traffic_recording for each app
+APPS = {
+    "front": "main:app",
+    "pipeline": "app.main:app",
+    "corr_json": "sentiment_price_corr_json:app",
+}
+
+
+class TrafficRecorder:
+    """ASGI middleware writing sampled request shapes to a JSONL file"""
+
+    def __init__(self, app, app_name: str = "api", path: str = None, sample_rate: float = None):
+        self.app = app
+        self.app_name = app_name
+        self.writer = JsonlWriter(path or TRAFFIC_RECORD_FILE)
+        self.sample_rate = TRAFFIC_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope.get("path") in EXCLUDED_PATHS
+                or random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+        started = time.time()
+        t0 = time.perf_counter()
+        response = {"status": 500, "bytes": 0}
+
+        async def wrapped_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, wrapped_send)
+        finally:
+            route = scope.get("route")
+            self.writer.write({
+                "ts": round(started, 6),
+                "app": self.app_name,
+                "method": scope.get("method", "GET"),
+                "route": getattr(route, "path", "unmatched"),
+                "path": scope.get("path", "/"),
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": response["status"],
+                "duration_ms": round((time.perf_counter() - t0) * 1000, 3),
+                "bytes": response["bytes"],
+            })
+
+
+def enable_traffic_recording(app, app_name: str = "api"):
+    """Install the recorder on a FastAPI app when TRAFFIC_RECORD_FILE is set"""
+    if TRAFFIC_RECORD_FILE:
+        app.add_middleware(TrafficRecorder, app_name=app_name)
+
+
+# ============================ REPLAY ============================
+
+def load_records(path: str, app_name: str = None, limit: int = None) -> List[Dict]:
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if app_name and record.get("app", app_name) != app_name:
+                continue
+            records.append(record)
+            if limit and len(records) >= limit:
+                break
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+def load_app(target: str):
+    """An app by name ("front", "pipeline", "corr_json") or "module:attribute" """
+    module_name, _, attribute = APPS.get(target, target).partition(":")
+    return getattr(importlib.import_module(module_name), attribute or "app")
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def latency_stats(values: List[float]) -> Dict:
+    values = sorted(values)
+    return {
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "mean_ms": round(sum(values) / len(values), 3) if values else None,
+    }
+
+
+async def _send(client, record: Dict, results: List[Dict]):
+    url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+    t0 = time.perf_counter()
+    try:
+        response = await client.request(record.get("method", "GET"), url)
+        status, error = response.status_code, None
+    except Exception as e:
+        status, error = None, f"{type(e).__name__}: {e}"
+    results.append({
+        "route": f"{record.get('method', 'GET')} {record.get('route', record['path'])}",
+        "status": status,
+        "error": error,
+        "latency_ms": (time.perf_counter() - t0) * 1000,
+    })
+
+
+async def _replay(client, records: List[Dict], concurrency: int, speedup: float, loops: int) -> List[Dict]:
+    results: List[Dict] = []
+    schedule = [r for _ in range(loops) for r in records]
+
+    if speedup <= 0:
+        # Closed loop: `concurrency` clients sending back to back
+        queue: asyncio.Queue = asyncio.Queue()
+        for record in schedule:
+            queue.put_nowait(record)
+
+        async def worker():
+            while not queue.empty():
+                await _send(client, queue.get_nowait(), results)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results
+
+    # Open loop: recorded inter-arrival times divided by speedup, at most `concurrency` in flight
+    semaphore = asyncio.Semaphore(concurrency)
+    span = (records[-1]["ts"] - records[0]["ts"]) if records else 0.0
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    async def fire(offset: float, record: Dict):
+        await asyncio.sleep(max(0.0, start + offset - loop.time()))
+        async with semaphore:
+            await _send(client, record, results)
+
+    tasks = [fire(((i // max(1, len(records))) * span + r["ts"] - records[0]["ts"]) / speedup, r)
+             for i, r in enumerate(schedule)]
+    await asyncio.gather(*tasks)
+    return results
+
+
+async def replay(records: List[Dict], app=None, base_url: str = None, concurrency: int = 8,
+                 speedup: float = 1.0, loops: int = 1, timeout: float = 60.0) -> Dict:
+    """Replay records against an ASGI app in-process or a server at base_url, returning the report"""
+    import httpx
+
+    if (app is None) == (base_url is None):
+        raise ValueError("Pass exactly one of app or base_url")
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if app is not None:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay",
+                                   timeout=timeout, limits=limits)
+    else:
+        client = httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits)
+
+    async with client:
+        t0 = time.perf_counter()
+        if app is not None:
+            # Run the app's startup/shutdown handlers like a server would
+            async with app.router.lifespan_context(app):
+                results = await _replay(client, records, concurrency, speedup, loops)
+        else:
+            results = await _replay(client, records, concurrency, speedup, loops)
+        elapsed = time.perf_counter() - t0
+    return build_report(records, results, elapsed, concurrency=concurrency, speedup=speedup, loops=loops)
+
+
+def build_report(records: List[Dict], results: List[Dict], elapsed: float, **settings) -> Dict:
+    recorded = defaultdict(list)
+    for r in records:
+        recorded[f"{r.get('method', 'GET')} {r.get('route', r['path'])}"].append(r["duration_ms"])
+    by_route = defaultdict(list)
+    for r in results:
+        by_route[r["route"]].append(r)
+
+    routes = {}
+    for route, items in sorted(by_route.items()):
+        ok = [r["latency_ms"] for r in items if r["status"] is not None and r["status"] < 500]
+        routes[route] = {
+            "requests": len(items),
+            "errors": len(items) - len(ok),
+            "throughput_rps": round(len(items) / elapsed, 2) if elapsed > 0 else None,
+            **{k: round(v, 3) if v is not None else None for k, v in latency_stats(ok).items()},
+            "recorded_p50_ms": percentile(sorted(recorded.get(route, [])), 50),
+        }
+    all_ok = [r["latency_ms"] for r in results if r["status"] is not None and r["status"] < 500]
+    return {
+        "settings": settings,
+        "elapsed_s": round(elapsed, 3),
+        "requests": len(results),
+        "errors": len(results) - len(all_ok),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed > 0 else None,
+        **{k: round(v, 3) if v is not None else None for k, v in latency_stats(all_ok).items()},
+        "routes": routes,
+        "sample_errors": [r["error"] or f"HTTP {r['status']}" for r in results
+                          if r["status"] is None or r["status"] >= 500][:5],
+    }
+
+
+def route_mix(records: List[Dict]) -> List[Dict]:
+    """Share of each route in a recording with its recorded latencies"""
+    by_route = defaultdict(list)
+    for r in records:
+        by_route[f"{r.get('method', 'GET')} {r.get('route', r['path'])}"].append(r["duration_ms"])
+    total = len(records) or 1
+    return [{"route": route, "requests": len(values), "share": round(len(values) / total, 4),
+             **latency_stats(values)}
+            for route, values in sorted(by_route.items(), key=lambda kv: -len(kv[1]))]
+
+
+def _fmt(value) -> str:
+    return f"{value:10.2f}" if isinstance(value, (int, float)) else f"{'-':>10}"
+
+
+def format_report(report: Dict) -> str:
+    lines = [f"{report['requests']} requests in {report['elapsed_s']} s: {report['throughput_rps']} req/s, "
+             f"{report['errors']} errors, p50 {report['p50_ms']} ms, p95 {report['p95_ms']} ms, p99 {report['p99_ms']} ms",
+             f"{'route':<44} {'requests':>8} {'errors':>6} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} "
+             f"{'p99 ms':>10} {'rec p50':>10}"]
+    for route, s in report["routes"].items():
+        lines.append(f"{route:<44} {s['requests']:8d} {s['errors']:6d} {_fmt(s['throughput_rps'])} "
+                     f"{_fmt(s['p50_ms'])} {_fmt(s['p95_ms'])} {_fmt(s['p99_ms'])} {_fmt(s['recorded_p50_ms'])}")
+    if report["sample_errors"]:
+        lines.append("errors: " + "; ".join(report["sample_errors"]))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Inspect and replay recorded API traffic")
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("mix", help="Route mix of a recording")
+    p.add_argument("file")
+    p = sub.add_parser("replay", help="Replay a recording and report latency per route")
+    p.add_argument("file")
+    target = p.add_mutually_exclusive_group(required=True)
+    target.add_argument("--app", help=f"In-process app: {', '.join(APPS)} or module:attribute")
+    target.add_argument("--base-url", help="Running server, e.g. http://127.0.0.1:8000")
+    p.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight")
+    p.add_argument("--speedup", type=float, default=1.0,
+                   help="Divide recorded inter-arrival times by this (0 = closed loop, as fast as possible)")
+    p.add_argument("--loops", type=int, default=1, help="Replay the recording this many times")
+    p.add_argument("--limit", type=int, default=None, help="Only the first N records")
+    p.add_argument("--all-apps", action="store_true", help="Keep records of other apps too")
+    p.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = ap.parse_args()
+
+    if args.command == "mix":
+        for row in route_mix(load_records(args.file)):
+            print(json.dumps(row))
+        raise SystemExit(0)
+
+    app_filter = args.app if args.app in APPS and not args.all_apps else None
+    records = load_records(args.file, app_filter, args.limit)
+    if not records:
+        raise SystemExit(f"No records to replay in {args.file}")
+    report = asyncio.run(replay(records, app=load_app(args.app) if args.app else None, base_url=args.base_url,
+                                concurrency=args.concurrency, speedup=args.speedup, loops=args.loops))
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -3,12 +3,19 @@
 import yfinance as yf
 import pandas as pd
 import json
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
+import asyncio
 import os
 
+from app.live import LiveFeed
+from app.metrics import enable_metrics, observe_call
+from app.serialization import ApiJSONResponse, enable_compression, to_columnar
+from app.static_files import StaticFileCache
+from app.tickers import name_to_symbol
+from app.traffic import enable_traffic_recording
+
 app = FastAPI(title="CAC40 Open Prices API")
 
 # Configuration CORS pour permettre les requêtes depuis le navigateur
@@ -20,99 +27,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Liste des symboles CAC40 ---
-cac40_symbols = {
-    "Air Liquide": "AI.PA",  # Pas dans le JSON
-    "Airbus": "AIR.PA",      # Correspond à AIR.PA dans le JSON
-    "ArcelorMittal": "MT.AS", # Pas dans le JSON
-    "AXA": "CS.PA",          # Correspond à CS.PA dans le JSON
-    "BNP Paribas": "BNP.PA",
-    "Bouygues": "EN.PA",
-    "Capgemini": "CAP.PA",
-    "Carrefour": "CA.PA",
-    "Crédit Agricole": "ACA.PA",
-    "Danone": "BN.PA",
-    "Dassault Systèmes": "DSY.PA",
-    "Engie": "ENGI.PA",
-    "EssilorLuxottica": "EL.PA",
-    "Eurofins Scientific": "ERF.PA",
-    "Hermès": "RMS.PA",
-    "Kering": "KER.PA",
-    "Legrand": "LR.PA",
-    "L'Oréal": "OR.PA",
-    "LVMH": "MC.PA",
-    "Michelin": "ML.PA",
-    "Orange": "ORA.PA",
-    "Pernod Ricard": "RI.PA",
-    "Renault": "RNO.PA",
-    "Safran": "SAF.PA",
-    "Saint-Gobain": "SGO.PA",
-    "Sanofi": "SAN.PA",
-    "Schneider Electric": "SU.PA",
-    "Société Générale": "GLE.PA",
-    "STMicroelectronics": "STMPA.PA",
-    "Teleperformance": "TEP.PA",
-    "Thales": "HO.PA",
-    "TotalEnergies": "TTE.PA",
-    "Unibail-Rodamco-Westfield": "URW.AS",
-    "Veolia": "VIE.PA",
-    "Vinci": "DG.PA",
-    "Vivendi": "VIV.PA"
-}
-
-# --- Route pour récupérer les dernières valeurs de toutes les actions CAC40 ---
+# Compression gzip/brotli des réponses JSON (activée par API_COMPRESSION=1)
+enable_compression(app)
+
+# Métriques Prometheus sur /metrics (déclarée avant la route catch-all des fichiers statiques)
+enable_metrics(app, app_name="front")
+
+# Enregistrement d'un échantillon des requêtes (TRAFFIC_RECORD_FILE) pour rejouer la charge
+enable_traffic_recording(app, app_name="front")
+
+# --- Liste des symboles CAC40 (nom -> symbole, table de référence app/tickers.py) ---
+cac40_symbols = name_to_symbol()
+
+# --- Dernières valeurs de toutes les actions CAC40 ---
+def download_latest_prices(period_days: int):
+    """Cours d'ouverture de tous les symboles CAC40 sur les `period_days` derniers jours (un seul appel yfinance)"""
+    from datetime import timedelta
+    all_symbols = list(cac40_symbols.values())
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=period_days)
+
+    print(f"Téléchargement des dernières valeurs pour {len(all_symbols)} actions...")
+    with observe_call("yfinance"):
+        return yf.download(all_symbols, start=start_date.strftime('%Y-%m-%d'),
+                           end=end_date.strftime('%Y-%m-%d'), group_by='ticker')
+
+def summarize_latest_prices(data, periods: list) -> dict:
+    """
+    Dernier cours de chaque action et variation (%) sur chacune des périodes demandées
+    (en jours, comptées depuis aujourd'hui) : {nom: {symbol, last_price, last_update, price_change: {jours: %}}}
+    """
+    from datetime import timedelta
+    now = pd.Timestamp(datetime.now())
+    results = {}
+
+    # Traiter chaque action
+    for stock_name, symbol in cac40_symbols.items():
+        try:
+            # Accéder aux données par symbole
+            if (symbol, 'Open') not in data.columns:
+                print(f"Aucune donnée pour {stock_name} ({symbol})")
+                continue
+            stock_data = data[(symbol, 'Open')].dropna()
+            if len(stock_data) == 0:
+                continue
+            if stock_data.index.tz is not None:
+                stock_data.index = stock_data.index.tz_localize(None)
+
+            # Récupérer la dernière valeur et la première de chaque période
+            last_price = float(stock_data.iloc[-1])
+            changes = {}
+            for days in periods:
+                window = stock_data[stock_data.index >= (now - timedelta(days=days)).normalize()]
+                if len(window) == 0:
+                    continue
+                first_price = float(window.iloc[0])
+                changes[str(days)] = round(((last_price - first_price) / first_price) * 100, 2)
+
+            results[stock_name] = {
+                "symbol": symbol,
+                "last_price": round(last_price, 2),
+                "price_change": changes,
+                "last_update": str(stock_data.index[-1].date())
+            }
+        except Exception as e:
+            print(f"Erreur pour {stock_name} ({symbol}): {e}")
+            continue
+    return results
+
 @app.get("/get_latest_cac40_prices")
 def get_latest_cac40_prices(period_days: int = Query(2, description="Nombre de jours pour calculer la performance")):
     try:
-        # Récupérer tous les symboles CAC40
-        all_symbols = list(cac40_symbols.values())
-        
-        # Télécharger les données sur la période demandée pour calculer la performance
-        from datetime import datetime, timedelta
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=period_days)
-        
-        print(f"Téléchargement des dernières valeurs pour {len(all_symbols)} actions...")
-        data = yf.download(all_symbols, start=start_date.strftime('%Y-%m-%d'), 
-                          end=end_date.strftime('%Y-%m-%d'), group_by='ticker')
-        
-        if data.empty:
-            raise HTTPException(status_code=404, detail="Aucune donnée trouvée")
+        # Dernier état du flux live s'il est à jour : aucun téléchargement par onglet ouvert
+        stocks = live_feed.fresh("prices") if period_days in LIVE_PERIODS else None
+        if stocks is None:
+            data = download_latest_prices(period_days)
+            if data.empty:
+                raise HTTPException(status_code=404, detail="Aucune donnée trouvée")
+            stocks = summarize_latest_prices(data, [period_days])
 
         results = {}
-        
-        # Traiter chaque action
-        for stock_name, symbol in cac40_symbols.items():
-            try:
-                # Accéder aux données par symbole
-                if (symbol, 'Open') in data.columns:
-                    stock_data = data[(symbol, 'Open')].dropna()
-                    stock_data = stock_data.to_frame()
-                    stock_data.columns = ['Open']
-                else:
-                    print(f"Aucune donnée pour {stock_name} ({symbol})")
-                    continue
-                
-                if len(stock_data) == 0:
-                    continue
-                
-                # Récupérer la dernière valeur et la précédente
-                last_price = float(stock_data.iloc[-1]['Open'])
-                first_price = float(stock_data.iloc[0]['Open'])
-                
-                # Calculer le changement de prix
-                change_percent = ((last_price - first_price) / first_price) * 100
-                
-                results[stock_name] = {
-                    "symbol": symbol,
-                    "last_price": round(last_price, 2),
-                    "price_change": round(change_percent, 2),
-                    "last_update": str(stock_data.index[-1].date())
-                }
-                
-            except Exception as e:
-                print(f"Erreur pour {stock_name} ({symbol}): {e}")
+        for stock_name, entry in stocks.items():
+            change = entry["price_change"].get(str(period_days))
+            if change is None:
                 continue
+            results[stock_name] = {
+                "symbol": entry["symbol"],
+                "last_price": entry["last_price"],
+                "price_change": change,
+                "last_update": entry["last_update"]
+            }
         
         json_result = {
             "total_stocks": len(results),
@@ -120,58 +124,110 @@ def get_latest_cac40_prices(period_days: int = Query(2, description="Nombre de j
             "last_update": datetime.now().isoformat()
         }
 
-        return JSONResponse(content=json_result)
+        return ApiJSONResponse(content=json_result)
 
     except Exception as e:
         print(f"Erreur générale: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# --- Mises à jour poussées (Server-Sent Events) ---
+# Un seul producteur par processus interroge yfinance et le fichier de sentiment toutes les
+# LIVE_POLL_SECONDS et diffuse les changements à tous les tableaux de bord connectés.
+LIVE_PERIODS = [7, 15, 30]  # Périodes proposées par le sélecteur "Historique" de index.html
+
+def live_price_snapshot() -> dict:
+    data = download_latest_prices(max(LIVE_PERIODS))
+    if data.empty:
+        raise RuntimeError("Aucune donnée trouvée")
+    return summarize_latest_prices(data, LIVE_PERIODS)
+
+_sentiment_file_state = {"mtime": None, "latest": {}}
+
+def live_sentiment_rollup() -> dict:
+    """Dernier jour de sentiment par ticker ({ticker: {date, sentiment, nb_articles}}), relu si le fichier change"""
+    path = 'articles_epures_groupes.json'
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    if mtime != _sentiment_file_state["mtime"]:
+        latest = {}
+        for item in (load_data_file(path, "de sentiment") if mtime else []):
+            current = latest.get(item['ticker'])
+            if current is None or item['published_date'] >= current['date']:
+                latest[item['ticker']] = {
+                    "date": item['published_date'],
+                    "sentiment": item['sentiment_score_mean'],
+                    "nb_articles": item['nb_articles']
+                }
+        _sentiment_file_state.update(mtime=mtime, latest=latest)
+    return _sentiment_file_state["latest"]
+
+live_feed = LiveFeed({"prices": live_price_snapshot, "sentiment": live_sentiment_rollup})
+
+@app.get("/live")
+async def live_updates():
+    """Flux SSE : événement "snapshot" à la connexion, puis "prices" / "sentiment" avec les seules valeurs modifiées"""
+    return live_feed.response()
+
+@app.on_event("shutdown")
+async def stop_live_feed():
+    await live_feed.stop()
+
 # --- Route pour récupérer l'historique d'une action spécifique (30 derniers jours) ---
 @app.get("/get_stock_history")
 def get_stock_history(
     stock: str = Query(..., description="Nom de l'action CAC40"),
-    days: int = Query(30, description="Nombre de jours d'historique")
+    days: int = Query(30, description="Nombre de jours d'historique"),
+    layout: str = Query("rows", pattern="^(rows|columnar)$", description="rows (liste d'objets) ou columnar (tableaux par colonne)")
 ):
     symbol = cac40_symbols.get(stock)
     if not symbol:
         raise HTTPException(status_code=404, detail="Action non trouvée")
 
     try:
-        # Calculer les dates pour les X derniers jours
-        from datetime import datetime, timedelta
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        # Télécharger les données
-        data = yf.download(symbol, start=start_date.strftime('%Y-%m-%d'), 
-                          end=end_date.strftime('%Y-%m-%d'))
-        
-        if data.empty:
-            raise HTTPException(status_code=404, detail="Aucune donnée trouvée pour cette période")
+        payload = build_stock_history(stock, days)
+        if layout == "columnar":
+            payload["open_prices"] = to_columnar(payload["open_prices"], rename={"open_price": "open"})
+        return ApiJSONResponse(content=payload)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        results = [{"date": str(date.date()), "open_price": round(float(row.iloc[0] if len(row) == 1 else row["Open"]), 2)}
-                   for date, row in data.iterrows()]
+def build_stock_history(stock: str, days: int = 30) -> dict:
+    """Construit l'historique des prix d'ouverture d'une action sur les X derniers jours"""
+    symbol = cac40_symbols.get(stock)
+    if not symbol:
+        raise HTTPException(status_code=404, detail="Action non trouvée")
 
-        json_result = {
-            "symbol": stock,
-            "start_date": start_date.strftime('%Y-%m-%d'),
-            "end_date": end_date.strftime('%Y-%m-%d'),
-            "days_requested": days,
-            "days_available": len(results),
-            "open_prices": results
-        }
+    # Calculer les dates pour les X derniers jours
+    from datetime import datetime, timedelta
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    
+    # Télécharger les données
+    with observe_call("yfinance"):
+        data = yf.download(symbol, start=start_date.strftime('%Y-%m-%d'), 
+                          end=end_date.strftime('%Y-%m-%d'))
+    
+    if data.empty:
+        raise HTTPException(status_code=404, detail="Aucune donnée trouvée pour cette période")
 
-        return JSONResponse(content=json_result)
+    results = [{"date": str(date.date()), "open_price": round(float(row.iloc[0] if len(row) == 1 else row["Open"]), 2)}
+               for date, row in data.iterrows()]
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "symbol": stock,
+        "start_date": start_date.strftime('%Y-%m-%d'),
+        "end_date": end_date.strftime('%Y-%m-%d'),
+        "days_requested": days,
+        "days_available": len(results),
+        "open_prices": results
+    }
 
 # --- Route pour récupérer une action spécifique (gardée pour compatibilité) ---
 @app.get("/get_open_prices")
 def get_open_prices(
     stock: str = Query(..., description="Nom de l'action CAC40"),
     start: str = Query(..., description="Date de début AAAA-MM-JJ"),
-    end: str = Query(..., description="Date de fin AAAA-MM-JJ")
+    end: str = Query(..., description="Date de fin AAAA-MM-JJ"),
+    layout: str = Query("rows", pattern="^(rows|columnar)$", description="rows (liste d'objets) ou columnar (tableaux par colonne)")
 ):
     symbol = cac40_symbols.get(stock)
     if not symbol:
@@ -179,7 +235,8 @@ def get_open_prices(
 
     try:
         # Télécharger les données
-        data = yf.download(symbol, start=start, end=end)
+        with observe_call("yfinance"):
+            data = yf.download(symbol, start=start, end=end)
         if data.empty:
             raise HTTPException(status_code=404, detail="Aucune donnée trouvée pour cette période")
 
@@ -190,11 +247,11 @@ def get_open_prices(
             "symbol": stock,
             "start_date": start,
             "end_date": end,
-            "open_prices": results
+            "open_prices": to_columnar(results, rename={"open_price": "open"}) if layout == "columnar" else results
         }
 
         # Retourner directement le JSON au lieu d'un fichier
-        return JSONResponse(content=json_result)
+        return ApiJSONResponse(content=json_result)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -203,218 +260,298 @@ def get_open_prices(
 def get_articles_data(stock_name: str = Query(..., description="Nom de l'action")):
     """Récupère les données d'articles pour une action depuis synthese_cac40_mensuelle.json"""
     try:
-        # Trouver le ticker correspondant
-        if stock_name not in cac40_symbols:
-            raise HTTPException(status_code=404, detail=f"Action '{stock_name}' non trouvée")
-        
-        ticker = cac40_symbols[stock_name]
-        
-        # Charger les données d'articles
-        try:
-            with open('synthese_cac40_mensuelle.json', 'r', encoding='utf-8') as f:
-                articles_data = json.load(f)
-        except FileNotFoundError:
-            raise HTTPException(status_code=404, detail="Fichier de données d'articles non trouvé")
-        
-        # Chercher les données pour ce ticker
-        ticker_articles = None
-        for item in articles_data:
-            if item['ticker'] == ticker:
-                ticker_articles = item
-                break
-        
-        if not ticker_articles:
-            raise HTTPException(status_code=404, detail=f"Aucune donnée d'articles trouvée pour {ticker}")
-        
-        # Retourner les articles formatés
-        return JSONResponse(content={
-            "stock_name": stock_name,
-            "ticker": ticker,
-            "articles": {
-                "positive": {
-                    "title": ticker_articles['article_plus_positif']['title'],
-                    "description": ticker_articles['article_plus_positif']['description'],
-                    "sentiment": ticker_articles['article_plus_positif']['sentiment']
-                },
-                "negative": {
-                    "title": ticker_articles['article_plus_negatif']['title'],
-                    "description": ticker_articles['article_plus_negatif']['description'],
-                    "sentiment": ticker_articles['article_plus_negatif']['sentiment']
-                },
-                "random": {
-                    "title": ticker_articles['article_random']['title'],
-                    "description": ticker_articles['article_random']['description'],
-                    "sentiment": ticker_articles['article_random']['sentiment']
-                }
-            },
-            "monthly_sentiment": ticker_articles['sentiment_moyen'],
-            "nb_articles": ticker_articles['nb_articles'],
-            "keywords": ticker_articles['mots_cles_frequents']
-        })
-        
+        return ApiJSONResponse(content=build_articles_data(stock_name))
     except Exception as e:
         print(f"Erreur lors de la récupération des articles: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def load_data_file(filename: str, label: str):
+    """Charge un fichier de données JSON local (404 si absent)"""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Fichier de données {label} non trouvé")
+
+def build_articles_data(stock_name: str, articles_data: list = None) -> dict:
+    """Construit la synthèse d'articles d'une action (articles_data : contenu déjà chargé du fichier)"""
+    # Trouver le ticker correspondant
+    if stock_name not in cac40_symbols:
+        raise HTTPException(status_code=404, detail=f"Action '{stock_name}' non trouvée")
+    
+    ticker = cac40_symbols[stock_name]
+    
+    # Charger les données d'articles
+    if articles_data is None:
+        articles_data = load_data_file('synthese_cac40_mensuelle.json', "d'articles")
+    
+    # Chercher les données pour ce ticker
+    ticker_articles = None
+    for item in articles_data:
+        if item['ticker'] == ticker:
+            ticker_articles = item
+            break
+    
+    if not ticker_articles:
+        raise HTTPException(status_code=404, detail=f"Aucune donnée d'articles trouvée pour {ticker}")
+    
+    # Retourner les articles formatés
+    return {
+        "stock_name": stock_name,
+        "ticker": ticker,
+        "articles": {
+            "positive": {
+                "title": ticker_articles['article_plus_positif']['title'],
+                "description": ticker_articles['article_plus_positif']['description'],
+                "sentiment": ticker_articles['article_plus_positif']['sentiment']
+            },
+            "negative": {
+                "title": ticker_articles['article_plus_negatif']['title'],
+                "description": ticker_articles['article_plus_negatif']['description'],
+                "sentiment": ticker_articles['article_plus_negatif']['sentiment']
+            },
+            "random": {
+                "title": ticker_articles['article_random']['title'],
+                "description": ticker_articles['article_random']['description'],
+                "sentiment": ticker_articles['article_random']['sentiment']
+            }
+        },
+        "monthly_sentiment": ticker_articles['sentiment_moyen'],
+        "nb_articles": ticker_articles['nb_articles'],
+        "keywords": ticker_articles['mots_cles_frequents']
+    }
+
 @app.get("/get_correlation_data")
 def get_correlation_data(stock_name: str = Query(..., description="Nom de l'action")):
     """Récupère les données de corrélation et projection depuis batch_corr_2025-09.json"""
     try:
-        # Trouver le ticker correspondant
-        if stock_name not in cac40_symbols:
-            raise HTTPException(status_code=404, detail=f"Action '{stock_name}' non trouvée")
-        
-        ticker = cac40_symbols[stock_name]
-        
-        # Charger les données de corrélation
-        try:
-            with open('batch_corr_2025-09.json', 'r', encoding='utf-8') as f:
-                correlation_data = json.load(f)
-        except FileNotFoundError:
-            raise HTTPException(status_code=404, detail="Fichier de données de corrélation non trouvé")
-        
-        # Chercher les données pour ce ticker
-        if ticker not in correlation_data:
-            raise HTTPException(status_code=404, detail=f"Aucune donnée de corrélation trouvée pour {ticker}")
-        
-        ticker_correlation = correlation_data[ticker]
-        
-        # Retourner les données formatées
-        return JSONResponse(content={
-            "stock_name": stock_name,
-            "ticker": ticker,
-            "correlation": {
-                "mean_correlation": ticker_correlation['mean_corr_return'],
-                "period": ticker_correlation['period'],
-                "last_date": ticker_correlation['last_date']
-            },
-            "forecast": ticker_correlation['forecast'],
-            "last_sentiment_delta": ticker_correlation.get('last_sentiment_delta', 0)
-        })
-        
+        return ApiJSONResponse(content=build_correlation_data(stock_name))
     except Exception as e:
         print(f"Erreur lors de la récupération des données de corrélation: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def build_correlation_data(stock_name: str, correlation_data: dict = None) -> dict:
+    """Construit corrélation + projection d'une action (correlation_data : contenu déjà chargé du fichier)"""
+    # Trouver le ticker correspondant
+    if stock_name not in cac40_symbols:
+        raise HTTPException(status_code=404, detail=f"Action '{stock_name}' non trouvée")
+    
+    ticker = cac40_symbols[stock_name]
+    
+    # Charger les données de corrélation
+    if correlation_data is None:
+        correlation_data = load_data_file('batch_corr_2025-09.json', "de corrélation")
+    
+    # Chercher les données pour ce ticker
+    if ticker not in correlation_data:
+        raise HTTPException(status_code=404, detail=f"Aucune donnée de corrélation trouvée pour {ticker}")
+    
+    ticker_correlation = correlation_data[ticker]
+    
+    # Retourner les données formatées
+    return {
+        "stock_name": stock_name,
+        "ticker": ticker,
+        "correlation": {
+            "mean_correlation": ticker_correlation['mean_corr_return'],
+            "period": ticker_correlation['period'],
+            "last_date": ticker_correlation['last_date']
+        },
+        "forecast": ticker_correlation['forecast'],
+        "last_sentiment_delta": ticker_correlation.get('last_sentiment_delta', 0)
+    }
+
 @app.get("/get_sentiment_data")
 def get_sentiment_data(stock_name: str = Query(..., description="Nom de l'action"), days: int = Query(30, description="Nombre de jours d'historique")):
     """Récupère les données de sentiment pour une action sur une période donnée"""
     try:
-        # Trouver le ticker correspondant
-        if stock_name not in cac40_symbols:
-            raise HTTPException(status_code=404, detail=f"Action '{stock_name}' non trouvée")
-        
-        ticker = cac40_symbols[stock_name]
-        
-        # Charger les données de sentiment
-        try:
-            with open('articles_epures_groupes.json', 'r', encoding='utf-8') as f:
-                sentiment_data = json.load(f)
-        except FileNotFoundError:
-            raise HTTPException(status_code=404, detail="Fichier de données de sentiment non trouvé")
-        
-        # Filtrer les données pour ce ticker
-        ticker_data = [item for item in sentiment_data if item['ticker'] == ticker]
-        
-        # Créer un dictionnaire pour un accès rapide par date
-        sentiment_by_date = {}
-        for item in ticker_data:
-            sentiment_by_date[item['published_date']] = {
-                'sentiment': item['sentiment_score_mean'],
-                'nb_articles': item['nb_articles']
-            }
-        
-        # Utiliser les vraies dates des données au lieu de dates récentes
-        # Trouver la date la plus récente dans les données
-        if not ticker_data:
-            raise HTTPException(status_code=404, detail=f"Aucune donnée de sentiment trouvée pour {ticker}")
-        
-        # Extraire toutes les dates et trouver la plus récente
-        all_dates = [item['published_date'] for item in ticker_data]
-        all_dates.sort()
-        latest_date_str = all_dates[-1]
-        
-        # Utiliser la date la plus récente comme point de départ
-        from datetime import datetime, timedelta
-        end_date = datetime.strptime(latest_date_str, '%Y-%m-%d')
-        start_date = end_date - timedelta(days=days)
+        return ApiJSONResponse(content=build_sentiment_data(stock_name, days))
+    except Exception as e:
+        print(f"Erreur lors de la récupération des sentiments: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def build_sentiment_data(stock_name: str, days: int = 30, sentiment_data: list = None) -> dict:
+    """Construit la série de sentiment quotidienne d'une action (sentiment_data : contenu déjà chargé du fichier)"""
+    # Trouver le ticker correspondant
+    if stock_name not in cac40_symbols:
+        raise HTTPException(status_code=404, detail=f"Action '{stock_name}' non trouvée")
+    
+    ticker = cac40_symbols[stock_name]
+    
+    # Charger les données de sentiment
+    if sentiment_data is None:
+        sentiment_data = load_data_file('articles_epures_groupes.json', "de sentiment")
+    
+    # Filtrer les données pour ce ticker
+    ticker_data = [item for item in sentiment_data if item['ticker'] == ticker]
+    
+    # Créer un dictionnaire pour un accès rapide par date
+    sentiment_by_date = {}
+    for item in ticker_data:
+        sentiment_by_date[item['published_date']] = {
+            'sentiment': item['sentiment_score_mean'],
+            'nb_articles': item['nb_articles']
+        }
+    
+    # Utiliser les vraies dates des données au lieu de dates récentes
+    # Trouver la date la plus récente dans les données
+    if not ticker_data:
+        raise HTTPException(status_code=404, detail=f"Aucune donnée de sentiment trouvée pour {ticker}")
+    
+    # Extraire toutes les dates et trouver la plus récente
+    all_dates = [item['published_date'] for item in ticker_data]
+    all_dates.sort()
+    latest_date_str = all_dates[-1]
+    
+    # Utiliser la date la plus récente comme point de départ
+    from datetime import datetime, timedelta
+    end_date = datetime.strptime(latest_date_str, '%Y-%m-%d')
+    start_date = end_date - timedelta(days=days)
+    
+    result = []
+    current_date = start_date
+    
+    while current_date <= end_date:
+        date_str = current_date.strftime('%Y-%m-%d')
         
-        result = []
-        current_date = start_date
+        # Chercher le sentiment pour cette date
+        sentiment_value = None
         
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            
-            # Chercher le sentiment pour cette date
-            sentiment_value = None
+        # 1. Chercher la date exacte
+        if date_str in sentiment_by_date:
+            sentiment_value = sentiment_by_date[date_str]['sentiment']
+        else:
+            # 2. Chercher la veille
+            yesterday = current_date - timedelta(days=1)
+            yesterday_str = yesterday.strftime('%Y-%m-%d')
             
-            # 1. Chercher la date exacte
-            if date_str in sentiment_by_date:
-                sentiment_value = sentiment_by_date[date_str]['sentiment']
+            if yesterday_str in sentiment_by_date:
+                sentiment_value = sentiment_by_date[yesterday_str]['sentiment']
             else:
-                # 2. Chercher la veille
-                yesterday = current_date - timedelta(days=1)
-                yesterday_str = yesterday.strftime('%Y-%m-%d')
-                
-                if yesterday_str in sentiment_by_date:
-                    sentiment_value = sentiment_by_date[yesterday_str]['sentiment']
-                else:
-                    # 3. Chercher dans toutes les dates disponibles (jusqu'à 30 jours)
-                    found = False
-                    for i in range(2, 31):
-                        past_date = current_date - timedelta(days=i)
-                        past_date_str = past_date.strftime('%Y-%m-%d')
-                        
-                        if past_date_str in sentiment_by_date:
-                            sentiment_value = sentiment_by_date[past_date_str]['sentiment']
-                            found = True
-                            break
+                # 3. Chercher dans toutes les dates disponibles (jusqu'à 30 jours)
+                found = False
+                for i in range(2, 31):
+                    past_date = current_date - timedelta(days=i)
+                    past_date_str = past_date.strftime('%Y-%m-%d')
                     
-                    # 4. Si toujours rien trouvé, utiliser le sentiment le plus récent disponible
-                    if not found:
-                        # Trouver le sentiment le plus récent disponible pour ce ticker
-                        available_dates = list(sentiment_by_date.keys())
-                        available_dates.sort()
-                        if available_dates:
-                            latest_available_date = available_dates[-1]
-                            sentiment_value = sentiment_by_date[latest_available_date]['sentiment']
-                        else:
-                            sentiment_value = 0.0
-            
-            result.append({
-                'date': date_str,
-                'sentiment': sentiment_value,
-                'ticker': ticker
-            })
-            
-            current_date += timedelta(days=1)
+                    if past_date_str in sentiment_by_date:
+                        sentiment_value = sentiment_by_date[past_date_str]['sentiment']
+                        found = True
+                        break
+                
+                # 4. Si toujours rien trouvé, utiliser le sentiment le plus récent disponible
+                if not found:
+                    # Trouver le sentiment le plus récent disponible pour ce ticker
+                    available_dates = list(sentiment_by_date.keys())
+                    available_dates.sort()
+                    if available_dates:
+                        latest_available_date = available_dates[-1]
+                        sentiment_value = sentiment_by_date[latest_available_date]['sentiment']
+                    else:
+                        sentiment_value = 0.0
         
-        return JSONResponse(content={
-            "stock_name": stock_name,
-            "ticker": ticker,
-            "sentiment_data": result,
-            "total_days": len(result),
-            "period": f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+        result.append({
+            'date': date_str,
+            'sentiment': sentiment_value,
+            'ticker': ticker
         })
         
+        current_date += timedelta(days=1)
+    
+    return {
+        "stock_name": stock_name,
+        "ticker": ticker,
+        "sentiment_data": result,
+        "total_days": len(result),
+        "period": f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+    }
+
+# --- Route composite : toutes les données de la vue détail en une seule requête ---
+async def _run_component(func, *args):
+    """Exécute un constructeur de payload dans un thread; une erreur devient {"error", "status_code"}"""
+    try:
+        return await asyncio.to_thread(func, *args)
+    except HTTPException as e:
+        return {"error": e.detail, "status_code": e.status_code}
     except Exception as e:
-        print(f"Erreur lors de la récupération des sentiments: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        return {"error": str(e), "status_code": 500}
+
+@app.get("/get_stock_details")
+async def get_stock_details(
+    stock_names: str = Query(..., description="Noms des actions séparés par des virgules"),
+    days: int = Query(30, description="Nombre de jours d'historique des prix"),
+    sentiment_days: int = Query(30, description="Nombre de jours d'historique du sentiment")
+):
+    """
+    Renvoie historique, sentiment, articles et corrélation pour une ou plusieurs actions.
+    Les fichiers de données sont chargés une seule fois et toutes les parties sont
+    calculées en parallèle : la latence est celle de la partie la plus lente.
+    """
+    names = [s.strip() for s in stock_names.split(",") if s.strip()]
+    unknown = [n for n in names if n not in cac40_symbols]
+    if not names or unknown:
+        raise HTTPException(status_code=404, detail=f"Action(s) non trouvée(s): {', '.join(unknown)}")
+
+    sentiment_data, articles_data, correlation_data = await asyncio.gather(
+        _run_component(load_data_file, 'articles_epures_groupes.json', "de sentiment"),
+        _run_component(load_data_file, 'synthese_cac40_mensuelle.json', "d'articles"),
+        _run_component(load_data_file, 'batch_corr_2025-09.json', "de corrélation"),
+    )
+
+    async def component(builder, data, *args):
+        # Fichier introuvable : l'erreur du chargement est renvoyée telle quelle
+        if isinstance(data, dict) and "error" in data and "status_code" in data:
+            return data
+        return await _run_component(builder, *args, data)
+
+    tasks = []
+    for name in names:
+        tasks.extend([
+            _run_component(build_stock_history, name, days),
+            component(build_sentiment_data, sentiment_data, name, sentiment_days),
+            component(build_articles_data, articles_data, name),
+            component(build_correlation_data, correlation_data, name),
+        ])
+    results = await asyncio.gather(*tasks)
+
+    stocks = {}
+    for idx, name in enumerate(names):
+        history, sentiment, articles, correlation = results[idx * 4:(idx + 1) * 4]
+        stocks[name] = {
+            "history": history,
+            "sentiment": sentiment,
+            "articles": articles,
+            "correlation": correlation
+        }
+
+    return ApiJSONResponse(content={"total_stocks": len(stocks), "stocks": stocks})
 
 # --- Routes pour servir les fichiers statiques ---
+# ETag / Last-Modified / Cache-Control + 304, variantes .gz/.br précompressées au démarrage
+static_files = StaticFileCache(["index.html", "styles.css", "script.js", "fake_data.json",
+                                "articles_epures_groupes.json", "synthese_cac40_mensuelle.json", "logo.png"])
+
+@app.on_event("startup")
+def precompress_static_files():
+    written = static_files.precompress()
+    if written:
+        print(f"Fichiers statiques précompressés: {', '.join(sorted(written))}")
+
 @app.get("/{filename}")
-async def serve_static_file(filename: str):
+async def serve_static_file(filename: str, request: Request):
     """Serve static files like HTML, CSS, JS, JSON"""
-    if filename in ["index.html", "styles.css", "script.js", "fake_data.json", 
-                   "articles_epures_groupes.json", "synthese_cac40_mensuelle.json", "logo.png"]:
-        if os.path.exists(filename):
-            return FileResponse(filename)
+    response = static_files.response(request, filename)
+    if response is not None:
+        return response
     raise HTTPException(status_code=404, detail="File not found")
 
 @app.get("/")
-async def serve_index():
+async def serve_index(request: Request):
     """Serve the main HTML file"""
-    return FileResponse("index.html")
+    response = static_files.response(request, "index.html")
+    if response is not None:
+        return response
+    raise HTTPException(status_code=404, detail="File not found")
 
 # --- Pour lancer le serveur ---
 # en ligne de commande : uvicorn main:app --reload --host 0.0.0.0 --port 8000
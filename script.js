@@ -49,6 +49,7 @@ let priceChart = null;
 let currentStockName = null;
 let sentimentData = {};
 let articlesData = {};
+let stockDetailsCache = {}; // Réponses de /get_stock_details par action
 let currentArticleUrls = {
     positive: null,
     negative: null,
@@ -77,6 +78,7 @@ function initializeApp() {
     loadFakeData();
     loadAllStocksData();
     populateSectorFilter();
+    connectLiveUpdates();
 }
 
 function setupEventListeners() {
@@ -170,6 +172,8 @@ async function loadAllStocksData(periodDays = null) {
         }
         
         allStocksData = await response.json();
+        // Les valeurs déjà reçues par le flux live sont plus récentes que la réponse
+        refreshLivePrices();
         console.log('Dernières valeurs CAC40 chargées:', allStocksData);
         
         // Afficher les stocks avec les vraies données
@@ -184,6 +188,87 @@ async function loadAllStocksData(periodDays = null) {
     }
 }
 
+// Mises à jour poussées par le serveur (SSE) : un seul producteur côté serveur quel que soit
+// le nombre d'onglets ouverts, seules les valeurs modifiées sont envoyées
+let livePrices = {};
+
+function connectLiveUpdates() {
+    if (!window.EventSource) {
+        return;
+    }
+    // EventSource se reconnecte tout seul ; chaque connexion commence par un "snapshot" complet
+    const source = new EventSource(`${API_BASE_URL}/live`);
+    source.addEventListener('snapshot', event => {
+        const snapshot = JSON.parse(event.data);
+        livePrices = {};
+        applyPriceUpdates(snapshot.prices || {});
+        applySentimentUpdates(snapshot.sentiment || {});
+    });
+    source.addEventListener('prices', event => applyPriceUpdates(JSON.parse(event.data)));
+    source.addEventListener('sentiment', event => applySentimentUpdates(JSON.parse(event.data)));
+}
+
+function applyPriceUpdates(changes) {
+    Object.entries(changes).forEach(([stockName, entry]) => {
+        if (entry === null) {
+            delete livePrices[stockName];
+        } else {
+            livePrices[stockName] = entry;
+        }
+    });
+    refreshLivePrices(Object.keys(changes));
+}
+
+// Recalcule les cartes touchées pour la période sélectionnée (variation fournie pour 7/15/30 jours)
+function refreshLivePrices(stockNames = Object.keys(livePrices)) {
+    if (!allStocksData.stocks) {
+        allStocksData.stocks = {};
+    }
+    stockNames.forEach(stockName => {
+        const entry = livePrices[stockName];
+        const change = entry ? entry.price_change[historyDays.value] : undefined;
+        if (change === undefined) {
+            return;
+        }
+        allStocksData.stocks[stockName] = {
+            symbol: entry.symbol,
+            last_price: entry.last_price,
+            price_change: change,
+            last_update: entry.last_update
+        };
+        updateStockCardPrice(stockName);
+    });
+}
+
+function updateStockCardPrice(stockName) {
+    const card = stocksGrid.querySelector(`.stock-card[data-stock-name="${CSS.escape(stockName)}"]`);
+    const data = allStocksData.stocks[stockName];
+    if (!card || !data) {
+        return;
+    }
+    const change = data.price_change || 0;
+    const changeClass = change > 0 ? 'positive' : change < 0 ? 'negative' : 'neutral';
+    card.querySelector('.stock-price').textContent = `${data.last_price.toFixed(2)} €`;
+    const changeEl = card.querySelector('.stock-change');
+    changeEl.className = `stock-change ${changeClass}`;
+    changeEl.innerHTML = `<i class="fas fa-arrow-${change > 0 ? 'up' : 'down'}"></i> ${change.toFixed(2)}%`;
+}
+
+function applySentimentUpdates(changes) {
+    Object.entries(changes).forEach(([ticker, entry]) => {
+        if (entry === null) {
+            return;
+        }
+        if (!sentimentData[ticker]) {
+            sentimentData[ticker] = {};
+        }
+        sentimentData[ticker][entry.date] = {
+            sentiment: entry.sentiment,
+            nb_articles: entry.nb_articles
+        };
+    });
+}
+
 function generateDefaultFakeData() {
     const defaultData = {};
     Object.keys(CAC40_STOCKS).forEach(stock => {
@@ -333,8 +418,12 @@ async function openStockDetail(stockName) {
     showLoading();
     
     try {
-        // Charger l'historique détaillé (30 derniers jours)
-        const historyData = await fetchStockHistory(stockName);
+        // Charger en une seule requête historique, sentiment, articles et corrélation
+        const details = await fetchStockDetails(stockName);
+        if (details.history.error) {
+            throw new Error(details.history.error);
+        }
+        const historyData = details.history;
         
         // Préparer les données pour l'affichage
         const stockInfo = CAC40_STOCKS[stockName];
@@ -379,6 +468,32 @@ async function fetchStockHistory(stockName, days = null) {
     }
 }
 
+// Récupère toutes les données de la vue détail via l'endpoint composite
+async function fetchStockDetails(stockName, days = null) {
+    const daysToFetch = days || historyDays.value;
+    
+    const response = await fetch(
+        `${API_BASE_URL}/get_stock_details?stock_names=${encodeURIComponent(stockName)}&days=${daysToFetch}`
+    );
+    
+    if (!response.ok) {
+        throw new Error(`Erreur HTTP: ${response.status}`);
+    }
+    
+    const data = await response.json();
+    stockDetailsCache[stockName] = data.stocks[stockName];
+    return stockDetailsCache[stockName];
+}
+
+// Partie déjà chargée par fetchStockDetails (null si absente ou en erreur)
+function getCachedDetail(stockName, part) {
+    const details = stockDetailsCache[stockName];
+    if (details && details[part] && !details[part].error) {
+        return details[part];
+    }
+    return null;
+}
+
 // Fonction de fallback pour compatibilité (plus utilisée)
 async function fetchStockData(stockName) {
     // Cette fonction n'est plus utilisée avec la nouvelle architecture
@@ -998,6 +1113,11 @@ function generateSparklineData(points, stockName) {
 
 // Fonction pour récupérer les données de sentiment depuis l'API
 async function fetchSentimentData(stockName, days = 30) {
+    const cached = getCachedDetail(stockName, 'sentiment');
+    if (cached && days === 30) {
+        return cached.sentiment_data;
+    }
+    
     try {
         const response = await fetch(`${API_BASE_URL}/get_sentiment_data?stock_name=${encodeURIComponent(stockName)}&days=${days}`);
         
@@ -1015,6 +1135,11 @@ async function fetchSentimentData(stockName, days = 30) {
 
 // Fonction pour récupérer les données d'articles depuis l'API
 async function fetchArticlesData(stockName) {
+    const cached = getCachedDetail(stockName, 'articles');
+    if (cached) {
+        return cached;
+    }
+    
     try {
         const response = await fetch(`${API_BASE_URL}/get_articles_data?stock_name=${encodeURIComponent(stockName)}`);
         
@@ -1032,6 +1157,11 @@ async function fetchArticlesData(stockName) {
 
 // Fonction pour récupérer les données de corrélation depuis l'API
 async function fetchCorrelationData(stockName) {
+    const cached = getCachedDetail(stockName, 'correlation');
+    if (cached) {
+        return cached;
+    }
+    
     try {
         const response = await fetch(`${API_BASE_URL}/get_correlation_data?stock_name=${encodeURIComponent(stockName)}`);
         
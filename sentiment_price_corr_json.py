@@ -5,8 +5,12 @@ Sentiment ↔ Price backend (JSON + FastAPI) — Local DB + JSON files
 -------------------------------------------------------------------
 - Prix : SQLite local ./cac40_open_prices.db (table avec colonnes: date, symbol, open_price, high_price, low_price, volume)
 - Sentiment : JSON local ./articles_epures_groupes.json (objets: ticker, published_date, sentiment_score_mean, nb_articles)
+- Intraday : barres 1m/5m d'app.intraday (./intraday) + scores article par article d'app.storage
 - Sorties : corrélations ΔSent_t ↔ Return_{t+k}, prévisions multi-horizons (rendements + chemin de prix)
-- API : /api/health, /api/correlation, /api/forecast
+- API : /api/health, /metrics, /api/correlation, /api/forecast, /api/rolling-correlation,
+        /api/contagion, /api/rollup/{series,correlation,forecast},
+        /api/panel-forecast, /api/backtest, /api/export/{prices,sentiment} (NDJSON / Arrow en flux),
+        /api/intraday/bars, /api/intraday-correlation
 
 Dépendances :
   pip install fastapi uvicorn sqlalchemy pandas numpy statsmodels
@@ -18,13 +22,23 @@ Lancer :
 from __future__ import annotations
 import os
 import json
+import hashlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 import numpy as np
 import pandas as pd
 import statsmodels.api as sm
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, bindparam, event, inspect
+
+from app import price_store, serialization
+from app.intraday import BarStore
+from app.metrics import instrumented, register_cache
+from app.result_cache import ResultCache
+from app.serialization import dumps
+from app.tickers import all_symbols, index_weights, sectors
 
 # ============================ CONFIG ============================
 
@@ -33,21 +47,60 @@ HERE = Path(__file__).resolve().parent
 class Config:
     # Fichiers locaux (même dossier que ce script)
     PRICES_DB_PATH: Path = HERE / "cac40_open_prices.db"
-    SENTI_JSON_PATH: Path = HERE / "sentiments_cac40_daily_fixed.json"
+    SENTI_JSON_PATH: Path = Path(os.getenv("DAILY_SENTIMENT_PATH", str(HERE / "sentiments_cac40_daily_fixed.json")))
 
     # SQLite URI construite depuis le chemin ci-dessus
     DB_URI: str = f"sqlite:///{PRICES_DB_PATH.as_posix()}"
 
     # Table SQLite des prix (d’après la capture)
     PRICES_TABLE: str = "cac40_open_prices"
+    # Migration automatique vers le schéma (symbol, date) WITHOUT ROWID d'app.price_store :
+    # désactivée par défaut, la base est écrite par le notebook (sinon : python -m app.price_store migrate)
+    PRICES_AUTO_MIGRATE: bool = os.getenv("PRICES_AUTO_MIGRATE", "0") == "1"
+
+    # Cache des réponses run_dict (LRU mémoire + répertoire disque optionnel, vide = désactivé)
+    RESULT_CACHE_SIZE: int = int(os.getenv("RESULT_CACHE_SIZE", "256"))
+    RESULT_CACHE_DIR: str = os.getenv("RESULT_CACHE_DIR", "")
+
+    # Significativité des corrélations : nombre de rééchantillonnages (borne le temps de calcul)
+    SIGNIFICANCE_RESAMPLES: int = int(os.getenv("CORR_SIGNIFICANCE_RESAMPLES", "1000"))
+    # Threads pour le mode batch (run_batch_dict)
+    BATCH_WORKERS: int = int(os.getenv("CORR_BATCH_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+    # Artefacts du modèle panel (ridge) persistés par version des données
+    MODEL_CACHE_DIR: Path = Path(os.getenv("MODEL_CACHE_DIR", str(HERE / ".model_cache")))
+    PANEL_RIDGE_ALPHA: float = float(os.getenv("PANEL_RIDGE_ALPHA", "10.0"))
+
+    # Barres intraday (app.intraday) : répertoire et intervalle de base stockés
+    INTRADAY_DIR: Path = Path(os.getenv("INTRADAY_DIR", str(HERE / "intraday")))
+    INTRADAY_INTERVAL: str = os.getenv("INTRADAY_INTERVAL", "1m")
 
 CFG = Config()
 
 # ============================ DATA ACCESS ============================
 
+_ENGINES: Dict[str, object] = {}
+
 def get_engine():
-    """Crée l'engine SQLAlchemy vers le SQLite local."""
-    return create_engine(CFG.DB_URI, future=True)
+    """
+    Engine SQLAlchemy vers le SQLite local, créé une fois par URI. Chaque connexion reçoit
+    les pragmas WAL/mmap ; avec PRICES_AUTO_MIGRATE=1, la table des prix est migrée à la
+    première ouverture vers le schéma géré d'app.price_store (clé (symbol, date), table de couverture).
+    """
+    engine = _ENGINES.get(CFG.DB_URI)
+    if engine is not None:
+        return engine
+    engine = create_engine(CFG.DB_URI, future=True)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", lambda dbapi_conn, _: price_store.apply_pragmas(dbapi_conn))
+        if CFG.PRICES_AUTO_MIGRATE:
+            raw = engine.raw_connection()
+            try:
+                price_store.migrate(raw.driver_connection, CFG.PRICES_TABLE)
+            finally:
+                raw.close()
+    _ENGINES[CFG.DB_URI] = engine
+    return engine
 
 def fetch_prices(engine, ticker: str, start: str, end: str) -> pd.DataFrame:
     """
@@ -76,12 +129,10 @@ def fetch_prices(engine, ticker: str, start: str, end: str) -> pd.DataFrame:
     df = df.dropna(subset=["open"]).sort_values("date").reset_index(drop=True)
     return df
 
-def fetch_sentiment_from_json(ticker: str, start: str, end: str) -> pd.DataFrame:
+def load_sentiment_frame() -> pd.DataFrame:
     """
-    Lit le fichier JSON local 'articles_epures_groupes.json' qui contient
-      { "ticker": "ACA.PA", "published_date": "2025-09-17",
-        "sentiment_score_mean": 0.6701, "nb_articles": 14 }
-    Renvoie un DataFrame (date, ticker, sentiment, mentions), agrégé par jour si doublons.
+    Charge tout le fichier JSON de sentiments (sans filtre) en DataFrame
+    (date, ticker, sentiment, mentions). DataFrame vide si fichier absent/illisible.
     """
     p = CFG.SENTI_JSON_PATH
     if not p.exists():
@@ -121,9 +172,16 @@ def fetch_sentiment_from_json(ticker: str, start: str, end: str) -> pd.DataFrame
     df["sentiment"] = pd.to_numeric(df["sentiment"], errors="coerce")
     if "mentions" in df.columns:
         df["mentions"] = pd.to_numeric(df["mentions"], errors="coerce")
+    return df
+
+
+def _filter_daily_sentiment(df: pd.DataFrame, tickers: List[str], start: str, end: str) -> pd.DataFrame:
+    """Filtre tickers/période puis agrège par jour (moyenne du score, somme des mentions)."""
+    if df.empty:
+        return df
 
     # Filtre ticker/période
-    mask = (df["ticker"] == ticker) & \
+    mask = df["ticker"].isin(tickers) & \
            (df["date"] >= pd.to_datetime(start)) & \
            (df["date"] <= pd.to_datetime(end))
     df = df.loc[mask]
@@ -136,20 +194,71 @@ def fetch_sentiment_from_json(ticker: str, start: str, end: str) -> pd.DataFrame
         agg["mentions"] = "sum"
     df = (df.groupby(["date", "ticker"], as_index=False)
             .agg(agg)
-            .sort_values("date")
+            .sort_values(["ticker", "date"])
             .reset_index(drop=True))
     return df
 
 
-def list_price_tickers(engine, start: str, end: str) -> set:
+def fetch_sentiment_from_json(ticker: str, start: str, end: str) -> pd.DataFrame:
     """
-    Renvoie l'ensemble des tickers présents dans la base PRICES entre start et end.
+    Lit le fichier JSON local 'articles_epures_groupes.json' qui contient
+      { "ticker": "ACA.PA", "published_date": "2025-09-17",
+        "sentiment_score_mean": 0.6701, "nb_articles": 14 }
+    Renvoie un DataFrame (date, ticker, sentiment, mentions), agrégé par jour si doublons.
     """
+    return _filter_daily_sentiment(load_sentiment_frame(), [ticker], start, end)
+
+
+def fetch_sentiment_many(tickers: List[str], start: str, end: str) -> pd.DataFrame:
+    """Comme fetch_sentiment_from_json pour plusieurs tickers, en une seule lecture du JSON."""
+    return _filter_daily_sentiment(load_sentiment_frame(), list(tickers), start, end)
+
+
+def fetch_prices_many(engine, tickers: List[str], start: str, end: str) -> pd.DataFrame:
+    """Comme fetch_prices pour plusieurs tickers, en une seule requête (trié par ticker puis date)."""
+    if not tickers:
+        return pd.DataFrame(columns=["date", "ticker", "open"])
     q = text(f"""
-        SELECT DISTINCT symbol AS ticker
+        SELECT
+            date,
+            symbol      AS ticker,
+            open_price  AS open
         FROM {CFG.PRICES_TABLE}
-        WHERE date BETWEEN :start AND :end
-    """)
+        WHERE symbol IN :tickers
+          AND date BETWEEN :start AND :end
+        ORDER BY symbol, date ASC
+    """).bindparams(bindparam("tickers", expanding=True))
+    with engine.connect() as conn:
+        df = pd.read_sql(q, conn, params={"tickers": list(tickers), "start": start, "end": end},
+                         parse_dates=["date"])
+    if df.empty:
+        return df
+    df["date"] = pd.to_datetime(df["date"]).dt.tz_localize(None)
+    df["open"] = pd.to_numeric(df["open"], errors="coerce")
+    return df.dropna(subset=["open"]).sort_values(["ticker", "date"]).reset_index(drop=True)
+
+
+def _has_coverage(engine) -> bool:
+    return engine.dialect.name == "sqlite" and inspect(engine).has_table(price_store.COVERAGE_TABLE)
+
+
+def list_price_tickers(engine, start: str, end: str) -> set:
+    """
+    Renvoie l'ensemble des tickers présents dans la base PRICES entre start et end.
+    """
+    if _has_coverage(engine):
+        # Table de couverture maintenue par triggers : pas de parcours de la table des prix
+        q = text(f"""
+            SELECT symbol AS ticker
+            FROM {price_store.COVERAGE_TABLE}
+            WHERE first_date <= :end AND last_date >= :start
+        """)
+    else:
+        q = text(f"""
+            SELECT DISTINCT symbol AS ticker
+            FROM {CFG.PRICES_TABLE}
+            WHERE date BETWEEN :start AND :end
+        """)
     with engine.connect() as conn:
         df = pd.read_sql(q, conn, params={"start": start, "end": end})
     if df.empty:
@@ -197,6 +306,26 @@ def list_sentiment_tickers(start: str, end: str) -> set:
     return set(df["ticker"].dropna().astype(str).unique())
 
 
+def data_version(engine=None) -> str:
+    """
+    Identifiant des données sources : date max de la table des prix + mtime/taille du
+    JSON de sentiments. Change dès qu'un nouveau jour de prix ou un nouveau fichier arrive.
+    """
+    engine = engine or get_engine()
+    if _has_coverage(engine):
+        q = text(f"SELECT MAX(last_date) || ':' || SUM(n_rows) FROM {price_store.COVERAGE_TABLE}")
+    else:
+        q = text(f"SELECT MAX(date) FROM {CFG.PRICES_TABLE}")
+    try:
+        with engine.connect() as conn:
+            max_date = conn.execute(q).scalar()
+    except Exception:
+        max_date = None
+    p = CFG.SENTI_JSON_PATH
+    senti = f"{p.stat().st_mtime_ns}:{p.stat().st_size}" if p.exists() else "absent"
+    return hashlib.sha1(f"{max_date}|{senti}".encode("utf-8")).hexdigest()[:16]
+
+
 # ============================ FEATURE ENGINEERING ============================
 
 def prep_features(prices: pd.DataFrame, senti: pd.DataFrame) -> pd.DataFrame:
@@ -215,6 +344,132 @@ def prep_features(prices: pd.DataFrame, senti: pd.DataFrame) -> pd.DataFrame:
     df = df.dropna(subset=["return", "dsent"]).reset_index(drop=True)
     return df
 
+def build_features_many(engine, tickers: List[str], start: str, end: str) -> pd.DataFrame:
+    """
+    prep_features appliqué ticker par ticker, à partir d'une seule lecture des prix
+    et des sentiments. Renvoie un DataFrame long (date, ticker, open, return, sentiment, dsent, ...).
+    """
+    prices = fetch_prices_many(engine, tickers, start, end)
+    senti = fetch_sentiment_many(tickers, start, end)
+    if prices.empty or senti.empty:
+        return pd.DataFrame(columns=["date", "ticker", "open", "return", "sentiment", "dsent"])
+
+    senti_by_ticker = {t: g.reset_index(drop=True) for t, g in senti.groupby("ticker")}
+    frames = []
+    for t, p in prices.groupby("ticker"):
+        s = senti_by_ticker.get(t)
+        if s is None:
+            continue
+        df = prep_features(p.reset_index(drop=True), s)
+        if not df.empty:
+            frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["date", "ticker", "open", "return", "sentiment", "dsent"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def pivot_panel(feats: pd.DataFrame, column: str, lead: int = 0) -> pd.DataFrame:
+    """
+    Panel (date × ticker) d'une colonne de features. Avec lead=k, la valeur en t est
+    celle de t+k dans la série propre au ticker (même convention que corr_with_leads).
+    """
+    values = feats.groupby("ticker")[column].shift(-lead) if lead else feats[column]
+    panel = (feats.assign(_v=values)
+                  .pivot_table(index="date", columns="ticker", values="_v", aggfunc="first", dropna=False))
+    return panel.sort_index()
+
+def build_panels(engine, tickers: List[str], start: str, end: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Panels alignés (date × ticker) sur le calendrier des prix :
+      - dsent : ΔSent calculé sur la série de sentiments propre à chaque ticker
+      - ret   : log-rendement (open) calculé sur la série de prix propre à chaque ticker
+    Les jours de sentiment sans cotation sont ignorés (comme l'inner join de prep_features).
+    """
+    _, dsent, ret = _aligned_panels(engine, tickers, start, end)
+    return dsent, ret
+
+
+def _aligned_panels(engine, tickers: List[str], start: str, end: str):
+    """(sentiment, dsent, ret) en panels date × ticker alignés sur le calendrier des prix."""
+    prices = fetch_prices_many(engine, tickers, start, end)
+    senti = fetch_sentiment_many(tickers, start, end)
+    if prices.empty or senti.empty:
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    prices = prices.assign(**{"return": np.log(prices["open"] / prices.groupby("ticker")["open"].shift(1))})
+    senti = senti.assign(dsent=senti.groupby("ticker")["sentiment"].diff(1))
+
+    ret = prices.pivot_table(index="date", columns="ticker", values="return", aggfunc="first", dropna=False)
+    level = (senti.pivot_table(index="date", columns="ticker", values="sentiment", aggfunc="first", dropna=False)
+                  .reindex(index=ret.index))
+    dsent = (senti.pivot_table(index="date", columns="ticker", values="dsent", aggfunc="first", dropna=False)
+                  .reindex(index=ret.index))
+    cols = sorted(set(ret.columns) & set(dsent.columns))
+    return (level.reindex(columns=cols).sort_index(),
+            dsent.reindex(columns=cols).sort_index(),
+            ret.reindex(columns=cols).sort_index())
+
+
+# ============================ ROLLUPS SECTEUR / INDICE ============================
+
+INDEX_GROUP = "CAC40"
+
+def group_weight_matrix(columns: List[str], groups: Dict[str, List[str]],
+                        weights: Dict[str, float]) -> Tuple[List[str], np.ndarray]:
+    """Matrice (N tickers × G groupes) des poids d'indice des membres de chaque groupe."""
+    names = list(groups)
+    W = np.zeros((len(columns), len(names)))
+    pos = {t: i for i, t in enumerate(columns)}
+    for g, name in enumerate(names):
+        for t in groups[name]:
+            if t in pos:
+                W[pos[t], g] = weights.get(t, 0.0)
+    return names, W
+
+
+def rollup_panel(panel: pd.DataFrame, W: np.ndarray, names: List[str]) -> pd.DataFrame:
+    """
+    Moyenne pondérée par groupe, date par date : les poids sont renormalisés sur les
+    tickers disponibles ce jour-là (NaN si aucun membre n'a de valeur).
+    """
+    values = panel.to_numpy(dtype=float)
+    mask = ~np.isnan(values)
+    num = np.where(mask, values, 0.0) @ W
+    den = mask.astype(float) @ W
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.where(den > 0, num / den, np.nan)
+    return pd.DataFrame(out, index=panel.index, columns=names)
+
+
+def build_rollups(engine, start: str, end: str) -> Dict[str, pd.DataFrame]:
+    """
+    Sentiment et rendements quotidiens agrégés par secteur et pour l'indice (pondéré),
+    à partir des panels par ticker de la table de référence.
+    """
+    tickers = all_symbols()
+    level, _, ret = _aligned_panels(engine, tickers, start, end)
+    if level.empty:
+        return {"sentiment": pd.DataFrame(), "return": pd.DataFrame()}
+    cols = list(level.columns)
+    groups = {INDEX_GROUP: cols, **sectors()}
+    names, W = group_weight_matrix(cols, groups, index_weights(cols))
+    return {"sentiment": rollup_panel(level, W, names), "return": rollup_panel(ret, W, names)}
+
+
+def rollup_features(rollups: Dict[str, pd.DataFrame], group: str) -> pd.DataFrame:
+    """
+    Features au format de prep_features pour un groupe (ticker = nom du groupe) ;
+    'open' est un niveau synthétique base 100 reconstruit depuis les rendements agrégés.
+    """
+    senti = rollups["sentiment"][group]
+    ret = rollups["return"][group]
+    df = pd.DataFrame({"date": senti.index, "ticker": group,
+                       "sentiment": senti.to_numpy(), "return": ret.to_numpy()})
+    df["open"] = 100.0 * np.exp(df["return"].fillna(0.0).cumsum())
+    df = df.dropna(subset=["sentiment"]).reset_index(drop=True)
+    df["dsent"] = df["sentiment"].diff(1)
+    return df.dropna(subset=["return", "dsent"]).reset_index(drop=True)
+
 # ============================ CORRELATIONS ============================
 
 def corr_with_leads(df: pd.DataFrame, max_lead: int = 5) -> pd.DataFrame:
@@ -226,6 +481,209 @@ def corr_with_leads(df: pd.DataFrame, max_lead: int = 5) -> pd.DataFrame:
         out.append({"lead_days": k, "corr_return": None if pd.isna(corr_r) else float(corr_r)})
     return pd.DataFrame(out)
 
+def _rowwise_corr(X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+    """Corrélation de Pearson ligne à ligne entre deux matrices (B × m)."""
+    Xc = X - X.mean(axis=1, keepdims=True)
+    Yc = Y - Y.mean(axis=1, keepdims=True)
+    den = np.sqrt((Xc * Xc).sum(axis=1) * (Yc * Yc).sum(axis=1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, (Xc * Yc).sum(axis=1) / den, np.nan)
+
+
+def block_bootstrap_indices(m: int, resamples: int, block: int, rng: np.random.Generator) -> np.ndarray:
+    """Indices (resamples × m) d'un moving-block bootstrap : blocs contigus tirés avec remise."""
+    block = max(1, min(block, m))
+    n_blocks = -(-m // block)
+    starts = rng.integers(0, m - block + 1, size=(resamples, n_blocks))
+    return (starts[:, :, None] + np.arange(block)).reshape(resamples, -1)[:, :m]
+
+
+def permutation_indices(m: int, resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """Indices (resamples × m) de permutations indépendantes de 0..m-1."""
+    return rng.permuted(np.tile(np.arange(m), (resamples, 1)), axis=1)
+
+
+def corr_significance(df: pd.DataFrame, max_lead: int = 5, resamples: int = None,
+                      block: int = None, alpha: float = 0.05, seed: int = 0) -> pd.DataFrame:
+    """
+    corr_with_leads avec significativité, pour chaque lead k :
+      - p_value : test de permutation bilatéral (Return_{t+k} permuté, ΔSent_t fixe)
+      - ci_low / ci_high : intervalle percentile d'un moving-block bootstrap des couples
+        (bloc par défaut ≈ m^(1/3), pour préserver l'autocorrélation)
+    Les rééchantillonnages sont des matrices d'indices : toutes les corrélations d'un lead
+    sont calculées en une passe vectorisée. seed fixe => résultats reproductibles.
+    """
+    resamples = resamples or CFG.SIGNIFICANCE_RESAMPLES
+    rng = np.random.default_rng(seed)
+    x_all = df["dsent"].to_numpy(dtype=float)
+    r_all = df["return"].to_numpy(dtype=float)
+    n = len(df)
+    out: List[Dict] = []
+    for k in range(max_lead + 1):
+        x, y = x_all[:max(n - k, 0)], r_all[k:]
+        ok = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[ok], y[ok]
+        m = len(x)
+        row = {"lead_days": k, "corr_return": None, "p_value": None,
+               "ci_low": None, "ci_high": None, "n_obs": int(m)}
+        if m < 3:
+            out.append(row)
+            continue
+        r = float(np.corrcoef(x, y)[0, 1])
+        if np.isnan(r):
+            out.append(row)
+            continue
+
+        perm = permutation_indices(m, resamples, rng)
+        r_perm = _rowwise_corr(np.broadcast_to(x, perm.shape), y[perm])
+        p_value = (1 + np.sum(np.abs(r_perm) >= abs(r) - 1e-12)) / (resamples + 1)
+
+        boot = block_bootstrap_indices(m, resamples, block or max(1, round(m ** (1 / 3))), rng)
+        r_boot = _rowwise_corr(x[boot], y[boot])
+        r_boot = r_boot[~np.isnan(r_boot)]
+        lo, hi = (np.quantile(r_boot, [alpha / 2, 1 - alpha / 2]) if r_boot.size else (np.nan, np.nan))
+
+        row.update({"corr_return": r, "p_value": float(p_value),
+                    "ci_low": None if np.isnan(lo) else float(lo),
+                    "ci_high": None if np.isnan(hi) else float(hi)})
+        out.append(row)
+    return pd.DataFrame(out)
+
+
+def rolling_corr_arrays(x: np.ndarray, y: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    """
+    Corrélations de Pearson glissantes sur `window` lignes, colonne par colonne, en O(n)
+    via sommes cumulées (x, y : tableaux (T, N), NaN = observation manquante).
+    Une fenêtre avec moins de `min_periods` paires valides donne NaN.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x.ndim == 1:
+        return rolling_corr_arrays(x[:, None], y[:, None], window, min_periods)[:, 0]
+    min_periods = window if min_periods is None else max(int(min_periods), 2)
+
+    valid = ~(np.isnan(x) | np.isnan(y))
+    # Centrage par colonne (moyenne des paires valides) pour limiter les erreurs d'arrondi des sommes cumulées
+    count = np.maximum(valid.sum(axis=0), 1)
+    x0 = np.where(valid, x, 0.0)
+    y0 = np.where(valid, y, 0.0)
+    x0 = np.where(valid, x0 - x0.sum(axis=0) / count, 0.0)
+    y0 = np.where(valid, y0 - y0.sum(axis=0) / count, 0.0)
+
+    def windowed(a: np.ndarray) -> np.ndarray:
+        c = np.cumsum(np.vstack([np.zeros((1, a.shape[1])), a]), axis=0)
+        return c[1:] - c[np.maximum(np.arange(1, a.shape[0] + 1) - window, 0)]
+
+    n   = windowed(valid.astype(float))
+    sx  = windowed(x0)
+    sy  = windowed(y0)
+    sxx = windowed(x0 * x0)
+    syy = windowed(y0 * y0)
+    sxy = windowed(x0 * y0)
+
+    cov = n * sxy - sx * sy
+    vx = n * sxx - sx * sx
+    vy = n * syy - sy * sy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.sqrt(vx * vy)
+    eps = 1e-12
+    corr[(n < min_periods) | (vx <= eps * np.maximum(n * sxx, 1.0)) | (vy <= eps * np.maximum(n * syy, 1.0))] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def rolling_corr_panel(feats: pd.DataFrame, window: int = 20, lead: int = 0,
+                       min_periods: int = None) -> pd.DataFrame:
+    """Corrélation glissante ΔSent_t ↔ Return_{t+lead} pour tous les tickers (panel date × ticker)."""
+    x = pivot_panel(feats, "dsent")
+    y = pivot_panel(feats, "return", lead=lead).reindex(index=x.index, columns=x.columns)
+    corr = rolling_corr_arrays(x.to_numpy(), y.to_numpy(), window, min_periods)
+    return pd.DataFrame(corr, index=x.index, columns=x.columns)
+
+def cross_lead_corr_matrix(x: np.ndarray, y: np.ndarray, max_lead: int = 5,
+                           min_obs: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Corrélations croisées corr(x_i(t), y_j(t+k)) pour toutes les paires (i, j) et k=0..max_lead,
+    par produits matriciels sur des panels (T, N) avec masques de valeurs manquantes
+    (paires complètes uniquement). Renvoie (corr (K+1, N, N), nb d'observations (K+1, N, N)).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    T, N = x.shape
+    mx = ~np.isnan(x)
+    x0 = np.where(mx, x, 0.0)
+    x0 = np.where(mx, x0 - x0.sum(axis=0) / np.maximum(mx.sum(axis=0), 1), 0.0)
+    mxf = mx.astype(float)
+    x0sq = x0 * x0
+
+    corrs = np.full((max_lead + 1, N, y.shape[1]), np.nan)
+    counts = np.zeros((max_lead + 1, N, y.shape[1]))
+    for k in range(max_lead + 1):
+        if k >= T:
+            break
+        # Aligne x(t) avec y(t+k) sur les T-k premières lignes
+        yk = y[k:]
+        xs, xsq, mxs = x0[:T - k], x0sq[:T - k], mxf[:T - k]
+        my = ~np.isnan(yk)
+        y0 = np.where(my, yk, 0.0)
+        y0 = np.where(my, y0 - y0.sum(axis=0) / np.maximum(my.sum(axis=0), 1), 0.0)
+        myf = my.astype(float)
+
+        n   = mxs.T @ myf
+        sx  = xs.T @ myf
+        sy  = mxs.T @ y0
+        sxx = xsq.T @ myf
+        syy = mxs.T @ (y0 * y0)
+        sxy = xs.T @ y0
+
+        cov = n * sxy - sx * sy
+        vx = n * sxx - sx * sx
+        vy = n * syy - sy * sy
+        with np.errstate(invalid="ignore", divide="ignore"):
+            c = cov / np.sqrt(vx * vy)
+        c[(n < min_obs) | (vx <= 1e-12) | (vy <= 1e-12)] = np.nan
+        corrs[k] = np.clip(c, -1.0, 1.0)
+        counts[k] = n
+    return corrs, counts
+
+
+def top_contagion_pairs(corrs: np.ndarray, counts: np.ndarray, tickers: List[str],
+                        top_n: int = 20, include_self: bool = False) -> List[Dict]:
+    """Les top_n paires (sentiment i → rendement j, lead k) de plus forte |corrélation|."""
+    c = corrs.copy()
+    if not include_self:
+        idx = np.arange(min(c.shape[1], c.shape[2]))
+        c[:, idx, idx] = np.nan
+    flat = np.abs(c).ravel()
+    order = np.argsort(np.where(np.isnan(flat), -1.0, flat))[::-1]
+    out = []
+    for pos in order[:top_n]:
+        if np.isnan(flat[pos]):
+            break
+        k, i, j = np.unravel_index(pos, c.shape)
+        out.append({
+            "sentiment_ticker": tickers[i],
+            "return_ticker": tickers[j],
+            "lead_days": int(k),
+            "corr_return": float(c[k, i, j]),
+            "n_obs": int(counts[k, i, j])
+        })
+    return out
+
+
+@instrumented("corr_json.contagion_dict")
+def contagion_dict(tickers: List[str], start: str, end: str, max_lead: int = 5,
+                   top_n: int = 20, min_obs: int = 10, include_self: bool = False) -> Dict:
+    """Matrice de contagion ΔSent_i ↔ Return_j(t+k) sur tous les couples, et paires les plus fortes."""
+    dsent, ret = build_panels(get_engine(), tickers, start, end)
+    out = {"period": {"start": start, "end": end}, "max_lead": max_lead, "tickers": [], "top_pairs": []}
+    if dsent.empty:
+        return out
+    corrs, counts = cross_lead_corr_matrix(dsent.to_numpy(), ret.to_numpy(), max_lead=max_lead, min_obs=min_obs)
+    cols = list(dsent.columns)
+    out["tickers"] = cols
+    out["top_pairs"] = top_contagion_pairs(corrs, counts, cols, top_n=top_n, include_self=include_self)
+    return out
+
 # ============================ PREDICTION ============================
 
 def fit_linear_prediction(df: pd.DataFrame, target: str = "return", lead: int = 1):
@@ -257,9 +715,380 @@ def multi_horizon_forecast(df: pd.DataFrame, H: int = 5) -> Tuple[float, List[fl
     price_path = last_price * np.exp(cumu)
     return last_dsent, list(preds), list(map(float, price_path))
 
+# ============================ MODÈLE PANEL (RIDGE MULTI-FACTEURS) ============================
+
+PANEL_FEATURES = ["dsent", "sentiment", "log_mentions", "ret_lag0", "ret_lag1", "ret_lag2", "sector_sentiment"]
+
+def build_panel_design(feats: pd.DataFrame, max_lead: int = 5) -> pd.DataFrame:
+    """
+    Features du modèle panel pour chaque (ticker, date), et cibles Return_{t+h} (h=1..max_lead,
+    décalage en lignes par ticker comme fit_linear_prediction) :
+      ΔSent, niveau de sentiment, log(1 + nb_articles), rendements r_t, r_{t-1}, r_{t-2},
+      sentiment moyen du secteur (pondéré par l'indice, renormalisé sur les tickers présents).
+    """
+    df = feats.sort_values(["ticker", "date"]).reset_index(drop=True)
+    g = df.groupby("ticker")["return"]
+    mentions = df["mentions"] if "mentions" in df.columns else pd.Series(0.0, index=df.index)
+    df["log_mentions"] = np.log1p(pd.to_numeric(mentions, errors="coerce").fillna(0.0).clip(lower=0))
+    df["ret_lag0"] = df["return"]
+    df["ret_lag1"] = g.shift(1)
+    df["ret_lag2"] = g.shift(2)
+
+    level = pivot_panel(df, "sentiment")
+    cols = list(level.columns)
+    groups = sectors()
+    names, W = group_weight_matrix(cols, groups, index_weights(cols))
+    sector_of = {t: name for name, members in groups.items() for t in members}
+    long = (rollup_panel(level, W, names).rename_axis("date").reset_index()
+              .melt(id_vars="date", var_name="sector", value_name="sector_sentiment"))
+    df["sector"] = df["ticker"].map(sector_of)
+    df = df.merge(long, on=["date", "sector"], how="left")
+    # Ticker hors table de référence : son propre sentiment
+    df["sector_sentiment"] = df["sector_sentiment"].fillna(df["sentiment"])
+
+    for h in range(1, max_lead + 1):
+        df[f"target_{h}"] = df.groupby("ticker")["return"].shift(-h)
+    return df
+
+
+def ridge_normal_equations(X: np.ndarray, y: np.ndarray, alpha: float) -> Tuple[float, np.ndarray]:
+    """Ridge (intercept non pénalisé) par une seule résolution de (X'X + αI) β = X'y."""
+    Xa = np.column_stack([np.ones(len(X)), X])
+    A = Xa.T @ Xa
+    A[1:, 1:] += alpha * np.eye(X.shape[1])
+    beta = np.linalg.solve(A, Xa.T @ y)
+    return float(beta[0]), beta[1:]
+
+
+@instrumented("corr_json.fit_panel_ridge")
+def fit_panel_ridge(feats: pd.DataFrame, max_lead: int = 5, alpha: float = None) -> Dict:
+    """
+    Ajuste le modèle panel (tous tickers poolés) pour h = 1..max_lead sur des features
+    standardisées. Renvoie un artefact JSON-sérialisable : coefficients par horizon et
+    dernier vecteur de features de chaque ticker, pour que la prévision soit un produit scalaire.
+    """
+    alpha = CFG.PANEL_RIDGE_ALPHA if alpha is None else alpha
+    df = build_panel_design(feats, max_lead=max_lead)
+    X_all = df[PANEL_FEATURES].to_numpy(dtype=float)
+    ok_x = ~np.isnan(X_all).any(axis=1)
+    if ok_x.sum() < len(PANEL_FEATURES) + 2:
+        return {"error": "Données insuffisantes pour le modèle panel."}
+
+    mean = X_all[ok_x].mean(axis=0)
+    std = X_all[ok_x].std(axis=0)
+    std[std == 0] = 1.0
+    Z_all = (X_all - mean) / std
+
+    horizons = {}
+    for h in range(1, max_lead + 1):
+        y_all = df[f"target_{h}"].to_numpy(dtype=float)
+        ok = ok_x & ~np.isnan(y_all)
+        if ok.sum() < len(PANEL_FEATURES) + 2:
+            continue
+        Z, y = Z_all[ok], y_all[ok]
+        intercept, coef = ridge_normal_equations(Z, y, alpha)
+        resid = y - (intercept + Z @ coef)
+        tss = float(((y - y.mean()) ** 2).sum())
+        horizons[str(h)] = {
+            "intercept": intercept,
+            "coef": coef.tolist(),
+            "n_obs": int(ok.sum()),
+            "r2_in_sample": float(1 - (resid ** 2).sum() / tss) if tss > 0 else None,
+        }
+
+    latest = {}
+    for t, g in df[ok_x].groupby("ticker"):
+        last = g.iloc[-1]
+        latest[t] = {
+            "date": str(pd.to_datetime(last["date"]).date()),
+            "open": float(last["open"]),
+            "z": ((last[PANEL_FEATURES].to_numpy(dtype=float) - mean) / std).tolist(),
+        }
+
+    return {
+        "features": PANEL_FEATURES,
+        "alpha": alpha,
+        "mean": mean.tolist(),
+        "std": std.tolist(),
+        "horizons": horizons,
+        "latest": latest,
+        "n_tickers": int(df["ticker"].nunique()),
+    }
+
+
+_PANEL_MODELS = ResultCache(max_entries=16, disk_dir=str(CFG.MODEL_CACHE_DIR))
+register_cache("panel_model", _PANEL_MODELS)
+
+def get_panel_model(start: str, end: str, max_lead: int = 5, alpha: float = None) -> Dict:
+    """
+    Artefact du modèle panel pour (période, max_lead, alpha, version des données) :
+    mémoire, puis disque (CFG.MODEL_CACHE_DIR), sinon ajustement puis persistance.
+    """
+    alpha = CFG.PANEL_RIDGE_ALPHA if alpha is None else alpha
+    engine = get_engine()
+    version = data_version(engine)
+
+    def fit() -> Dict:
+        tickers = sorted(set(all_symbols()) | list_sentiment_tickers(start, end))
+        model = fit_panel_ridge(build_features_many(engine, tickers, start, end), max_lead=max_lead, alpha=alpha)
+        model.update({"period": {"start": start, "end": end}, "data_version": version})
+        return model
+
+    return _PANEL_MODELS.get_or_compute(("panel", start, end, max_lead, alpha, version), fit)
+
+
+@instrumented("corr_json.panel_forecast_dict")
+def panel_forecast_dict(ticker: str, start: str, end: str, H: int = 5, alpha: float = None) -> Dict:
+    """Prévision R̂_{t+1..t+H} d'un ticker avec le modèle panel (produit scalaire sur l'artefact)."""
+    model = get_panel_model(start, end, max_lead=H, alpha=alpha)
+    if "error" in model:
+        return {**model, "ticker": ticker, "period": {"start": start, "end": end}}
+    latest = model["latest"].get(ticker)
+    if latest is None:
+        return {"error": "Ticker absent du modèle panel pour la période demandée.", "ticker": ticker,
+                "period": {"start": start, "end": end}, "available": sorted(model["latest"])}
+
+    z = np.asarray(latest["z"])
+    preds, horizons = [], []
+    for h in range(1, H + 1):
+        m_h = model["horizons"].get(str(h))
+        if m_h is None:
+            break
+        preds.append(float(m_h["intercept"] + z @ np.asarray(m_h["coef"])))
+        horizons.append({"horizon": h, "n_obs": m_h["n_obs"], "r2_in_sample": m_h["r2_in_sample"],
+                         "coefficients": dict(zip(model["features"], m_h["coef"]))})
+    price_path = latest["open"] * np.exp(np.cumsum(preds))
+    return {
+        "ticker": ticker,
+        "period": model["period"],
+        "data_version": model["data_version"],
+        "alpha": model["alpha"],
+        "last_date": latest["date"],
+        "forecast": [
+            {"horizon": h + 1, "predicted_return": preds[h], "predicted_price": float(price_path[h])}
+            for h in range(len(preds))
+        ],
+        "model": {"n_tickers": model["n_tickers"], "features": model["features"], "horizons": horizons},
+    }
+
+
+# ============================ BACKTEST (WALK-FORWARD) ============================
+
+def walk_forward_predictions(df: pd.DataFrame, max_lead: int = 5, min_train: int = 20) -> pd.DataFrame:
+    """
+    Backtest walk-forward du modèle de fit_linear_prediction, pour un ticker.
+
+    À chaque ligne t et pour chaque horizon h, l'OLS Return_{j+h} ~ α + β·ΔSent_j est
+    réestimé sur les seuls couples déjà réalisés en t (j + h <= t), puis appliqué à ΔSent_t ;
+    la prévision est comparée au Return_{t+h} réalisé. Les refits utilisent les sommes
+    cumulées (n, Σx, Σy, Σx², Σxy) : O(n) par horizon au lieu d'un OLS statsmodels par date.
+    """
+    x = df["dsent"].to_numpy(dtype=float)
+    r = df["return"].to_numpy(dtype=float)
+    dates = df["date"].to_numpy()
+    n = len(df)
+    frames = []
+    for h in range(1, max_lead + 1):
+        if n <= h:
+            break
+        # Couple j : (x_j, r_{j+h}), connu à partir de la ligne j + h
+        xj, yj = x[:n - h], r[h:]
+        ok = ~(np.isnan(xj) | np.isnan(yj))
+        xj0, yj0 = np.where(ok, xj, 0.0), np.where(ok, yj, 0.0)
+        cum = np.cumsum(np.vstack([ok.astype(float), xj0, yj0, xj0 * xj0, xj0 * yj0]), axis=1)
+
+        # Prévision en t = h .. n-h-1 (il faut un réalisé en t+h) avec les couples j <= t - h
+        t = np.arange(h, n - h)
+        if t.size == 0:
+            continue
+        cnt, sx, sy, sxx, sxy = cum[:, t - h]
+        var = cnt * sxx - sx * sx
+        with np.errstate(invalid="ignore", divide="ignore"):
+            beta = np.where(var > 0, (cnt * sxy - sx * sy) / var, np.nan)
+            alpha = (sy - beta * sx) / cnt
+        pred = alpha + beta * x[t]
+        keep = (cnt >= min_train) & ~np.isnan(pred) & ~np.isnan(r[t + h])
+        frames.append(pd.DataFrame({
+            "date": dates[t][keep],
+            "horizon": h,
+            "dsent": x[t][keep],
+            "predicted_return": pred[keep],
+            "realized_return": r[t + h][keep],
+            "n_train": cnt[keep].astype(int),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=["date", "horizon", "dsent", "predicted_return", "realized_return", "n_train"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def walk_forward_many(feats: pd.DataFrame, max_lead: int = 5, min_train: int = 20) -> pd.DataFrame:
+    """walk_forward_predictions sur chaque ticker d'un DataFrame long de build_features_many."""
+    frames = []
+    for t, g in feats.groupby("ticker"):
+        preds = walk_forward_predictions(g.reset_index(drop=True), max_lead=max_lead, min_train=min_train)
+        if not preds.empty:
+            frames.append(preds.assign(ticker=t))
+    if not frames:
+        return pd.DataFrame(columns=["date", "ticker", "horizon", "dsent", "predicted_return",
+                                     "realized_return", "n_train"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def backtest_metrics(preds: pd.DataFrame, periods_per_year: int = 252) -> Dict:
+    """
+    Métriques d'une série de prévisions (un horizon) :
+      - hit_rate : part des signes corrects (réalisés nuls exclus)
+      - rmse, ic (corrélation de rang prévision ↔ réalisé, toutes dates confondues)
+      - ic_cross_sectional : moyenne par date de l'IC entre tickers (>= 3 tickers)
+      - PnL de la règle long/short sign(prévision), équipondérée entre tickers chaque jour
+    """
+    if preds.empty:
+        return {"n_predictions": 0}
+    p = preds["predicted_return"].to_numpy()
+    y = preds["realized_return"].to_numpy()
+    nz = y != 0
+    ic = pd.Series(p).corr(pd.Series(y), method="spearman") if len(p) > 2 else np.nan
+
+    ic_xs = np.nan
+    if "ticker" in preds.columns:
+        by_date = preds[preds.groupby("date")["date"].transform("size") >= 3]
+        if not by_date.empty:
+            grp = by_date.groupby("date")
+            rp = grp["predicted_return"].rank() - grp["predicted_return"].transform("size").add(1) / 2
+            ry = grp["realized_return"].rank() - grp["realized_return"].transform("size").add(1) / 2
+            sums = pd.DataFrame({"date": by_date["date"], "xy": rp * ry, "xx": rp * rp, "yy": ry * ry}) \
+                     .groupby("date").sum()
+            ic_xs = (sums["xy"] / np.sqrt(sums["xx"] * sums["yy"])).replace([np.inf, -np.inf], np.nan).mean()
+
+    daily = (preds.assign(pnl=np.sign(p) * y).groupby("date")["pnl"].mean().sort_index())
+    std = daily.std()
+    return {
+        "n_predictions": int(len(preds)),
+        "hit_rate": float((np.sign(p[nz]) == np.sign(y[nz])).mean()) if nz.any() else None,
+        "rmse": float(np.sqrt(np.mean((p - y) ** 2))),
+        "ic": None if pd.isna(ic) else float(ic),
+        "ic_cross_sectional": None if pd.isna(ic_xs) else float(ic_xs),
+        "pnl_total": float(daily.sum()),
+        "pnl_mean_daily": float(daily.mean()),
+        "pnl_sharpe": float(daily.mean() / std * np.sqrt(periods_per_year)) if std and std > 0 else None,
+        "n_days": int(len(daily)),
+    }
+
+
+# ============================ INTRADAY ============================
+
+def get_bar_store() -> BarStore:
+    return BarStore(str(CFG.INTRADAY_DIR), CFG.INTRADAY_INTERVAL)
+
+
+def fetch_intraday_bars(ticker: str, start: str, end: str, bar: str = None, store: BarStore = None) -> pd.DataFrame:
+    """
+    Barres intraday (date, ticker, open, high, low, close, volume) sur [start, end] (jours inclus),
+    ré-échantillonnées à la taille `bar` (ex: "5m", "15m", "1h") au moment de la requête.
+    date = début de la barre, UTC naïf. Lève ValueError si `bar` n'est pas un multiple de l'intervalle stocké.
+    """
+    df = (store or get_bar_store()).read(ticker, start, end, bar=bar).reset_index()
+    df.insert(1, "ticker", ticker)
+    return df
+
+
+def fetch_sentiment_events(ticker: str, start: str, end: str, repository=None) -> pd.DataFrame:
+    """
+    Scores article par article (date, ticker, sentiment) du dépôt news/sentiments (app.storage),
+    horodatés à la publication (UTC naïf), triés par date.
+    """
+    if repository is None:
+        from app.storage import get_repository
+        repository = get_repository()
+    last = pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    docs = repository.find_sentiments(ticker, pd.Timestamp(start).to_pydatetime(), last.to_pydatetime())
+    df = pd.DataFrame([{"date": d.get("date"), "ticker": ticker, "sentiment": d.get("sentiment_score")} for d in docs],
+                      columns=["date", "ticker", "sentiment"])
+    if df.empty:
+        return df
+    df["date"] = pd.to_datetime(df["date"], errors="coerce", utc=True).dt.tz_localize(None)
+    df["sentiment"] = pd.to_numeric(df["sentiment"], errors="coerce")
+    return df.dropna(subset=["date", "sentiment"]).sort_values("date").reset_index(drop=True)
+
+
+def align_to_next_bar(bar_starts: np.ndarray, event_times: np.ndarray) -> np.ndarray:
+    """
+    Indice de la barre qui suit chaque événement : la première barre qui commence à l'heure
+    de publication ou après (la barre déjà ouverte est exclue, elle mêle l'avant et l'après).
+    Une news publiée hors séance tombe sur la première barre de la séance suivante ;
+    -1 si aucune barre ne suit.
+    """
+    bar_starts = np.asarray(bar_starts).astype("datetime64[ns]")
+    idx = np.searchsorted(bar_starts, np.asarray(event_times).astype("datetime64[ns]"), side="left")
+    return np.where(idx < len(bar_starts), idx, -1)
+
+
+def prep_intraday_features(bars: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Une ligne par barre (grille complète, triée par date) :
+      - return    : log(close / close de la barre précédente) ; la première barre d'une séance
+                    porte le gap de nuit, là où tombent les news publiées hors séance
+      - sentiment : score moyen des articles alignés sur la barre (align_to_next_bar), NaN sinon
+      - mentions  : nombre d'articles alignés
+      - dsent     : variation du sentiment d'une barre avec news à la suivante (NaN sans news)
+    Avec cette grille, corr_with_leads / corr_significance donnent ΔSent_b ↔ Return_{b+k} en barres.
+    """
+    feats = bars.sort_values("date").reset_index(drop=True)
+    feats["return"] = np.log(feats["close"] / feats["close"].shift(1))
+    idx = align_to_next_bar(feats["date"].to_numpy(), events["date"].to_numpy()) if not events.empty \
+        else np.empty(0, dtype=int)
+    aligned = events.loc[idx >= 0].assign(bar=idx[idx >= 0])
+    per_bar = aligned.groupby("bar").agg(sentiment=("sentiment", "mean"), mentions=("sentiment", "size"))
+    per_bar["dsent"] = per_bar["sentiment"].diff(1)
+    feats = feats.join(per_bar)
+    feats["mentions"] = feats["mentions"].fillna(0).astype(int)
+    return feats
+
+
+@instrumented("corr_json.intraday_dict")
+def intraday_dict(ticker: str, start: str, end: str, bar: str = "5m", max_lead: int = 12,
+                  significance: bool = False, resamples: int = None,
+                  store: BarStore = None, repository=None) -> Dict:
+    """
+    Comme run_dict (corrélations par lead) sur barres intraday : ΔSent au moment des news
+    ↔ rendement des barres suivantes, leads exprimés en barres de taille `bar`.
+    """
+    period = {"start": start, "end": end}
+    bars = fetch_intraday_bars(ticker, start, end, bar=bar, store=store)
+    if bars.empty:
+        return {"error": "Pas de barres intraday pour ce ticker/période.", "ticker": ticker, "period": period}
+    events = fetch_sentiment_events(ticker, start, end, repository=repository)
+    if events.empty:
+        return {"error": "Pas de sentiment par article pour ce ticker/période.", "ticker": ticker, "period": period}
+
+    feats = prep_intraday_features(bars, events)
+    if feats["dsent"].notna().sum() < 3:
+        return {"error": "Données insuffisantes après alignement sur les barres.", "ticker": ticker, "period": period}
+
+    if significance:
+        cdf = corr_significance(feats, max_lead=max_lead, resamples=resamples)
+    else:
+        cdf = corr_with_leads(feats, max_lead=max_lead)
+    cdf = cdf.rename(columns={"lead_days": "lead_bars"})
+    vals = [x for x in cdf["corr_return"] if x is not None]
+    return {
+        "ticker": ticker,
+        "period": period,
+        "bar": bar or CFG.INTRADAY_INTERVAL,
+        "n_bars": int(len(feats)),
+        "n_events": int(len(events)),
+        "n_aligned": int(feats["mentions"].sum()),
+        "last_bar": feats["date"].iloc[-1].isoformat(),
+        "mean_corr_return": float(pd.Series(vals).mean()) if vals else None,
+        "lead_corrs": cdf.to_dict(orient="records"),
+    }
+
+
 # ============================ CORE (DICT / JSON) ============================
 
-def run_dict(ticker: str, start: str, end: str, max_lead: int = 5) -> Dict:
+@instrumented("corr_json.run_dict")
+def run_dict(ticker: str, start: str, end: str, max_lead: int = 5,
+             significance: bool = False, resamples: int = None) -> Dict:
     engine = get_engine()
 
     # Vérifie que le ticker existe dans les DEUX sources sur la période
@@ -293,8 +1122,11 @@ def run_dict(ticker: str, start: str, end: str, max_lead: int = 5) -> Dict:
             "ticker": ticker, "period": {"start": start, "end": end}
         }
 
-    # Corrélations
-    cdf = corr_with_leads(df, max_lead=max_lead)
+    # Corrélations (avec p-values / IC si demandé)
+    if significance:
+        cdf = corr_significance(df, max_lead=max_lead, resamples=resamples)
+    else:
+        cdf = corr_with_leads(df, max_lead=max_lead)
     vals = [x for x in cdf["corr_return"] if x is not None]
     mean_corr = float(pd.Series(vals).mean()) if vals else None
 
@@ -315,20 +1147,155 @@ def run_dict(ticker: str, start: str, end: str, max_lead: int = 5) -> Dict:
     }
     return payload
 
-def run_json(ticker: str, start: str, end: str, max_lead: int = 5) -> str:
-    return json.dumps(run_dict(ticker, start, end, max_lead), indent=2, ensure_ascii=False)
+_RESULTS = ResultCache(max_entries=CFG.RESULT_CACHE_SIZE, disk_dir=CFG.RESULT_CACHE_DIR or None)
+register_cache("run_dict", _RESULTS)
 
-def run_batch_dict(tickers: List[str], start: str, end: str, max_lead: int = 5) -> Dict[str, Dict]:
+def cached_run_dict(ticker: str, start: str, end: str, max_lead: int = 5,
+                    significance: bool = False, resamples: int = None) -> Dict:
     """
-    Exécute run_dict pour une liste de tickers.
-    Retourne un dict {ticker: payload_ou_error}.
+    run_dict mémoïsé par (paramètres, version des données) : deux requêtes identiques sur
+    les mêmes données ne relisent ni la DB ni le JSON, et les requêtes concurrentes
+    identiques ne déclenchent qu'un seul calcul.
     """
-    out = {}
-    for t in tickers:
+    key = ("run_dict", ticker, start, end, max_lead, significance, resamples, data_version())
+    return _RESULTS.get_or_compute(key, lambda: run_dict(ticker, start, end, max_lead,
+                                                         significance=significance, resamples=resamples))
+
+def run_json(ticker: str, start: str, end: str, max_lead: int = 5, compact: bool = None) -> str:
+    """
+    JSON indenté (indent=2) par défaut. Sortie compacte via dumps() sur demande :
+    compact=True, ou API_FAST_JSON=1 quand compact n'est pas précisé.
+    """
+    payload = run_dict(ticker, start, end, max_lead)
+    if compact is None:
+        compact = serialization.FAST_JSON_ENABLED
+    if compact:
+        return dumps(payload).decode("utf-8")
+    return json.dumps(payload, indent=2, ensure_ascii=False)
+
+@instrumented("corr_json.run_batch_dict")
+def run_batch_dict(tickers: List[str], start: str, end: str, max_lead: int = 5,
+                   significance: bool = False, resamples: int = None, workers: int = None) -> Dict[str, Dict]:
+    """
+    Exécute run_dict pour une liste de tickers, en parallèle sur `workers` threads
+    (défaut CFG.BATCH_WORKERS ; NumPy libère le GIL pendant les rééchantillonnages).
+    Retourne un dict {ticker: payload_ou_error} dans l'ordre des tickers.
+    """
+    def one(t: str) -> Dict:
         try:
-            out[t] = run_dict(t, start, end, max_lead)
+            return run_dict(t, start, end, max_lead, significance=significance, resamples=resamples)
         except Exception as e:
-            out[t] = {"error": f"Exception: {e}", "ticker": t, "period": {"start": start, "end": end}}
+            return {"error": f"Exception: {e}", "ticker": t, "period": {"start": start, "end": end}}
+
+    workers = workers or CFG.BATCH_WORKERS
+    if workers <= 1 or len(tickers) <= 1:
+        return {t: one(t) for t in tickers}
+    # Une copie du contexte par tâche : les spans de trace des threads restent rattachés à l'appel
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, one, t) for t in tickers]
+        return {t: f.result() for t, f in zip(tickers, futures)}
+
+
+@instrumented("corr_json.rolling_corr_dict")
+def rolling_corr_dict(tickers: List[str], start: str, end: str, window: int = 20, lead: int = 1,
+                      min_periods: int = None) -> Dict:
+    """
+    Séries temporelles des corrélations glissantes ΔSent_t ↔ Return_{t+lead} par ticker.
+    La fenêtre porte sur les dates du panel ; min_periods (défaut : window // 2, au moins 3,
+    au plus window) tolère les jours sans article. ValueError si min_periods > window :
+    la série serait entièrement nulle.
+    """
+    if min_periods is None:
+        min_periods = min(max(3, window // 2), window)
+    if min_periods > window:
+        raise ValueError(f"min_periods ({min_periods}) doit être <= window ({window})")
+    feats = build_features_many(get_engine(), tickers, start, end)
+    out = {
+        "period": {"start": start, "end": end},
+        "window": window,
+        "min_periods": min_periods,
+        "lead_days": lead,
+        "series": {},
+        "missing": []
+    }
+    if feats.empty:
+        out["missing"] = sorted(tickers)
+        return out
+
+    panel = rolling_corr_panel(feats, window=window, lead=lead, min_periods=min_periods)
+    present_panel = pivot_panel(feats, "dsent").notna()
+    dates = [str(d.date()) for d in panel.index]
+    for t in tickers:
+        if t not in panel.columns:
+            out["missing"].append(t)
+            continue
+        col = panel[t].to_numpy()
+        present = present_panel[t].to_numpy()
+        out["series"][t] = [
+            {"date": d, "corr_return": None if np.isnan(v) else float(v)}
+            for d, v, ok in zip(dates, col, present) if ok
+        ]
+    return out
+
+
+@instrumented("corr_json.rollup_dict")
+def rollup_dict(group: str, start: str, end: str, max_lead: int = 5) -> Dict:
+    """Corrélations et prévisions (comme run_dict) au niveau d'un secteur ou de l'indice."""
+    rollups = build_rollups(get_engine(), start, end)
+    groups = list(rollups["sentiment"].columns)
+    if group not in groups:
+        return {"error": "Groupe indisponible pour la période demandée.", "group": group,
+                "period": {"start": start, "end": end}, "available_groups": groups}
+
+    df = rollup_features(rollups, group)
+    if len(df) < 3:
+        return {"error": "Données insuffisantes après alignement/NaN.", "group": group,
+                "period": {"start": start, "end": end}}
+
+    cdf = corr_with_leads(df, max_lead=max_lead)
+    vals = [x for x in cdf["corr_return"] if x is not None]
+    last_dsent, preds, prices_f = multi_horizon_forecast(df, H=max_lead)
+    return {
+        "group": group,
+        "members": sectors().get(group, all_symbols()),
+        "period": {"start": start, "end": end},
+        "last_date": str(pd.to_datetime(df["date"].iloc[-1]).date()),
+        "mean_corr_return": float(pd.Series(vals).mean()) if vals else None,
+        "lead_corrs": cdf.to_dict(orient="records"),
+        "last_sentiment_delta": last_dsent,
+        "forecast": [
+            {"horizon": h+1, "predicted_return": float(preds[h]), "predicted_level": float(prices_f[h])}
+            for h in range(len(preds))
+        ],
+    }
+
+
+@instrumented("corr_json.backtest_dict")
+def backtest_dict(tickers: List[str], start: str, end: str, max_lead: int = 5, min_train: int = 20,
+                  include_predictions: bool = False) -> Dict:
+    """Backtest walk-forward multi-tickers : métriques globales et par ticker, pour chaque horizon."""
+    feats = build_features_many(get_engine(), tickers, start, end)
+    preds = walk_forward_many(feats, max_lead=max_lead, min_train=min_train)
+    out = {
+        "period": {"start": start, "end": end},
+        "max_lead": max_lead,
+        "min_train": min_train,
+        "tickers": sorted(preds["ticker"].unique()) if not preds.empty else [],
+        "missing": sorted(set(tickers) - set(preds["ticker"])) if not preds.empty else sorted(tickers),
+        "horizons": [],
+        "by_ticker": {},
+    }
+    if preds.empty:
+        return out
+
+    for h, g in preds.groupby("horizon"):
+        out["horizons"].append({"horizon": int(h), **backtest_metrics(g)})
+    for t, g in preds.groupby("ticker"):
+        out["by_ticker"][t] = [{"horizon": int(h), **backtest_metrics(gh.drop(columns="ticker"))}
+                               for h, gh in g.groupby("horizon")]
+    if include_predictions:
+        rows = preds.assign(date=preds["date"].astype(str).str[:10])
+        out["predictions"] = rows.to_dict(orient="records")
     return out
 
 
@@ -343,13 +1310,215 @@ def discover_common_tickers(start: str, end: str) -> List[str]:
     return sorted(price_tks & senti_tks)
 
 
+# ============================ EXPORT (STREAMING) ============================
+
+EXPORT_CHUNK_ROWS = 5000
+
+# Schéma Arrow fixe par export : un premier paquet aux colonnes toutes nulles ne fige pas leur type
+EXPORT_FIELDS: Dict[str, List[Tuple[str, str]]] = {
+    "prices":    [("ticker", "string"), ("date", "string"), ("open", "float64")],
+    "sentiment": [("ticker", "string"), ("date", "string"), ("sentiment", "float64"), ("mentions", "int64")],
+}
+
+def iter_price_rows(engine, tickers: List[str], start: str, end: str,
+                    chunk_size: int = EXPORT_CHUNK_ROWS) -> Iterator[List[dict]]:
+    """
+    Parcourt la table des prix par paquets de `chunk_size` lignes (curseur côté serveur),
+    sans jamais matérialiser tout le résultat. Liste de tickers vide = tous les tickers.
+    """
+    where = "date BETWEEN :start AND :end"
+    params = {"start": start, "end": end}
+    if tickers:
+        where += " AND symbol IN :tickers"
+        params["tickers"] = list(tickers)
+    q = text(f"""
+        SELECT symbol AS ticker, date, open_price AS open
+        FROM {CFG.PRICES_TABLE}
+        WHERE {where}
+        ORDER BY symbol, date
+    """)
+    if tickers:
+        q = q.bindparams(bindparam("tickers", expanding=True))
+
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(q, params)
+        while True:
+            rows = result.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [{"ticker": r.ticker, "date": str(r.date)[:10], "open": r.open} for r in rows]
+
+
+def iter_sentiment_records(path: Path, read_size: int = 1 << 16) -> Iterator[dict]:
+    """
+    Lit le JSON de sentiments (liste d'objets) objet par objet, sans charger
+    le fichier complet en mémoire.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(read_size)
+        if buf.lstrip().startswith("{"):
+            # Enveloppe {"data": [...]} ou objet unique : format rare, chargé d'un bloc
+            payload = json.loads(buf + f.read())
+            items = payload.get("data", payload)
+            yield from (items if isinstance(items, list) else [items])
+            return
+        if "[" not in buf:
+            return
+        pos = buf.index("[") + 1
+        eof = False
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                obj, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Objet coupé en fin de tampon : on lit la suite
+                if eof:
+                    return
+                chunk = f.read(read_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            if isinstance(obj, dict):
+                yield obj
+            if pos > read_size:
+                buf, pos = buf[pos:], 0
+
+
+def _first_present(rec: dict, *keys):
+    """Valeur de la première clé présente et non nulle (0 et 0.0 sont des valeurs légitimes)."""
+    for k in keys:
+        v = rec.get(k)
+        if v is not None:
+            return v
+    return None
+
+
+def sentiment_export_row(rec: dict) -> dict | None:
+    """Ligne d'export d'un enregistrement de sentiment, ou None si ticker, date ou score manquent."""
+    tck = _first_present(rec, "ticker", "symbol")
+    dte = _first_present(rec, "published_date", "date")
+    sc  = _first_present(rec, "sentiment_score_mean", "sentiment_mean", "sentiment", "score")
+    if tck is None or dte is None or sc is None:
+        return None
+    return {"ticker": tck, "date": str(dte)[:10], "sentiment": sc,
+            "mentions": _first_present(rec, "nb_articles", "mentions")}
+
+
+def iter_sentiment_rows(tickers: List[str], start: str, end: str,
+                        chunk_size: int = EXPORT_CHUNK_ROWS) -> Iterator[List[dict]]:
+    """Parcourt les sentiments quotidiens filtrés (tickers/période) par paquets de `chunk_size`."""
+    p = CFG.SENTI_JSON_PATH
+    if not p.exists():
+        return
+    wanted = set(tickers) if tickers else None
+    chunk: List[dict] = []
+    for rec in iter_sentiment_records(p):
+        row = sentiment_export_row(rec)
+        if row is None:
+            continue
+        if wanted is not None and row["ticker"] not in wanted:
+            continue
+        if not (start <= row["date"] <= end):
+            continue
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ndjson_stream(chunks: Iterable[List[dict]]) -> Iterator[bytes]:
+    """Sérialise des paquets de lignes en NDJSON (une ligne JSON par enregistrement)."""
+    for rows in chunks:
+        yield "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+
+
+class _ChunkSink:
+    """Fichier en écriture minimal qui accumule les octets produits par pyarrow."""
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.closed = False
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+    def flush(self):
+        pass
+    def close(self):
+        self.closed = True
+    def drain(self) -> bytes:
+        out = b"".join(self.parts)
+        self.parts = []
+        return out
+
+
+def arrow_stream(chunks: Iterable[List[dict]], fields: List[Tuple[str, str]]) -> Iterator[bytes]:
+    """
+    Sérialise des paquets de lignes en flux Arrow IPC (un RecordBatch par paquet),
+    selon le schéma `fields` (paires nom/type Arrow, cf. EXPORT_FIELDS).
+    """
+    import pyarrow as pa
+
+    schema = pa.schema([(name, pa.type_for_alias(typ)) for name, typ in fields])
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    for rows in chunks:
+        writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_self_check() -> List[str]:
+    """
+    Vérifie l'export : scores à 0.0 et mentions à 0 conservés, flux Arrow sur plusieurs
+    paquets (dont un premier paquet aux mentions toutes nulles) relu à l'identique.
+    Renvoie la liste des échecs (vide = OK).
+    """
+    failures = []
+    recs = [{"ticker": "BNP.PA", "published_date": "2025-09-18", "sentiment_score_mean": 0.0, "nb_articles": 0},
+            {"symbol": "ACA.PA", "date": "2025-09-19T08:00:00", "sentiment": 0.4},
+            {"ticker": "GLE.PA", "published_date": "2025-09-22", "sentiment_score_mean": -0.25, "nb_articles": 3}]
+    rows = [sentiment_export_row(r) for r in recs]
+    expected = [{"ticker": "BNP.PA", "date": "2025-09-18", "sentiment": 0.0, "mentions": 0},
+                {"ticker": "ACA.PA", "date": "2025-09-19", "sentiment": 0.4, "mentions": None},
+                {"ticker": "GLE.PA", "date": "2025-09-22", "sentiment": -0.25, "mentions": 3}]
+    if rows != expected:
+        failures.append(f"sentiment_export_row: {rows}")
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return failures
+    for name, chunks in [("sentiment", [rows[1:2], rows[0:1], rows[2:]]),
+                         ("prices", [[{"ticker": "BNP.PA", "date": "2025-09-18", "open": 61.2}],
+                                     [{"ticker": "BNP.PA", "date": "2025-09-19", "open": None}]])]:
+        try:
+            table = pa.ipc.open_stream(b"".join(arrow_stream(chunks, EXPORT_FIELDS[name]))).read_all()
+        except Exception as e:
+            failures.append(f"arrow_stream[{name}]: {type(e).__name__}: {e}")
+            continue
+        if table.to_pylist() != [r for c in chunks for r in c]:
+            failures.append(f"arrow_stream[{name}]: relecture différente ({table.to_pylist()})")
+        if [(f.name, str(f.type)) for f in table.schema] != [(n, str(pa.type_for_alias(t))) for n, t in EXPORT_FIELDS[name]]:
+            failures.append(f"arrow_stream[{name}]: schéma {table.schema}")
+    return failures
+
 # ============================ FASTAPI ROUTES ============================
 
 try:
     from fastapi import FastAPI, HTTPException, Query
     from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import StreamingResponse
+    from app.metrics import enable_metrics
+    from app.serialization import ApiJSONResponse, enable_compression
+    from app.traffic import enable_traffic_recording
 
-    app = FastAPI(title="Sentiment-Price Corr API (Local DB + JSON)", version="1.0.0")
+    app = FastAPI(title="Sentiment-Price Corr API (Local DB + JSON)", version="1.0.0",
+                  default_response_class=ApiJSONResponse)
 
     origins = os.getenv("FRONTEND_ORIGINS", "*").split(",")
     app.add_middleware(
@@ -359,6 +1528,12 @@ try:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # Compression gzip/brotli des réponses JSON (API_COMPRESSION=1)
+    enable_compression(app)
+    # Métriques Prometheus sur /metrics
+    enable_metrics(app, app_name="corr_json")
+    # Échantillon des requêtes en JSONL (TRAFFIC_RECORD_FILE) pour rejouer la charge
+    enable_traffic_recording(app, app_name="corr_json")
 
     @app.get("/api/health")
     def health():
@@ -370,9 +1545,12 @@ try:
         start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
         end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
         max_lead: int = Query(5, ge=0, le=60),
+        significance: bool = Query(False, description="Ajoute p-values (permutation) et IC (block bootstrap)"),
+        resamples: int = Query(None, ge=100, le=20000),
     ):
         try:
-            payload = run_dict(ticker=ticker, start=start, end=end, max_lead=max_lead)
+            payload = cached_run_dict(ticker=ticker, start=start, end=end, max_lead=max_lead,
+                                      significance=significance, resamples=resamples)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Computation error: {e}")
         if "error" in payload:
@@ -392,7 +1570,7 @@ try:
         h: int = Query(5, ge=1, le=60),
     ):
         try:
-            payload = run_dict(ticker=ticker, start=start, end=end, max_lead=h)
+            payload = cached_run_dict(ticker=ticker, start=start, end=end, max_lead=h)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Computation error: {e}")
         if "error" in payload:
@@ -404,6 +1582,208 @@ try:
             "forecast": payload["forecast"],
         }
     
+    def _export_response(chunks: Iterable[List[dict]], fmt: str, name: str):
+        if fmt == "arrow":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise HTTPException(status_code=400, detail="Format arrow indisponible (pyarrow non installé)")
+            return StreamingResponse(arrow_stream(chunks, EXPORT_FIELDS[name]), media_type="application/vnd.apache.arrow.stream",
+                                     headers={"Content-Disposition": f'attachment; filename="{name}.arrow"'})
+        return StreamingResponse(ndjson_stream(chunks), media_type="application/x-ndjson")
+
+    @app.get("/api/export/prices")
+    def export_prices(
+        tickers: str = Query("", description="Tickers séparés par des virgules (vide = tous)"),
+        start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        format: str = Query("ndjson", regex=r"^(ndjson|arrow)$"),
+    ):
+        tks = [t.strip() for t in tickers.split(",") if t.strip()]
+        return _export_response(iter_price_rows(get_engine(), tks, start, end), format, "prices")
+
+    @app.get("/api/export/sentiment")
+    def export_sentiment(
+        tickers: str = Query("", description="Tickers séparés par des virgules (vide = tous)"),
+        start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        format: str = Query("ndjson", regex=r"^(ndjson|arrow)$"),
+    ):
+        tks = [t.strip() for t in tickers.split(",") if t.strip()]
+        return _export_response(iter_sentiment_rows(tks, start, end), format, "sentiment")
+
+    @app.get("/api/rolling-correlation")
+    def rolling_correlation(
+        tickers: str = Query(..., min_length=1, description="Tickers séparés par des virgules"),
+        start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        window: int = Query(20, ge=3, le=500),
+        lead: int = Query(1, ge=0, le=60),
+        min_periods: int = Query(None, ge=2, le=500),
+    ):
+        if min_periods is not None and min_periods > window:
+            raise HTTPException(status_code=400, detail=f"min_periods ({min_periods}) doit être <= window ({window}).")
+        tks = [t.strip() for t in tickers.split(",") if t.strip()]
+        try:
+            payload = rolling_corr_dict(tks, start, end, window=window, lead=lead, min_periods=min_periods)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Computation error: {e}")
+        if not payload["series"]:
+            raise HTTPException(status_code=404, detail="Aucune donnée pour ces tickers/période.")
+        return payload
+
+    @app.get("/api/contagion")
+    def contagion(
+        start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        tickers: str = Query("", description="Tickers séparés par des virgules (vide = tickers communs)"),
+        max_lead: int = Query(5, ge=0, le=60),
+        top_n: int = Query(20, ge=1, le=1000),
+        min_obs: int = Query(10, ge=3),
+        include_self: bool = Query(False, description="Inclure les paires i = j"),
+    ):
+        tks = [t.strip() for t in tickers.split(",") if t.strip()] or discover_common_tickers(start, end)
+        try:
+            payload = contagion_dict(tks, start, end, max_lead=max_lead, top_n=top_n,
+                                     min_obs=min_obs, include_self=include_self)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Computation error: {e}")
+        if not payload["tickers"]:
+            raise HTTPException(status_code=404, detail="Aucune donnée pour ces tickers/période.")
+        return payload
+
+    @app.get("/api/rollup/series")
+    def rollup_series(
+        start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+    ):
+        try:
+            rollups = build_rollups(get_engine(), start, end)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Computation error: {e}")
+        if rollups["sentiment"].empty:
+            raise HTTPException(status_code=404, detail="Aucune donnée pour cette période.")
+        dates = [str(d.date()) for d in rollups["sentiment"].index]
+        clean = lambda col: [None if pd.isna(v) else float(v) for v in col]
+        return {
+            "period": {"start": start, "end": end},
+            "dates": dates,
+            "groups": {
+                g: {"sentiment": clean(rollups["sentiment"][g]), "return": clean(rollups["return"][g])}
+                for g in rollups["sentiment"].columns
+            },
+        }
+
+    @app.get("/api/rollup/correlation")
+    def rollup_correlation(
+        group: str = Query(INDEX_GROUP, description="CAC40 ou nom de secteur"),
+        start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        max_lead: int = Query(5, ge=0, le=60),
+    ):
+        try:
+            payload = rollup_dict(group=group, start=start, end=end, max_lead=max_lead)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Computation error: {e}")
+        if "error" in payload:
+            raise HTTPException(status_code=404, detail=payload["error"])
+        return {k: payload[k] for k in ("group", "members", "period", "mean_corr_return", "lead_corrs")}
+
+    @app.get("/api/rollup/forecast")
+    def rollup_forecast(
+        group: str = Query(INDEX_GROUP, description="CAC40 ou nom de secteur"),
+        start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        h: int = Query(5, ge=1, le=60),
+    ):
+        try:
+            payload = rollup_dict(group=group, start=start, end=end, max_lead=h)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Computation error: {e}")
+        if "error" in payload:
+            raise HTTPException(status_code=404, detail=payload["error"])
+        return {k: payload[k] for k in ("group", "last_date", "last_sentiment_delta", "forecast")}
+
+    @app.get("/api/panel-forecast")
+    def panel_forecast(
+        ticker: str = Query(..., min_length=1),
+        start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        h: int = Query(5, ge=1, le=60),
+        alpha: float = Query(None, ge=0, description="Pénalité ridge (défaut PANEL_RIDGE_ALPHA)"),
+    ):
+        try:
+            payload = panel_forecast_dict(ticker, start, end, H=h, alpha=alpha)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Computation error: {e}")
+        if "error" in payload:
+            raise HTTPException(status_code=404, detail=payload["error"])
+        return payload
+
+    @app.get("/api/backtest")
+    def backtest(
+        start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        tickers: str = Query("", description="Tickers séparés par des virgules (vide = tickers communs)"),
+        max_lead: int = Query(5, ge=1, le=60),
+        min_train: int = Query(20, ge=3),
+        include_predictions: bool = Query(False),
+    ):
+        tks = [t.strip() for t in tickers.split(",") if t.strip()] or discover_common_tickers(start, end)
+        try:
+            payload = backtest_dict(tks, start, end, max_lead=max_lead, min_train=min_train,
+                                    include_predictions=include_predictions)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Computation error: {e}")
+        if not payload["horizons"]:
+            raise HTTPException(status_code=404, detail="Historique insuffisant pour ces tickers/période.")
+        return payload
+
+    @app.get("/api/intraday/bars")
+    def intraday_bars(
+        ticker: str = Query(..., min_length=1),
+        start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        bar: str = Query(None, description="Taille des barres (ex: 5m, 15m, 1h ; défaut : intervalle stocké)"),
+    ):
+        try:
+            df = fetch_intraday_bars(ticker, start, end, bar=bar)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Computation error: {e}")
+        if df.empty:
+            raise HTTPException(status_code=404, detail="Pas de barres intraday pour ce ticker/période.")
+        return {
+            "ticker": ticker,
+            "period": {"start": start, "end": end},
+            "bar": bar or CFG.INTRADAY_INTERVAL,
+            "dates": df["date"].dt.strftime("%Y-%m-%dT%H:%M:%SZ").tolist(),
+            **{c: df[c].round(4).tolist() for c in ("open", "high", "low", "close")},
+            "volume": df["volume"].astype("int64").tolist(),
+        }
+
+    @app.get("/api/intraday-correlation")
+    def intraday_correlation(
+        ticker: str = Query(..., min_length=1),
+        start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        end:   str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
+        bar: str = Query("5m", description="Taille des barres (ex: 1m, 5m, 15m)"),
+        max_lead: int = Query(12, ge=0, le=500, description="Leads en nombre de barres"),
+        significance: bool = Query(False, description="Ajoute p-values (permutation) et IC (block bootstrap)"),
+        resamples: int = Query(None, ge=100, le=20000),
+    ):
+        try:
+            payload = intraday_dict(ticker, start, end, bar=bar, max_lead=max_lead,
+                                    significance=significance, resamples=resamples)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Computation error: {e}")
+        if "error" in payload:
+            raise HTTPException(status_code=404, detail=payload["error"])
+        return payload
+
     @app.get("/api/common-tickers")
     def common_tickers(
         start: str = Query(..., regex=r"^\d{4}-\d{2}-\d{2}$"),
@@ -435,14 +1815,35 @@ if __name__ == "__main__":
     ap.add_argument("--tickers", help="Liste de tickers séparés par des virgules (ex: BNP.PA,ACA.PA,STLAM.MI)")
     ap.add_argument("--all-common", action="store_true",
                     help="Ignorer --ticker/--tickers et utiliser l'intersection des tickers disponibles dans les deux sources sur la période")
-    ap.add_argument("--start",  required=True)
-    ap.add_argument("--end",    required=True)
+    ap.add_argument("--start")
+    ap.add_argument("--end")
     ap.add_argument("--max-lead", type=int, default=5)
     ap.add_argument("--out", help="Chemin de sortie JSON (ex: out.json). Si omis, imprime sur stdout.")
     ap.add_argument("--as-json", action="store_true",
                     help="[mode single] imprime la charge utile JSON complète (sinon résumé)")
+    ap.add_argument("--significance", action="store_true",
+                    help="Ajoute p-values et intervalles de confiance aux corrélations par lead")
+    ap.add_argument("--resamples", type=int, default=None,
+                    help=f"Nombre de rééchantillonnages (défaut {CFG.SIGNIFICANCE_RESAMPLES})")
+    ap.add_argument("--workers", type=int, default=None,
+                    help=f"[mode batch] threads en parallèle (défaut {CFG.BATCH_WORKERS})")
+    ap.add_argument("--backtest", action="store_true",
+                    help="Backtest walk-forward (horizons 1..max-lead) au lieu des corrélations/prévisions")
+    ap.add_argument("--min-train", type=int, default=20,
+                    help="[backtest] nombre minimal de couples d'entraînement avant la première prévision")
+    ap.add_argument("--intraday", metavar="BAR",
+                    help="[mode single] corrélations sur barres intraday de cette taille (ex: 5m), leads en barres")
+
+    ap.add_argument("--check-export", action="store_true",
+                    help="Auto-vérification de l'export (valeurs nulles/zéro, flux Arrow multi-paquets) puis sortie")
 
     args = ap.parse_args()
+    if args.check_export:
+        failures = export_self_check()
+        print(json.dumps({"ok": not failures, "failures": failures}, indent=2, ensure_ascii=False))
+        sys.exit(1 if failures else 0)
+    if not (args.start and args.end):
+        ap.error("--start et --end sont requis")
 
     # Détermination de la/les cibles
     tickers = []
@@ -456,9 +1857,17 @@ if __name__ == "__main__":
             sys.exit(1)
     elif args.tickers:
         tickers = [t.strip() for t in args.tickers.split(",") if t.strip()]
+    elif args.ticker and args.intraday:
+        payload = intraday_dict(args.ticker, args.start, args.end, bar=args.intraday, max_lead=args.max_lead,
+                                significance=args.significance, resamples=args.resamples)
+        print(json.dumps(payload, indent=2, ensure_ascii=False))
+        sys.exit(0 if "error" not in payload else 1)
+    elif args.ticker and args.backtest:
+        tickers = [args.ticker]
     elif args.ticker:
         # Mode single-ticker (historique)
-        payload = run_dict(ticker=args.ticker, start=args.start, end=args.end, max_lead=args.max_lead)
+        payload = run_dict(ticker=args.ticker, start=args.start, end=args.end, max_lead=args.max_lead,
+                           significance=args.significance, resamples=args.resamples)
         if args.out:
             Path(args.out).write_text(json.dumps(payload if args.as_json else {
                 k: payload.get(k) for k in ["ticker","period","mean_corr_return","last_date","last_sentiment_delta"]
@@ -472,8 +1881,19 @@ if __name__ == "__main__":
     else:
         ap.error("Spécifie --ticker, ou --tickers, ou --all-common")
 
+    if args.backtest:
+        report = backtest_dict(tickers, start=args.start, end=args.end,
+                               max_lead=args.max_lead, min_train=args.min_train)
+        if args.out:
+            Path(args.out).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+            print(f"✔ Écrit: {args.out}  ({len(report['tickers'])} tickers)")
+        else:
+            print(json.dumps(report["horizons"], indent=2, ensure_ascii=False))
+        sys.exit(0)
+
     # Mode batch (plusieurs tickers)
-    batch = run_batch_dict(tickers, start=args.start, end=args.end, max_lead=args.max_lead)
+    batch = run_batch_dict(tickers, start=args.start, end=args.end, max_lead=args.max_lead,
+                           significance=args.significance, resamples=args.resamples, workers=args.workers)
 
     if args.out:
         Path(args.out).write_text(json.dumps(batch, indent=2, ensure_ascii=False), encoding="utf-8")